@@ -0,0 +1,66 @@
+"""
+In-memory stand-ins for maya.cmds, maya.api.OpenMaya and the Qt modules the tools import, so the tools
+can be run and timed on machines without Maya.
+
+    import fake_maya
+    fake_maya.install()
+    fake_maya.SCENE.reset()
+
+install() has to run before the tools are imported.
+"""
+
+import sys
+import types
+
+from fake_maya import cmds, openmaya, openmaya_anim, openmaya_api1, openmaya_ui, qt
+from fake_maya.scene import SCENE
+
+
+def install():
+    """
+    Register the stand-ins under the module names the tools import.
+    :return: None
+    """
+    maya = types.ModuleType("maya")
+    standalone = types.ModuleType("maya.standalone")
+    standalone.initialize = lambda **kwargs: None
+    standalone.uninitialize = lambda **kwargs: None
+    api = types.ModuleType("maya.api")
+    api.OpenMaya = openmaya
+    api.OpenMayaAnim = openmaya_anim
+    maya.cmds = cmds
+    maya.standalone = standalone
+    maya.api = api
+    maya.OpenMaya = openmaya_api1
+    maya.OpenMayaUI = openmaya_ui
+
+    sys.modules.update({
+        "maya": maya,
+        "maya.cmds": cmds,
+        "maya.standalone": standalone,
+        "maya.api": api,
+        "maya.api.OpenMaya": openmaya,
+        "maya.api.OpenMayaAnim": openmaya_anim,
+        "maya.OpenMaya": openmaya_api1,
+        "maya.OpenMayaUI": openmaya_ui,
+        "PySide2": qt.PySide2,
+        "PySide2.QtWidgets": qt.QtWidgets,
+        "PySide2.QtCore": qt.QtCore,
+        "shiboken2": qt.shiboken2,
+    })
+
+
+def call_count():
+    """
+    Number of emulated commands called since the last reset_call_counts().
+    :return: Integer
+    """
+    return sum(cmds.CALL_COUNTS.values())
+
+
+def reset_call_counts():
+    """
+    Start counting emulated commands from zero.
+    :return: None
+    """
+    cmds.CALL_COUNTS.clear()
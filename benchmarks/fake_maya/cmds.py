@@ -0,0 +1,429 @@
+"""
+In-memory stand-in for the subset of maya.cmds used by the tools.
+
+Every command call is counted in CALL_COUNTS. UI commands only remember the flags they were last given,
+so tools can read back text fields and check boxes the benchmark filled in.
+"""
+
+import collections
+import importlib
+import os
+import re
+import sys
+import tempfile
+
+from fake_maya import scene as _scene
+
+
+CALL_COUNTS = collections.Counter()
+
+_COMPONENT_PATTERN = re.compile(r"^(?P<node>[^.]+)\.f\[(?P<range>[^\]]+)\]$")
+
+
+def _counted(function):
+    def wrapper(*args, **kwargs):
+        CALL_COUNTS[function.__name__] += 1
+        return function(*args, **kwargs)
+    wrapper.__name__ = function.__name__
+    return wrapper
+
+
+def _as_list(value):
+    if value is None:
+        return []
+    if isinstance(value, (list, tuple)):
+        result = []
+        for item in value:
+            result.extend(_as_list(item))
+        return result
+    return [value]
+
+
+def _expand_component(name):
+    # expand "node.f[a:b]" into (shape, [face ids]); plain node names give (node, None)
+    match = _COMPONENT_PATTERN.match(name)
+    if match is None:
+        return _scene.SCENE.resolve(name), None
+    shape = _scene.SCENE.shape_of(match.group("node"))
+    face_range = match.group("range")
+    if face_range == "*":
+        return shape, list(range(shape.face_count))
+    if ":" in face_range:
+        start, end = face_range.split(":")
+        return shape, list(range(int(start), int(end) + 1))
+    return shape, [int(face_range)]
+
+
+def _selection_items(items):
+    members = []
+    for item in items:
+        node, faces = _expand_component(item)
+        if faces is None:
+            members.append(node.name)
+        else:
+            members.extend(_scene.compact_components(node.component_owner(), faces))
+    return members
+
+
+@_counted
+def ls(*args, **kwargs):
+    selection = kwargs.get("selection", kwargs.get("sl", False))
+    flatten = kwargs.get("flatten", kwargs.get("fl", False))
+    long_names = kwargs.get("long", kwargs.get("l", False))
+    objects_only = kwargs.get("objectsOnly", kwargs.get("o", False))
+    node_type = kwargs.get("type")
+    items = list(_scene.SCENE.selection) if selection else _as_list(args)
+    if node_type is not None and not items:
+        items = [node.name for node in _scene.SCENE.nodes.values() if node.type in _as_list(node_type)]
+    result = []
+    for item in items:
+        if not _scene.SCENE.exists(item):
+            continue
+        node, faces = _expand_component(item)
+        if node_type is not None and node.type not in _as_list(node_type):
+            continue
+        if kwargs.get("noIntermediate", kwargs.get("ni", False)) and node.attrs.get("intermediateObject"):
+            continue
+        if objects_only or faces is None:
+            name = node.long_name() if long_names else node.name
+            if name not in result:
+                result.append(name)
+        elif flatten:
+            prefix = node.long_name() if long_names else node.component_owner()
+            result.extend("{0}.f[{1}]".format(prefix, face) for face in faces)
+        else:
+            result.append(item)
+    return result
+
+
+@_counted
+def listRelatives(*args, **kwargs):
+    nodes = [_scene.SCENE.resolve(name) for name in _as_list(args)]
+    full_path = kwargs.get("fullPath", kwargs.get("f", False))
+    result = []
+    for node in nodes:
+        if kwargs.get("parent", kwargs.get("p", False)):
+            related = [node.parent] if node.parent is not None else []
+        elif kwargs.get("allDescendents", kwargs.get("ad", False)):
+            related = node.descendants()
+        else:
+            related = list(node.children)
+        node_type = kwargs.get("type")
+        if node_type == "shape":
+            related = [child for child in related if child.is_shape()]
+        elif node_type is not None:
+            related = [child for child in related if child.type == node_type]
+        if kwargs.get("noIntermediate", kwargs.get("ni", False)):
+            related = [child for child in related if not child.attrs.get("intermediateObject")]
+        result.extend(child.long_name() if full_path else child.name for child in related)
+    return result or None
+
+
+@_counted
+def select(*args, **kwargs):
+    _scene.SCENE.selection = _selection_items(_as_list(args))
+
+
+@_counted
+def hyperShade(*args, **kwargs):
+    scene = _scene.SCENE
+    if kwargs.get("shaderNetworksSelectMaterialNodes"):
+        materials = []
+        for item in scene.selection:
+            shape, faces = _expand_component(item)
+            for shading_engine in scene.shading_engines_of(shape, faces):
+                material = scene.surface_shader(shading_engine)
+                if material is not None and material not in materials:
+                    materials.append(material)
+        scene.selection = materials
+    elif "objects" in kwargs:
+        members = []
+        for material in scene.selection:
+            for shading_engine in scene.shading_engines_of_material(material):
+                members.extend(scene.set_members(shading_engine))
+        scene.selection = members
+    elif "assign" in kwargs:
+        shading_engine = scene.shading_engine_for(kwargs["assign"])
+        for item in scene.selection:
+            node = scene.resolve(item)
+            for shape in ([node] if node.is_shape() else [child for child in node.children if child.is_shape()]):
+                scene.assign(shape, shading_engine, None)
+
+
+@_counted
+def sets(*args, **kwargs):
+    if kwargs.get("query", kwargs.get("q", False)):
+        return _scene.SCENE.set_members(_as_list(args)[0]) or None
+    raise NotImplementedError("sets: only query mode is emulated")
+
+
+@_counted
+def polyEvaluate(*args, **kwargs):
+    shape = _scene.SCENE.shape_of(_as_list(args)[0])
+    if kwargs.get("face", kwargs.get("f", False)):
+        return shape.face_count
+    if kwargs.get("vertex", kwargs.get("v", False)):
+        return len(shape.points)
+    raise NotImplementedError("polyEvaluate: only face/vertex are emulated")
+
+
+@_counted
+def getAttr(plug, **kwargs):
+    return _scene.SCENE.get_attr(plug)
+
+
+@_counted
+def setAttr(plug, *values, **kwargs):
+    _scene.SCENE.set_attr(plug, values, kwargs.get("type"))
+
+
+@_counted
+def addAttr(*args, **kwargs):
+    node = _scene.SCENE.resolve(_as_list(args)[0])
+    long_name = kwargs.get("longName", kwargs.get("ln"))
+    parent = kwargs.get("parent", kwargs.get("p"))
+    if parent is not None:
+        node.add_child_attribute(long_name, parent)
+        return
+    data_type = kwargs.get("dataType", kwargs.get("dt")) or kwargs.get("attributeType", kwargs.get("at"))
+    node.add_dynamic(long_name, data_type, kwargs.get("multi", kwargs.get("m", False)))
+
+
+@_counted
+def deleteAttr(plug, **kwargs):
+    node_name, attribute = plug.split(".", 1)
+    _scene.SCENE.resolve(node_name).remove_dynamic(attribute)
+
+
+@_counted
+def attributeQuery(attribute, **kwargs):
+    node = _scene.SCENE.resolve(kwargs["node"])
+    if kwargs.get("exists", kwargs.get("ex", False)):
+        return node.has_attr(attribute)
+    raise NotImplementedError("attributeQuery: only exists is emulated")
+
+
+@_counted
+def objExists(name):
+    return _scene.SCENE.exists(name)
+
+
+@_counted
+def nodeType(node, **kwargs):
+    if isinstance(node, (list, tuple)):
+        node = node[0]
+    if node is None:
+        raise TypeError("nodeType: object is None")
+    return _scene.SCENE.resolve(node.split(".")[0]).type
+
+
+@_counted
+def createNode(node_type, **kwargs):
+    return _scene.SCENE.create_node(node_type, kwargs.get("name", kwargs.get("n")), kwargs.get("parent", kwargs.get("p"))).name
+
+
+@_counted
+def shadingNode(node_type, **kwargs):
+    return _scene.SCENE.create_node(node_type, kwargs.get("name", kwargs.get("n"))).name
+
+
+@_counted
+def delete(*args, **kwargs):
+    for name in _as_list(args):
+        _scene.SCENE.delete(name)
+
+
+@_counted
+def rename(old_name, new_name):
+    return _scene.SCENE.rename(old_name, new_name)
+
+
+@_counted
+def connectAttr(source, destination, **kwargs):
+    _scene.SCENE.connect(source, destination)
+
+
+@_counted
+def connectionInfo(plug, **kwargs):
+    scene = _scene.SCENE
+    if kwargs.get("isExactDestination", kwargs.get("ied", False)):
+        return plug in scene.connections
+    if kwargs.get("isDestination", kwargs.get("id", False)):
+        return scene.is_destination(plug)
+    if kwargs.get("sourceFromDestination", kwargs.get("sfd", False)):
+        return scene.connections.get(plug, "")
+    raise NotImplementedError("connectionInfo: flag not emulated")
+
+
+@_counted
+def listConnections(*args, **kwargs):
+    source = kwargs.get("source", kwargs.get("s", True))
+    destination = kwargs.get("destination", kwargs.get("d", True))
+    with_connections = kwargs.get("connections", kwargs.get("c", False))
+    plugs = kwargs.get("plugs", kwargs.get("p", False))
+    node_type = kwargs.get("type", kwargs.get("t"))
+    result = []
+    for item in _as_list(args):
+        pairs = _scene.SCENE.connections_of(item, source, destination)
+        for local_plug, remote_plug in pairs:
+            remote_node = remote_plug.split(".")[0]
+            if node_type is not None and _scene.SCENE.resolve(remote_node).type != node_type:
+                continue
+            remote = remote_plug if plugs else remote_node
+            if with_connections:
+                result.extend([local_plug, remote])
+            else:
+                result.append(remote)
+    return result or None
+
+
+@_counted
+def listHistory(*args, **kwargs):
+    result = []
+    pending = list(_as_list(args))
+    while pending:
+        name = pending.pop(0)
+        node = _scene.SCENE.resolve(name.split(".")[0])
+        if node.name in result:
+            continue
+        result.append(node.name)
+        for local_plug, remote_plug in _scene.SCENE.connections_of(node.name, True, False):
+            pending.append(remote_plug)
+    return result
+
+
+@_counted
+def file(*args, **kwargs):
+    return _scene.SCENE.file_command(args, kwargs)
+
+
+# plugins loaded in the session, Python plugins given by path are run and register their commands here
+LOADED_PLUGINS = set(["mtoa"])
+
+
+@_counted
+def loadPlugin(*args, **kwargs):
+    from fake_maya import openmaya
+    for path in args:
+        name = os.path.splitext(os.path.basename(path))[0]
+        if path.endswith(".py"):
+            sys.path.insert(0, os.path.dirname(os.path.abspath(path)))
+            try:
+                importlib.import_module(name).initializePlugin(openmaya.MObject(None))
+            finally:
+                sys.path.pop(0)
+        LOADED_PLUGINS.add(name)
+    return list(args)
+
+
+def _register_command(name, creator):
+    def command(*args, **kwargs):
+        CALL_COUNTS[name] += 1
+        instance = creator()
+        instance.doIt(args)
+        if instance.isUndoable():
+            _scene.SCENE.undo_queue.append(instance)
+    command.__name__ = name
+    globals()[name] = command
+
+
+@_counted
+def undo(*args, **kwargs):
+    if _scene.SCENE.undo_queue:
+        _scene.SCENE.undo_queue.pop().undoIt()
+
+
+@_counted
+def undoInfo(*args, **kwargs):
+    return None
+
+
+@_counted
+def refresh(*args, **kwargs):
+    return None
+
+
+@_counted
+def about(*args, **kwargs):
+    if kwargs.get("version", kwargs.get("v", False)):
+        return "2024"
+    if kwargs.get("batch", kwargs.get("b", False)):
+        return False
+    return ""
+
+
+# Maya user directory of the session, a fresh temporary directory per process
+_USER_APP_DIR = []
+
+
+@_counted
+def internalVar(*args, **kwargs):
+    if not _USER_APP_DIR:
+        _USER_APP_DIR.append(tempfile.mkdtemp(prefix="fake_maya_") + "/")
+    return _USER_APP_DIR[0]
+
+
+@_counted
+def workspace(*args, **kwargs):
+    if kwargs.get("query", kwargs.get("q", False)):
+        return internalVar(userAppDir=True)
+    return None
+
+
+@_counted
+def warning(*args, **kwargs):
+    return None
+
+
+@_counted
+def pluginInfo(*args, **kwargs):
+    if kwargs.get("version", kwargs.get("v", False)):
+        return "5.3.0"
+    if kwargs.get("loaded", kwargs.get("l", False)):
+        return args[0] in LOADED_PLUGINS
+    return True
+
+
+@_counted
+def currentTime(*args, **kwargs):
+    if kwargs.get("query", kwargs.get("q", False)):
+        return _scene.SCENE.current_time
+    _scene.SCENE.current_time = args[0]
+
+
+# callables handed to evalDeferred, run them with run_deferred()
+DEFERRED = []
+
+
+@_counted
+def evalDeferred(command, **kwargs):
+    DEFERRED.append(command)
+
+
+def run_deferred():
+    # run deferred commands, including the ones they defer, the way an idle Maya session would
+    while DEFERRED:
+        DEFERRED.pop(0)()
+
+
+_UI_VALUES = {}
+
+
+def _ui_command(name):
+    def command(*args, **kwargs):
+        CALL_COUNTS[name] += 1
+        if kwargs.get("exists"):
+            return args[0] in _UI_VALUES
+        if kwargs.get("query", kwargs.get("q", False)):
+            flags = [flag for flag in kwargs if flag not in ("query", "q")]
+            return _UI_VALUES.get(args[0], {}).get(flags[0] if flags else "text")
+        if args:
+            _UI_VALUES.setdefault(args[0], {}).update(kwargs)
+        return args[0] if args else name
+    command.__name__ = name
+    return command
+
+
+for _ui_name in ("window", "deleteUI", "columnLayout", "rowLayout", "text", "textFieldButtonGrp", "button",
+                 "showWindow", "progressBar", "intField", "checkBox", "setParent"):
+    globals()[_ui_name] = _ui_command(_ui_name)
@@ -0,0 +1,459 @@
+"""
+In-memory stand-in for the subset of maya.api.OpenMaya used by the tools.
+"""
+
+from fake_maya import cmds as _cmds
+from fake_maya import scene as _scene
+
+
+def _count(name):
+    _cmds.CALL_COUNTS["om." + name] += 1
+
+
+class MSpace(object):
+    kWorld = 4
+    kObject = 2
+
+
+class MFnData(object):
+    kString = 4
+    kDoubleArray = 7
+    kIntArray = 9
+    kPointArray = 10
+    kVectorArray = 11
+
+
+class MFnNumericData(object):
+    kFloat = 10
+    kDouble = 11
+    k3Float = 12
+
+
+_TYPED_NAMES = {MFnData.kString: "string", MFnData.kDoubleArray: "doubleArray", MFnData.kIntArray: "Int32Array",
+                MFnData.kPointArray: "pointArray", MFnData.kVectorArray: "vectorArray"}
+
+
+class MVector(tuple):
+    def __new__(cls, *args):
+        return tuple.__new__(cls, tuple(args[0])[:3] if len(args) == 1 else args)
+
+    def normal(self):
+        length = sum(value * value for value in self) ** 0.5
+        return MVector([value / length for value in self]) if length else MVector(self)
+
+
+class MPoint(tuple):
+    def __new__(cls, *args):
+        if len(args) == 3:
+            return tuple.__new__(cls, (args[0], args[1], args[2], 1.0))
+        if len(args) == 1:
+            args = tuple(args[0])
+        values = [float(value) for value in args] + [1.0] * (4 - len(args))
+        return tuple.__new__(cls, values[:4])
+
+
+class _Array(list):
+    def __init__(self, values=()):
+        list.__init__(self, values)
+
+
+class MDoubleArray(_Array):
+    pass
+
+
+class MIntArray(_Array):
+    pass
+
+
+class MVectorArray(_Array):
+    pass
+
+
+class MPointArray(_Array):
+    def setLength(self, length):
+        del self[length:]
+        self.extend([(0.0, 0.0, 0.0, 1.0)] * (length - len(self)))
+
+
+class _ArrayData(object):
+    # array data keeps a plain list, the real classes copy into C++ arrays at a cost the stand-in does not model
+    convert = staticmethod(list)
+
+    def create(self, values=()):
+        return ("data", self.convert(values))
+
+
+class MFnDoubleArrayData(_ArrayData):
+    pass
+
+
+class MFnIntArrayData(_ArrayData):
+    pass
+
+
+class MFnVectorArrayData(_ArrayData):
+    pass
+
+
+class MFnPointArrayData(_ArrayData):
+    kPointArray = MFnData.kPointArray
+    convert = staticmethod(list)
+
+
+class MFnStringData(_ArrayData):
+    convert = staticmethod(str)
+
+
+class _Attribute(object):
+    def __init__(self, name, data_type, default=None, children=()):
+        self.name = name
+        self.data_type = data_type
+        self.default = default
+        self.children = list(children)
+        self.array = False
+
+
+class MFnTypedAttribute(object):
+    def __init__(self, node=None):
+        self._attribute = None
+
+    def create(self, long_name, short_name, data_type, default=None):
+        self._attribute = _Attribute(long_name, _TYPED_NAMES[data_type], default[1] if default else None)
+        return self._attribute
+
+    @property
+    def array(self):
+        return self._attribute.array
+
+    @array.setter
+    def array(self, value):
+        self._attribute.array = value
+
+
+class MFnNumericAttribute(MFnTypedAttribute):
+    def create(self, long_name, short_name, data_type, default=0.0):
+        self._attribute = _Attribute(long_name, "double" if data_type == MFnNumericData.kDouble else "float", default)
+        return self._attribute
+
+    def createColor(self, long_name, short_name):
+        self._attribute = _Attribute(long_name, "float3", (0.0, 0.0, 0.0), [long_name + channel for channel in "RGB"])
+        return self._attribute
+
+
+class MObject(object):
+    def __init__(self, node):
+        self.node = node
+
+
+class MDagPath(object):
+    def __init__(self, node):
+        self._node = node
+
+    def node(self):
+        return MObject(self._node)
+
+    def fullPathName(self):
+        return self._node.long_name()
+
+    def partialPathName(self):
+        return self._node.name
+
+    def instanceNumber(self):
+        return 0
+
+
+class MFnDagNode(object):
+    def __init__(self, mobject):
+        self._node = mobject.node
+
+    def fullPathName(self):
+        return self._node.long_name()
+
+
+class MSelectionList(object):
+    def __init__(self):
+        self._nodes = []
+
+    def add(self, name):
+        _count("MSelectionList.add")
+        node = _scene.SCENE.resolve(name.split(".")[0])
+        self._nodes.append(node)
+        return self
+
+    def length(self):
+        return len(self._nodes)
+
+    def isEmpty(self):
+        return not self._nodes
+
+    def getDependNode(self, index):
+        return MObject(self._nodes[index])
+
+    def getDagPath(self, index):
+        return MDagPath(self._nodes[index])
+
+
+class MPlug(object):
+    def __init__(self, node, attribute, index=None, channel=None):
+        self.node_ = node
+        self.attribute_name = attribute
+        self.index = index
+        self.channel = channel
+
+    def elementByLogicalIndex(self, index):
+        return MPlug(self.node_, self.attribute_name, index)
+
+    def child(self, channel):
+        return MPlug(self.node_, self.attribute_name, self.index, channel)
+
+    def name(self):
+        return "{0}.{1}".format(self.node_.name, self.attribute_name)
+
+    def attribute(self):
+        return self.attribute_name
+
+    def asString(self):
+        return self.node_.attrs[self.attribute_name]
+
+    def asMObject(self, context=None):
+        # outMesh gives the mesh itself, worldMatrix the translation of its parents, time does not change either
+        _count("MPlug.asMObject")
+        if self.attribute_name == "worldMatrix":
+            return _MatrixData(MMatrix(self.node_.world_offset()))
+        return MObject(self.node_)
+
+
+_OUTPUT_PLUGS = ("outMesh", "worldMatrix")
+
+
+class MFnDependencyNode(object):
+    def __init__(self, mobject):
+        self._node = mobject.node
+
+    def name(self):
+        return self._node.name
+
+    def hasAttribute(self, name):
+        return self._node.has_attr(name)
+
+    def findPlug(self, name, want_networked=False):
+        if not self._node.has_attr(name) and name not in _OUTPUT_PLUGS:
+            raise RuntimeError("(kInvalidParameter): No element at given index")
+        return MPlug(self._node, name)
+
+    def addAttribute(self, attribute):
+        _add_attribute(self._node, attribute)
+
+    def removeAttribute(self, attribute_name):
+        self._node.remove_dynamic(attribute_name)
+
+
+def _add_attribute(node, attribute):
+    node.add_dynamic(attribute.name, attribute.data_type, attribute.array)
+    if attribute.default is not None and not attribute.array:
+        node.attrs[attribute.name] = attribute.default
+    for child in attribute.children:
+        node.add_child_attribute(child, attribute.name)
+
+
+def _write(plug, value):
+    attrs = plug.node_.attrs
+    if plug.channel is not None:
+        current = list(attrs[plug.attribute_name] or (0.0, 0.0, 0.0))
+        current[plug.channel] = float(value)
+        attrs[plug.attribute_name] = tuple(current)
+    elif plug.index is not None:
+        attrs[plug.attribute_name][plug.index] = value
+    else:
+        attrs[plug.attribute_name] = value
+
+
+class MDGModifier(object):
+    def __init__(self):
+        self._pending = []
+        self._done = []
+
+    def addAttribute(self, mobject, attribute):
+        _count("MDGModifier.addAttribute")
+        self._pending.append(("add", mobject.node, attribute))
+
+    def newPlugValue(self, plug, data):
+        _count("MDGModifier.newPlugValue")
+        self._pending.append(("set", plug, data[1]))
+
+    def newPlugValueDouble(self, plug, value):
+        _count("MDGModifier.newPlugValue")
+        self._pending.append(("set", plug, float(value)))
+
+    newPlugValueFloat = newPlugValueDouble
+
+    def newPlugValueString(self, plug, value):
+        _count("MDGModifier.newPlugValue")
+        self._pending.append(("set", plug, value))
+
+    def doIt(self):
+        _count("MDGModifier.doIt")
+        for operation in self._pending:
+            if operation[0] == "add":
+                _add_attribute(operation[1], operation[2])
+                self._done.append(("remove", operation[1], operation[2].name))
+            else:
+                plug = operation[1]
+                previous = plug.node_.attrs.get(plug.attribute_name)
+                self._done.append(("restore", plug.node_, plug.attribute_name,
+                                   dict(previous) if isinstance(previous, dict) else previous))
+                _write(plug, operation[2])
+        self._pending = []
+
+    def undoIt(self):
+        _count("MDGModifier.undoIt")
+        for operation in reversed(self._done):
+            if operation[0] == "remove":
+                operation[1].remove_dynamic(operation[2])
+            elif operation[1].has_attr(operation[2]):
+                operation[1].attrs[operation[2]] = operation[3]
+        self._done = []
+
+
+class MFnMesh(object):
+    def __init__(self, dag_path):
+        self._node = dag_path._node if isinstance(dag_path, MDagPath) else dag_path.node
+
+    def getPoints(self, space=MSpace.kObject):
+        _count("MFnMesh.getPoints")
+        # points stay plain (x, y, z, w) tuples, building an MPoint per point would time the stand-in instead of the tool
+        points = self._node.world_points() if space == MSpace.kWorld else self._node.points
+        return MPointArray([(x, y, z, 1.0) for x, y, z in points])
+
+    def getFloatPoints(self, space=MSpace.kObject):
+        _count("MFnMesh.getFloatPoints")
+        points = self._node.world_points() if space == MSpace.kWorld else self._node.points
+        return MPointArray([(x, y, z, 1.0) for x, y, z in points])
+
+    @property
+    def numVertices(self):
+        return len(self._node.points)
+
+    @property
+    def numPolygons(self):
+        return self._node.face_count
+
+    def getVertices(self):
+        return MIntArray(self._node.face_vertex_counts), MIntArray(self._node.face_vertices)
+
+    def getVertexNormals(self, angle_weighted, space=MSpace.kObject):
+        # the stand-in meshes are flat, facing +Z
+        _count("MFnMesh.getVertexNormals")
+        return MVectorArray([(0.0, 0.0, 1.0)] * len(self._node.points))
+
+    def getNormalIds(self):
+        # one normal per vertex, shared by the faces around it
+        return MIntArray(self._node.face_vertex_counts), MIntArray(self._node.face_vertices)
+
+    def getTangents(self, space=MSpace.kObject, uv_set=None):
+        _count("MFnMesh.getTangents")
+        return MVectorArray([(1.0, 0.0, 0.0)] * len(self._node.points))
+
+    def numUVs(self, uv_set=None):
+        return len(self._node.points)
+
+    def getUVs(self, uv_set=None):
+        return [point[0] for point in self._node.points], [point[1] for point in self._node.points]
+
+
+class MMatrix(object):
+    # translation only, the stand-in scene has no rotation or scale
+    def __init__(self, translate=(0.0, 0.0, 0.0)):
+        # 16 values of a full matrix keep their translation row
+        self.translate = tuple(translate[12:15] if len(translate) == 16 else translate)
+
+    def __getitem__(self, index):
+        if 12 <= index < 15:
+            return self.translate[index - 12]
+        return 1.0 if index % 5 == 0 else 0.0
+
+    def isEquivalent(self, other, tolerance=1e-10):
+        return self.translate == other.translate
+
+    def inverse(self):
+        return MMatrix([-value for value in self.translate])
+
+    def transpose(self):
+        # the rotation part is the identity, directions do not see the translation either way
+        return MMatrix()
+
+    def __rmul__(self, point):
+        if isinstance(point, MVector):
+            return point
+        x, y, z = self.translate
+        return (point[0] + x, point[1] + y, point[2] + z, 1.0)
+
+
+MMatrix.kIdentity = MMatrix()
+
+
+class _MatrixData(object):
+    def __init__(self, matrix):
+        self.matrix_ = matrix
+
+
+class MFnMatrixData(object):
+    def __init__(self, data):
+        self._data = data
+
+    def matrix(self):
+        return self._data.matrix_
+
+
+class MDGContext(object):
+    _current = None
+
+    def __init__(self, time=None):
+        self.time = time
+
+    def makeCurrent(self):
+        previous_context = MDGContext._current or MDGContext()
+        MDGContext._current = self
+        return previous_context
+
+
+class MTime(object):
+    kFilm = 6
+
+    def __init__(self, value=0.0, unit=kFilm):
+        self._value = value
+        self.unit = unit
+
+    @staticmethod
+    def uiUnit():
+        return MTime.kFilm
+
+    @property
+    def value(self):
+        return self._value
+
+
+class MGlobal(object):
+    @staticmethod
+    def displayWarning(message):
+        _count("MGlobal.displayWarning")
+
+    @staticmethod
+    def displayInfo(message):
+        _count("MGlobal.displayInfo")
+
+
+class MPxCommand(object):
+    def isUndoable(self):
+        return False
+
+
+class MFnPlugin(object):
+    def __init__(self, plugin, vendor="", version=""):
+        pass
+
+    def registerCommand(self, name, creator):
+        _cmds._register_command(name, creator)
+
+    def deregisterCommand(self, name):
+        pass
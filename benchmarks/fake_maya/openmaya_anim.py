@@ -0,0 +1,19 @@
+"""
+In-memory stand-in for the subset of maya.api.OpenMayaAnim used by the tools.
+"""
+
+from fake_maya import cmds as _cmds
+from fake_maya import scene as _scene
+
+
+class MAnimControl(object):
+    @staticmethod
+    def setCurrentTime(time):
+        _cmds.CALL_COUNTS["oma.MAnimControl.setCurrentTime"] += 1
+        _scene.SCENE.current_time = time.value
+
+    @staticmethod
+    def currentTime():
+        _cmds.CALL_COUNTS["oma.MAnimControl.currentTime"] += 1
+        from fake_maya.openmaya import MTime
+        return MTime(_scene.SCENE.current_time)
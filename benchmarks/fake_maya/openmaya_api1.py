@@ -0,0 +1,147 @@
+"""
+In-memory stand-in for the subset of maya.OpenMaya, the API 1.0, used by the tools.
+
+Generate Pref evaluates and reads its meshes through it, for their raw points, the rest of the tools use
+maya.api.OpenMaya. Arrays are filled in place the way the API 1.0 fills them.
+"""
+
+import itertools
+from array import array
+
+from fake_maya import cmds as _cmds
+from fake_maya import scene as _scene
+
+
+def _count(name):
+    _cmds.CALL_COUNTS["om1." + name] += 1
+
+
+class MSpace(object):
+    kObject = 2
+    kWorld = 4
+
+
+class _Array(list):
+    # API 1.0 arrays are sized with length() and read one item at a time
+    def length(self):
+        return len(self)
+
+    def _fill(self, values):
+        self[:] = values
+
+
+class MIntArray(_Array):
+    pass
+
+
+class MFloatArray(_Array):
+    pass
+
+
+class MFloatVector(object):
+    def __init__(self, x=0.0, y=0.0, z=0.0):
+        self.x = x
+        self.y = y
+        self.z = z
+
+
+class MFloatVectorArray(_Array):
+    pass
+
+
+class MObject(object):
+    def __init__(self, node=None):
+        self.node = node
+
+
+class MSelectionList(object):
+    def __init__(self):
+        self._nodes = []
+
+    def add(self, name):
+        _count("MSelectionList.add")
+        self._nodes.append(_scene.SCENE.resolve(name.split(".")[0]))
+
+    def getDependNode(self, index, mobject):
+        mobject.node = self._nodes[index]
+
+
+class MPlug(object):
+    def __init__(self, node, attribute):
+        self.node_ = node
+        self.attribute_name = attribute
+
+    def asMObject(self, context=None):
+        # outMesh gives the mesh itself, time does not change it
+        _count("MPlug.asMObject")
+        return MObject(self.node_)
+
+
+class MFnDependencyNode(object):
+    def __init__(self, mobject):
+        self._node = mobject.node
+
+    def findPlug(self, name, want_networked=False):
+        return MPlug(self._node, name)
+
+
+class _FloatPointer(object):
+    # stands in for the SWIG float pointer, int() gives its address
+    def __init__(self, data):
+        self._data = data
+
+    def __int__(self):
+        return self._data.buffer_info()[0]
+
+    __long__ = __int__
+
+
+class MFnMesh(object):
+    def __init__(self, mobject):
+        self._node = mobject.node
+
+    def numVertices(self):
+        return len(self._node.points)
+
+    def getVertices(self, vertex_counts, vertices):
+        vertex_counts._fill(self._node.face_vertex_counts)
+        vertices._fill(self._node.face_vertices)
+
+    def getVertexNormals(self, angle_weighted, normals, space=MSpace.kObject):
+        # the stand-in meshes are flat, facing +Z
+        _count("MFnMesh.getVertexNormals")
+        normals._fill([MFloatVector(0.0, 0.0, 1.0) for point in self._node.points])
+
+    def getNormalIds(self, normal_counts, normal_ids):
+        # one normal per vertex, shared by the faces around it
+        normal_counts._fill(self._node.face_vertex_counts)
+        normal_ids._fill(self._node.face_vertices)
+
+    def getTangents(self, tangents, space=MSpace.kObject, uv_set=None):
+        _count("MFnMesh.getTangents")
+        tangents._fill([MFloatVector(1.0, 0.0, 0.0) for point in self._node.points])
+
+    def numUVs(self, uv_set=None):
+        return len(self._node.points)
+
+    def getUVs(self, us, vs, uv_set=None):
+        us._fill([point[0] for point in self._node.points])
+        vs._fill([point[1] for point in self._node.points])
+
+    def getRawPoints(self):
+        # Maya hands out the float points the mesh data holds, the stand-in makes them from its point tuples and
+        # keeps them as long as the function set, like the mesh data does
+        _count("MFnMesh.getRawPoints")
+        self._raw_points = array("f", itertools.chain.from_iterable(self._node.points))
+        return _FloatPointer(self._raw_points)
+
+
+class MTime(object):
+    def __init__(self, value=0.0, unit=6):
+        self.value = value
+        self.unit = unit
+
+
+class MDGContext(object):
+    def __init__(self, time=None):
+        self.time = time
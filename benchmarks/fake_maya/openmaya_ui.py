@@ -0,0 +1,9 @@
+"""
+In-memory stand-in for maya.OpenMayaUI, there is no main window outside of Maya.
+"""
+
+
+class MQtUtil(object):
+    @staticmethod
+    def mainWindow():
+        return 0
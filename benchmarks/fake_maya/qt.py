@@ -0,0 +1,105 @@
+"""
+Stand-ins for the PySide2 widgets and shiboken2 calls the tools build their UI with.
+
+Widgets accept any call and do nothing, except the few the tools read values back from.
+"""
+
+import types
+
+
+class QtObject(object):
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return lambda *args, **kwargs: 0
+
+
+class Signal(object):
+    def __init__(self):
+        self.slots = []
+
+    def connect(self, slot):
+        self.slots.append(slot)
+
+    def emit(self, *args):
+        for slot in self.slots:
+            slot(*args)
+
+
+class QWidget(QtObject):
+    pass
+
+
+class QCheckBox(QWidget):
+    def __init__(self, *args, **kwargs):
+        self.checked = False
+
+    def setChecked(self, checked):
+        self.checked = checked
+
+    def isChecked(self):
+        return self.checked
+
+
+class QSpinBox(QWidget):
+    NoButtons = 2
+
+    def __init__(self, *args, **kwargs):
+        self.number = 0
+
+    def setValue(self, value):
+        self.number = value
+
+    def value(self):
+        return self.number
+
+    def text(self):
+        return str(self.number)
+
+
+class QPushButton(QWidget):
+    def __init__(self, *args, **kwargs):
+        self.clicked = Signal()
+
+
+class QSizePolicy(object):
+    Minimum = 1
+    Expanding = 7
+
+
+class Qt(object):
+    Window = 0x1
+    WindowContextHelpButtonHint = 0x10000
+    AlignLeft = 0x1
+    AlignRight = 0x2
+
+
+def wrapInstance(pointer, base):
+    return None
+
+
+def isValid(instance):
+    # stand-in widgets are never deleted by Qt
+    return True
+
+
+QtWidgets = types.ModuleType("PySide2.QtWidgets")
+for _name in ("QLabel", "QSpacerItem", "QHBoxLayout", "QVBoxLayout", "QGridLayout", "QProgressBar", "QApplication"):
+    setattr(QtWidgets, _name, type(_name, (QtObject,), {}))
+for _class in (QWidget, QCheckBox, QSpinBox, QPushButton, QSizePolicy):
+    setattr(QtWidgets, _class.__name__, _class)
+
+QtCore = types.ModuleType("PySide2.QtCore")
+QtCore.Qt = Qt
+QtCore.Signal = lambda *args: Signal()
+
+PySide2 = types.ModuleType("PySide2")
+PySide2.QtWidgets = QtWidgets
+PySide2.QtCore = QtCore
+
+shiboken2 = types.ModuleType("shiboken2")
+shiboken2.wrapInstance = wrapInstance
+shiboken2.isValid = isValid
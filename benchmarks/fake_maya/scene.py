@@ -0,0 +1,410 @@
+"""
+In-memory dependency graph behind the maya.cmds and maya.api.OpenMaya stand-ins.
+
+Only what the tools touch is modelled: named nodes with a DAG parent, plain and dynamic attributes,
+plug connections, shading engine face membership and mesh points. Lookups are indexed per node so the
+cost of an emulated command does not grow with the size of the scene.
+"""
+
+import collections
+import re
+
+
+AI_STANDARD_SURFACE_DEFAULTS = {
+    "base": 0.8, "diffuseRoughness": 0.0, "specular": 1.0, "specularRoughness": 0.2, "specularIOR": 1.5,
+    "specularAnisotropy": 0.0, "specularRotation": 0.0, "metalness": 0.0, "transmission": 0.0,
+    "transmissionScatterAnisotropy": 0.0, "transmissionDispersion": 0.0, "transmissionExtraRoughness": 0.0,
+    "subsurface": 0.0, "subsurfaceScale": 1.0, "subsurfaceAnisotropy": 0.0, "sheen": 0.0, "sheenRoughness": 0.3,
+    "coat": 0.0, "coatRoughness": 0.1, "coatIOR": 1.5, "coatAnisotropy": 0.0, "coatRotation": 0.0,
+    "thinFilmThickness": 0.0, "thinFilmIOR": 1.5, "emission": 0.0, "indirectDiffuse": 1.0, "indirectSpecular": 1.0,
+    "normalCamera": (0.0, 0.0, 0.0), "aiMatteColor": (0.0, 0.0, 0.0), "baseColor": (1.0, 1.0, 1.0),
+    "specularColor": (1.0, 1.0, 1.0), "transmissionColor": (1.0, 1.0, 1.0), "transmissionScatter": (0.0, 0.0, 0.0),
+    "subsurfaceColor": (1.0, 1.0, 1.0), "subsurfaceRadius": (1.0, 1.0, 1.0), "sheenColor": (1.0, 1.0, 1.0),
+    "tangent": (0.0, 0.0, 0.0), "coatColor": (1.0, 1.0, 1.0), "coatNormal": (0.0, 0.0, 0.0),
+    "emissionColor": (1.0, 1.0, 1.0), "opacity": (1.0, 1.0, 1.0),
+}
+
+NODE_DEFAULTS = {
+    "aiStandardSurface": AI_STANDARD_SURFACE_DEFAULTS,
+    "file": {"fileTextureName": ""},
+    "aiImage": {"filename": ""},
+    "bump2d": {"bumpDepth": 1.0},
+    "aiBump2d": {"bumpHeight": 1.0},
+    "aiUserDataColor": {"attribute": "", "default": (0.0, 0.0, 0.0)},
+    "aiUserDataFloat": {"attribute": "", "default": 0.0},
+    "aiUserDataInt": {"attribute": "", "default": 0},
+    "aiSwitch": {"index": 0},
+    "transform": {"translate": (0.0, 0.0, 0.0)},
+}
+
+SHAPE_TYPES = ("mesh",)
+
+TRAILING_DIGITS = re.compile(r"(\d+)$")
+
+
+def compact_components(owner, faces):
+    """
+    Face components of contiguous runs of faces, the way Maya lists set members without flattening.
+    :param owner: Name the components are listed under
+    :param faces: Iterable of Face IDs
+    :return: List of "owner.f[a:b]" Strings
+    """
+    result = []
+    faces = sorted(faces)
+    index = 0
+    while index < len(faces):
+        start = end = faces[index]
+        while index + 1 < len(faces) and faces[index + 1] == end + 1:
+            index += 1
+            end = faces[index]
+        if start == end:
+            result.append("{0}.f[{1}]".format(owner, start))
+        else:
+            result.append("{0}.f[{1}:{2}]".format(owner, start, end))
+        index += 1
+    return result
+
+
+class FakeNode(object):
+    """
+    A dependency node, DAG nodes have a parent and children.
+    """
+
+    def __init__(self, name, node_type, parent=None):
+        self.name = name
+        self.type = node_type
+        self.parent = parent
+        self.children = []
+        self.attrs = dict(NODE_DEFAULTS.get(node_type, {}))
+        self.dynamic = collections.OrderedDict()
+        self.children_attrs = {}
+        self.points = []
+        self.face_vertex_counts = []
+        self.face_vertices = []
+
+    @property
+    def face_count(self):
+        return len(self.face_vertex_counts)
+
+    def is_shape(self):
+        return self.type in SHAPE_TYPES
+
+    def long_name(self):
+        if self.parent is None and self.type != "transform":
+            return self.name
+        names = []
+        node = self
+        while node is not None:
+            names.append(node.name)
+            node = node.parent
+        return "|" + "|".join(reversed(names))
+
+    def component_owner(self):
+        return self.parent.name if self.parent is not None else self.name
+
+    def descendants(self):
+        result = []
+        for child in self.children:
+            result.append(child)
+            result.extend(child.descendants())
+        return result
+
+    def has_attr(self, attribute):
+        return attribute in self.attrs or attribute in self.children_attrs
+
+    def add_dynamic(self, attribute, data_type, multi=False):
+        if self.has_attr(attribute):
+            raise RuntimeError("Found attribute already: {0}.{1}".format(self.name, attribute))
+        self.dynamic[attribute] = (data_type, multi)
+        self.attrs[attribute] = {} if multi else None
+
+    def add_child_attribute(self, attribute, parent):
+        if parent not in self.dynamic:
+            raise RuntimeError("No parent attribute: {0}.{1}".format(self.name, parent))
+        self.children_attrs[attribute] = parent
+
+    def remove_dynamic(self, attribute):
+        if attribute not in self.dynamic:
+            raise RuntimeError("No dynamic attribute: {0}.{1}".format(self.name, attribute))
+        for child in [child for child, parent in self.children_attrs.items() if parent == attribute]:
+            del self.children_attrs[child]
+        del self.dynamic[attribute]
+        del self.attrs[attribute]
+
+    def world_offset(self):
+        offset = [0.0, 0.0, 0.0]
+        node = self.parent
+        while node is not None:
+            for axis, value in enumerate(node.attrs.get("translate", (0.0, 0.0, 0.0))):
+                offset[axis] += value
+            node = node.parent
+        return offset
+
+    def world_points(self):
+        x_offset, y_offset, z_offset = self.world_offset()
+        return [(x + x_offset, y + y_offset, z + z_offset) for x, y, z in self.points]
+
+
+class FakeScene(object):
+    """
+    The scene every stand-in command works on.
+    """
+
+    def __init__(self):
+        self.files = {}
+        self.reset()
+
+    def reset(self):
+        self.nodes = collections.OrderedDict()
+        # destination plug -> source plug, and node name -> destination plugs of its connections
+        self.connections = collections.OrderedDict()
+        self.node_connections = collections.defaultdict(set)
+        # shading engine -> shape name -> set of face IDs, None for a whole object assignment
+        self.membership = collections.OrderedDict()
+        self.shape_engines = collections.defaultdict(list)
+        self.selection = []
+        self.current_time = 1.0
+        self.scene_name = ""
+        # undoable plugin commands in the order they ran, cmds.undo() takes back the last one
+        self.undo_queue = []
+
+    # nodes ------------------------------------------------------------------------------------------------------------
+    def unique_name(self, name):
+        if name not in self.nodes:
+            return name
+        match = TRAILING_DIGITS.search(name)
+        stem = name[:match.start()] if match else name
+        number = int(match.group(1)) if match else 0
+        while True:
+            number += 1
+            candidate = "{0}{1}".format(stem, number)
+            if candidate not in self.nodes:
+                return candidate
+
+    def resolve(self, name):
+        if isinstance(name, FakeNode):
+            return name
+        node_name = name.split(".")[0].split("|")[-1]
+        try:
+            return self.nodes[node_name]
+        except KeyError:
+            raise ValueError("No object matches name: {0}".format(name))
+
+    def shape_of(self, name):
+        node = self.resolve(name)
+        if node.is_shape():
+            return node
+        for child in node.children:
+            if child.is_shape():
+                return child
+        raise ValueError("No shape under: {0}".format(name))
+
+    def exists(self, name):
+        node_name = name.split(".")[0].split("|")[-1]
+        if node_name not in self.nodes:
+            return False
+        if "." in name and "[" not in name:
+            return self.nodes[node_name].has_attr(name.split(".", 1)[1])
+        return True
+
+    def create_node(self, node_type, name=None, parent=None):
+        name = self.unique_name(name or "{0}1".format(node_type))
+        parent_node = self.resolve(parent) if parent else None
+        node = FakeNode(name, node_type, parent_node)
+        if parent_node is not None:
+            parent_node.children.append(node)
+        self.nodes[name] = node
+        if node_type == "shadingEngine":
+            self.membership[name] = collections.OrderedDict()
+        return node
+
+    def delete(self, name):
+        node = self.resolve(name)
+        for child in list(node.children):
+            self.delete(child.name)
+        for destination in list(self.node_connections.get(node.name, ())):
+            self.disconnect(destination)
+        self.node_connections.pop(node.name, None)
+        for shape_name in self.membership.pop(node.name, {}):
+            self.shape_engines[shape_name].remove(node.name)
+        for shading_engine in self.shape_engines.pop(node.name, []):
+            del self.membership[shading_engine][node.name]
+        if node.parent is not None:
+            node.parent.children.remove(node)
+        self.selection = [item for item in self.selection if item.split(".")[0] != node.name]
+        del self.nodes[node.name]
+
+    def rename(self, old_name, new_name):
+        node = self.resolve(old_name)
+        new_name = self.unique_name(new_name)
+        del self.nodes[node.name]
+        node.name = new_name
+        self.nodes[new_name] = node
+        return new_name
+
+    # attributes -------------------------------------------------------------------------------------------------------
+    @staticmethod
+    def split_plug(plug):
+        node_name, attribute = plug.split(".", 1)
+        index = None
+        if attribute.endswith("]"):
+            attribute, index = attribute[:-1].split("[")
+            index = int(index)
+        return node_name, attribute, index
+
+    def get_attr(self, plug):
+        node_name, attribute, index = self.split_plug(plug)
+        node = self.resolve(node_name)
+        if not node.has_attr(attribute):
+            raise ValueError("No attribute: {0}".format(plug))
+        value = node.attrs[attribute]
+        if index is not None:
+            return value.get(index)
+        if isinstance(value, dict):
+            return [value[key] for key in sorted(value)]
+        if isinstance(value, tuple):
+            return [value]
+        if isinstance(value, list):
+            return list(value)
+        return value
+
+    def set_attr(self, plug, values, data_type=None):
+        node_name, attribute, index = self.split_plug(plug)
+        node = self.resolve(node_name)
+        if not node.has_attr(attribute):
+            raise RuntimeError("No attribute: {0}".format(plug))
+        if data_type in ("doubleArray", "Int32Array"):
+            value = list(values[0])
+        elif data_type == "vectorArray":
+            value = [tuple(item) for item in values[1:1 + values[0]]]
+        elif len(values) == 3:
+            value = tuple(float(item) for item in values)
+        else:
+            value = values[0]
+        if index is not None:
+            node.attrs[attribute][index] = value
+        else:
+            node.attrs[attribute] = value
+
+    # connections ------------------------------------------------------------------------------------------------------
+    def connect(self, source, destination):
+        source_node = self.resolve(source).name
+        destination_node = self.resolve(destination).name
+        if destination in self.connections:
+            raise RuntimeError("{0} is already connected".format(destination))
+        self.connections[destination] = source
+        self.node_connections[source_node].add(destination)
+        self.node_connections[destination_node].add(destination)
+
+    def disconnect(self, destination):
+        source = self.connections.pop(destination)
+        self.node_connections[source.split(".")[0]].discard(destination)
+        self.node_connections[destination.split(".")[0]].discard(destination)
+
+    def is_destination(self, plug):
+        node_name, attribute = plug.split(".", 1)
+        for destination in self.node_connections.get(node_name, ()):
+            if destination == plug or (destination.startswith(plug) and destination[len(plug):] in ("R", "G", "B")):
+                return True
+        return False
+
+    def connections_of(self, item, source=True, destination=True):
+        """
+        Connections of a node or plug as (local plug, remote plug) pairs, shading engine membership included.
+        """
+        node_name = self.resolve(item).name
+        is_plug = "." in item
+        pairs = []
+        for plug in sorted(self.node_connections.get(node_name, ())):
+            upstream = self.connections[plug]
+            if source and plug.split(".")[0] == node_name and (not is_plug or plug == item):
+                pairs.append((plug, upstream))
+            if destination and upstream.split(".")[0] == node_name and (not is_plug or upstream == item):
+                pairs.append((upstream, plug))
+        if destination and not is_plug:
+            for shading_engine in self.shape_engines.get(node_name, ()):
+                pairs.append(("{0}.instObjGroups[0]".format(node_name), "{0}.dagSetMembers".format(shading_engine)))
+        if source and not is_plug:
+            for shape_name in self.membership.get(node_name, ()):
+                pairs.append(("{0}.dagSetMembers".format(node_name), "{0}.instObjGroups[0]".format(shape_name)))
+        return pairs
+
+    # shading ----------------------------------------------------------------------------------------------------------
+    def surface_shader(self, shading_engine):
+        source = self.connections.get(shading_engine + ".surfaceShader")
+        return source.split(".")[0] if source else None
+
+    def shading_engines_of_material(self, material):
+        return [destination.split(".")[0] for destination in sorted(self.node_connections.get(material, ()))
+                if destination.endswith(".surfaceShader") and self.connections[destination].startswith(material + ".")]
+
+    def shading_engine_for(self, material):
+        shading_engines = self.shading_engines_of_material(material)
+        if shading_engines:
+            return shading_engines[0]
+        shading_engine = self.create_node("shadingEngine", material + "SG").name
+        self.connect(material + ".outColor", shading_engine + ".surfaceShader")
+        return shading_engine
+
+    def shading_engines_of(self, shape, faces=None):
+        result = []
+        for shading_engine in self.shape_engines.get(shape.name, ()):
+            assigned = self.membership[shading_engine][shape.name]
+            if faces is None or assigned is None or assigned.intersection(faces):
+                result.append(shading_engine)
+        return result
+
+    def assign(self, shape, shading_engine, faces=None):
+        """
+        Assign a shading engine to a whole shape, or to some of its faces, taking them out of every other engine.
+        """
+        faces = set(range(shape.face_count)) if faces is None else set(faces)
+        for other in list(self.shape_engines.get(shape.name, ())):
+            assigned = self.membership[other][shape.name]
+            remaining = (set(range(shape.face_count)) if assigned is None else assigned) - faces
+            if remaining:
+                self.membership[other][shape.name] = remaining
+            else:
+                del self.membership[other][shape.name]
+                self.shape_engines[shape.name].remove(other)
+        members = self.membership[shading_engine]
+        if shape.name not in members:
+            self.shape_engines[shape.name].append(shading_engine)
+            members[shape.name] = set()
+        if members[shape.name] is not None:
+            members[shape.name] |= faces
+            if len(members[shape.name]) == shape.face_count:
+                members[shape.name] = None
+
+    def set_members(self, shading_engine):
+        result = []
+        for shape_name, faces in self.membership.get(shading_engine, {}).items():
+            shape = self.nodes[shape_name]
+            if faces is None:
+                result.append(shape.name)
+            else:
+                result.extend(compact_components(shape.component_owner(), faces))
+        return result
+
+    # files ------------------------------------------------------------------------------------------------------------
+    def file_command(self, args, kwargs):
+        """
+        Scenes are opened by calling the builder registered for their path in self.files.
+        """
+        if kwargs.get("query", kwargs.get("q", False)):
+            return self.scene_name
+        if kwargs.get("rename"):
+            self.scene_name = kwargs["rename"]
+            return self.scene_name
+        if kwargs.get("open", kwargs.get("o", False)):
+            builder = self.files[args[0]]
+            self.reset()
+            builder(self)
+            self.scene_name = args[0]
+            return args[0]
+        if kwargs.get("save", kwargs.get("s", False)):
+            return self.scene_name
+        raise NotImplementedError("file: flags not emulated")
+
+
+SCENE = FakeScene()
@@ -0,0 +1,194 @@
+"""
+Benchmarks
+
+Time the tools on synthetic scenes without Maya, against the in-memory stand-ins in fake_maya.
+
+
+How to use
+
+    python benchmarks/run_benchmarks.py
+    python benchmarks/run_benchmarks.py --scales 100x500x8 1000x200x16 --json results.json
+    python benchmarks/run_benchmarks.py --baseline results.json
+
+    Every scale is OBJECTSxFACESxSHADERS. For every scale polygon_shaders_to_single_shader.main_function
+    and GeneratePrefUI.generate_pref, with and without Cache File, run on a fresh scene and report wall time,
+    the number of emulated Maya commands and the peak Python memory.
+
+    --baseline compares the command counts with an earlier --json result and exits with 1 when a tool
+    calls more than --tolerance times the commands it did before. Command counts do not depend on the
+    machine, so this catches scaling regressions on CI where wall time is too noisy.
+
+
+Python 3
+"""
+
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import fake_maya
+fake_maya.install()
+
+import scenes
+import generate_pref_ui
+import polygon_shaders_to_single_shader
+
+
+DEFAULT_SCALES = ["10x100x4", "100x500x8", "500x1000x16"]
+
+
+def parse_scale(scale):
+    """
+    Objects, faces and shaders of a scale.
+    :param scale: String like "100x500x8"
+    :return: Tuple of Objects, Faces and Shaders
+    """
+    objects, faces, shaders = [int(number) for number in scale.lower().split("x")]
+    return objects, faces, shaders
+
+
+def run_convert(transform_list, palette_mode):
+    """
+    Convert the scene the way the Assign button does.
+    :param transform_list: List of Transforms
+    :param palette_mode: Palette Mode
+    :return: None
+    """
+    fake_maya.cmds.textFieldButtonGrp("shader_name", text="shader_MAT")
+    fake_maya.cmds.checkBox("palette_mode", value=palette_mode)
+    fake_maya.cmds.select(transform_list)
+    polygon_shaders_to_single_shader.main_function()
+
+
+def run_generate_pref(transform_list, palette_mode):
+    """
+    Generate Maya and Houdini Pref the way the Generate button does.
+    :param transform_list: List of Transforms
+    :param palette_mode: Unused
+    :return: None
+    """
+    ui = generate_pref_ui.GeneratePrefUI("Generate Pref", 1.0)
+    ui.houdini_checkbox.setChecked(True)
+    fake_maya.cmds.select(transform_list)
+    ui.generate_pref()
+
+
+def run_generate_pref_cache(transform_list, palette_mode):
+    """
+    Generate Pref into cache files the way the Generate button does with Cache File checked.
+    :param transform_list: List of Transforms
+    :param palette_mode: Unused
+    :return: None
+    """
+    ui = generate_pref_ui.GeneratePrefUI("Generate Pref", 1.0)
+    ui.cache_checkbox.setChecked(True)
+    fake_maya.cmds.select(transform_list)
+    ui.generate_pref()
+
+
+TOOLS = [("convert", run_convert), ("generate_pref", run_generate_pref), ("generate_pref_cache", run_generate_pref_cache)]
+
+
+def measure(tool, scale, palette_mode):
+    """
+    Run a tool once on a fresh scene.
+    :param tool: Tool Function
+    :param scale: Tuple of Objects, Faces and Shaders
+    :param palette_mode: Palette Mode
+    :return: Dictionary of Seconds, Commands, Command Counts and Peak Memory
+    """
+    transform_list = scenes.build_scene(fake_maya.SCENE, *scale)
+    fake_maya.reset_call_counts()
+    tracemalloc.start()
+    start_time = time.perf_counter()
+    # the tools print a line per object
+    with contextlib.redirect_stdout(io.StringIO()):
+        tool(transform_list, palette_mode)
+    seconds = time.perf_counter() - start_time
+    peak_memory = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {"seconds": round(seconds, 4),
+            "commands": fake_maya.call_count(),
+            "command_counts": dict(fake_maya.cmds.CALL_COUNTS.most_common()),
+            "peak_memory_kb": peak_memory // 1024}
+
+
+def compare(results, baseline, tolerance):
+    """
+    Command count regressions against a baseline.
+    :param results: Results of this run
+    :param baseline: Results of an earlier run
+    :param tolerance: Allowed Factor
+    :return: List of Messages
+    """
+    regressions = []
+    for key, result in results.items():
+        if key in baseline and result["commands"] > baseline[key]["commands"] * tolerance:
+            regressions.append("{0}: {1} commands, baseline {2}".format(key, result["commands"],
+                                                                       baseline[key]["commands"]))
+    return regressions
+
+
+def parse_arguments(arguments):
+    """
+    Command line arguments.
+    :param arguments: List of Arguments
+    :return: argparse.Namespace
+    """
+    parser = argparse.ArgumentParser(description="Benchmark the tools on synthetic scenes without Maya.")
+    parser.add_argument("--scales", nargs="+", default=DEFAULT_SCALES, help="OBJECTSxFACESxSHADERS scene sizes")
+    parser.add_argument("--tools", nargs="+", default=[name for name, tool in TOOLS],
+                        choices=[name for name, tool in TOOLS], help="tools to run")
+    parser.add_argument("--palette", action="store_true", help="convert in palette mode")
+    parser.add_argument("--json", default=None, help="write the results to a JSON file")
+    parser.add_argument("--baseline", default=None, help="JSON results to compare command counts with")
+    parser.add_argument("--tolerance", type=float, default=1.1,
+                        help="allowed factor of commands over the baseline (default: 1.1)")
+    return parser.parse_args(arguments)
+
+
+def main(arguments=None):
+    """
+    Run every tool at every scale and print a table of the results.
+    :param arguments: List of Arguments, defaults to sys.argv
+    :return: Exit Code
+    """
+    arguments = parse_arguments(sys.argv[1:] if arguments is None else arguments)
+    tools = dict(TOOLS)
+
+    results = {}
+    sys.stdout.write("{0:<20} {1:<16} {2:>10} {3:>10} {4:>12}\n".format("tool", "scale", "seconds", "commands",
+                                                                    "peak KB"))
+    for scale in arguments.scales:
+        for name in arguments.tools:
+            result = measure(tools[name], parse_scale(scale), arguments.palette)
+            results["{0} {1}".format(name, scale)] = result
+            sys.stdout.write("{0:<20} {1:<16} {2:>10.4f} {3:>10} {4:>12}\n".format(
+                name, scale, result["seconds"], result["commands"], result["peak_memory_kb"]))
+
+    if arguments.json:
+        with open(arguments.json, "w") as results_file:
+            json.dump(results, results_file, indent=4, sort_keys=True)
+
+    if arguments.baseline:
+        with open(arguments.baseline) as baseline_file:
+            regressions = compare(results, json.load(baseline_file), arguments.tolerance)
+        for regression in regressions:
+            sys.stdout.write("regression: {0}\n".format(regression))
+        if regressions:
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
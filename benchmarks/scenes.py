@@ -0,0 +1,82 @@
+"""
+Synthetic scenes for the benchmarks: N objects x F faces x S shaders.
+
+Every object is a strip of F quads split into S blocks of faces, each block assigned to another
+aiStandardSurface. The shaders cycle through the networks the converter has to handle: a file texture on
+baseColor, a changed float value, and a bump2d with a file texture. Objects are offset so world space
+points differ between them.
+"""
+
+
+def build_shaders(scene, shaders):
+    """
+    Create the shaders and their shading engines.
+    :param scene: fake_maya.scene.FakeScene
+    :param shaders: Number of Shaders
+    :return: List of Shading Engines
+    """
+    shading_engine_list = []
+    for index in range(shaders):
+        material = scene.create_node("aiStandardSurface", "mat{0}".format(index))
+        material.attrs["base"] = 0.5 + 0.01 * index
+        material.attrs["baseColor"] = (0.01 * index, 0.2, 0.3)
+        if index % 3 == 0:
+            file_node = scene.create_node("file", "file_{0}".format(index))
+            file_node.attrs["fileTextureName"] = "/textures/mat{0}_baseColor.exr".format(index)
+            place = scene.create_node("place2dTexture")
+            scene.connect(place.name + ".outUV", file_node.name + ".uvCoord")
+            scene.connect(file_node.name + ".outColor", material.name + ".baseColor")
+        elif index % 3 == 1:
+            material.attrs["specularRoughness"] = 0.45
+        else:
+            bump_file = scene.create_node("file", "bump_file_{0}".format(index))
+            bump_file.attrs["fileTextureName"] = "/textures/mat{0}_bump.exr".format(index)
+            bump = scene.create_node("bump2d", "bump_{0}".format(index))
+            bump.attrs["bumpDepth"] = 0.25
+            scene.connect(bump_file.name + ".outAlpha", bump.name + ".bumpValue")
+            scene.connect(bump.name + ".outNormal", material.name + ".normalCamera")
+        shading_engine_list.append(scene.shading_engine_for(material.name))
+    return shading_engine_list
+
+
+def build_mesh(scene, index, faces):
+    """
+    Create an object with a strip of quads.
+    :param scene: fake_maya.scene.FakeScene
+    :param index: Object Index
+    :param faces: Number of Faces
+    :return: Shape Node
+    """
+    transform = scene.create_node("transform", "object{0}".format(index + 1))
+    transform.attrs["translate"] = (float(index), 0.0, 0.0)
+    shape = scene.create_node("mesh", "objectShape{0}".format(index + 1), transform.name)
+    shape.points = [(float(point // 2), float(point % 2), 0.0) for point in range(2 * (faces + 1))]
+    shape.face_vertex_counts = [4] * faces
+    face_vertices = []
+    for face in range(faces):
+        face_vertices.extend([2 * face, 2 * face + 1, 2 * face + 3, 2 * face + 2])
+    shape.face_vertices = face_vertices
+    return shape
+
+
+def build_scene(scene, objects, faces, shaders):
+    """
+    Fill the scene with objects x faces x shaders.
+    :param scene: fake_maya.scene.FakeScene
+    :param objects: Number of Objects
+    :param faces: Number of Faces per Object
+    :param shaders: Number of Shaders per Object
+    :return: List of Transforms
+    """
+    scene.reset()
+    shading_engine_list = build_shaders(scene, shaders)
+    block = max(1, faces // len(shading_engine_list))
+    transform_list = []
+    for index in range(objects):
+        shape = build_mesh(scene, index, faces)
+        for start in range(0, faces, block):
+            # rotate the shaders per object so objects do not all share one assignment
+            shading_engine = shading_engine_list[(start // block + index) % len(shading_engine_list)]
+            scene.assign(shape, shading_engine, range(start, min(start + block, faces)))
+        transform_list.append(shape.parent.name)
+    return transform_list
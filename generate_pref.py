@@ -5,6 +5,11 @@ Generate Pref for Maya/Arnold and other DCC like Houdini via Alembic.
 
 Instructions
 
+    Open the UI:
+        import shelf_launcher
+        shelf_launcher.open_generate_pref()
+        The UI lives in generate_pref_ui.py, this module has no UI and does not import Qt
+
     Create Pref for Maya:
         Select mesh objects on viewport
         Select frame number in UI
@@ -16,10 +21,42 @@ Instructions
         Press Generate button
         Export selection to Alembic with "Pref" prefix attribute
         
+    Pref is only rebuilt on meshes whose topology, Pref points or checked options changed since the last
+    Generate, the others are skipped and counted.
+
+    Keep Pref out of the scene:
+        Check Cache File before pressing Generate
+        Pref is written as float32 object space points to a cache file under the workspace "cache/pref" directory
+        The shapes only get the path of their cache file and their world matrix, GeneratePref.load_pref reads
+        them back on demand, identical meshes share one cache file
+
+    Pref for Houdini without Alembic:
+        Check Houdini File before pressing Generate
+        World space Pref of the selected meshes is streamed to "<scene name>.prefh" under the workspace
+        "cache/pref" directory one mesh at a time, nothing is added to the scene, the other options are ignored
+        Read it in Houdini with generate_pref_houdini.PrefPointCacheReader
+
+    Reference normals and tangents:
+        Check Nref and/or Tref before pressing Generate
+        World space vertex normals and tangents on the frame are written next to Pref, as "mtoa_varying_Nref"
+        and "mtoa_varying_Tref" for Maya and "Nref" and "Tref" for Houdini, from the same evaluation as Pref
+        Tref is the average of the face vertex tangents around every vertex, meshes without UVs get none
+
+    Instanced shapes get their Pref once, from their first selected instance.
+
     Delete Pref:
         Select mesh objects on viewport
         Press Generate button
 
+    Only the selected meshes and their inputs are evaluated at the frame, the current time of the scene does not change.
+
+    Without the UI:
+        GeneratePref.generate(GeneratePref.get_shape_selection(shapes), 1001, maya=True, houdini=True)
+        Nref and Tref with normals=True and tangents=True
+        Cache files outside of the workspace with cache_file=True, cache_directory="/path/to/cache"
+        GeneratePref.export_houdini(GeneratePref.get_shape_selection(shapes), 1001, "/path/to/shot.prefh")
+        Many scenes or shots from mayapy, see generate_pref_batch.py
+
 Python 2 and Python 3
 Maya 2018+
 
@@ -28,127 +65,294 @@ bhaveshbudhkar@yahoo.com
 """
 
 
-from PySide2 import QtWidgets, QtCore
-from shiboken2 import wrapInstance
-from sys import stdout
-import maya.OpenMayaUI as omui
+import os
+import ctypes
+from array import array
 import maya.api.OpenMaya as om
-import maya.api.OpenMayaAnim as oma
 import maya.cmds as cmds
 
 
-def maya_main_window():
-    """
-    Maya Main Window Pointer
-    :return: QtWidgets.QWidget Object
-    """
-    main_window_ptr = omui.MQtUtil.mainWindow()
-    return wrapInstance(int(main_window_ptr), QtWidgets.QWidget)
+# Points copied and transformed at a time, bounds the temporary Python objects on very large meshes
+point_chunk_size = 65536
 
 
-class GeneratePref(QtWidgets.QWidget):
+class GeneratePref(object):
     """
-    Maya UI Class
+    Pref Engine, everything Generate Pref does without the UI, see generate_pref_ui.py for the UI
     """
 
-    def __init__(self, title, version, parent=maya_main_window()):
+    @staticmethod
+    def get_time_context(frame):
         """
-        Maya UI Init
-        :param title: Tool Name
-        :param version: Tool Version
-        :param parent: Parent Window
+        Evaluation context of a frame in the current FPS.
+        :param frame: Frame Number
+        :return: om.MDGContext Object
         """
-        super(GeneratePref, self).__init__(parent)
-
-        self.title = title
-        self.version = version
-
-        self.setWindowTitle("{0} v{1}".format(self.title, self.version))
+        # Define current FPS and frame
+        fps = om.MTime.uiUnit()
+        time = om.MTime(frame, fps)
+        return om.MDGContext(time)
 
-        self.setWindowFlags(self.windowFlags() ^ QtCore.Qt.WindowContextHelpButtonHint | QtCore.Qt.Window)
-        self.setFixedSize(350, 100)
+    @staticmethod
+    def evaluate_plug(plug, context):
+        """
+        Evaluate a plug in a context, only the upstream graph of the plug is evaluated.
+        :param plug: Maya Plug
+        :param context: om.MDGContext Object
+        :return: om.MObject Data
+        """
+        # Maya 2019+ evaluates plugs in the current context, Maya 2018 takes the context as argument
+        if hasattr(context, "makeCurrent"):
+            previous_context = context.makeCurrent()
+            try:
+                return plug.asMObject()
+            finally:
+                previous_context.makeCurrent()
+        return plug.asMObject(context)
 
-        self.create_widgets()
-        self.create_layouts()
-        self.create_connections()
+    @staticmethod
+    def get_world_matrix(dag_object, context):
+        """
+        World matrix of a mesh instance evaluated in a context.
+        :param dag_object: Maya DAG Path of the Mesh
+        :param context: om.MDGContext Object
+        :return: om.MMatrix Object
+        """
+        dependency_object = om.MFnDependencyNode(dag_object.node())
+        matrix_plug = dependency_object.findPlug("worldMatrix", False).elementByLogicalIndex(dag_object.instanceNumber())
+        return om.MFnMatrixData(GeneratePref.evaluate_plug(matrix_plug, context)).matrix()
 
-    def create_widgets(self):
+    @staticmethod
+    def transform_float_points(float_points, matrix):
         """
-        Create UI Widgets
-        :return: None
+        Flat x y z points multiplied by a matrix, point_chunk_size points at a time.
+        :param float_points: Sequence of x y z Floats, like get_float_points() or PrefCacheReader.points()
+        :param matrix: om.MMatrix Object, None keeps the points as they are
+        :return: array of float32, x y z per point
         """
-        self.maya_checkbox = QtWidgets.QCheckBox("Maya")
-        self.maya_checkbox.setChecked(True)
-        self.houdini_checkbox = QtWidgets.QCheckBox("Houdini")
+        float_buffer = array("f")
+        if matrix is None or matrix.isEquivalent(om.MMatrix.kIdentity):
+            float_buffer.extend(float_points)
+            return float_buffer
+
+        # Points are row vectors in Maya, p * M
+        m00, m01, m02, m03, m10, m11, m12, m13, m20, m21, m22, m23, m30, m31, m32, m33 = [matrix[index]
+                                                                                          for index in range(16)]
+        chunk_size = point_chunk_size * 3
+        for start in range(0, len(float_points), chunk_size):
+            chunk = array("f", float_points[start:start + chunk_size])
+            xyz = list(zip(chunk[0::3], chunk[1::3], chunk[2::3]))
+            chunk[0::3] = array("f", [x * m00 + y * m10 + z * m20 + m30 for x, y, z in xyz])
+            chunk[1::3] = array("f", [x * m01 + y * m11 + z * m21 + m31 for x, y, z in xyz])
+            chunk[2::3] = array("f", [x * m02 + y * m12 + z * m22 + m32 for x, y, z in xyz])
+            float_buffer.extend(chunk)
+        return float_buffer
 
-        self.frame_number_label = QtWidgets.QLabel("Frame Number")
+    @staticmethod
+    def get_float_points(raw_mesh, matrix=None):
+        """
+        Vertex positions of a mesh in one contiguous float32 buffer, multiplied by a matrix.
+        The points are copied straight from the raw points of the mesh, point_chunk_size points at a time, and each
+        chunk is multiplied by the matrix right after its copy, only the buffer grows with the point count,
+        12 bytes per point.
+        :param raw_mesh: om1.MFnMesh Object, like get_raw_mesh()
+        :param matrix: om.MMatrix Object, None keeps the points as they are
+        :return: array of float32, x y z per point
+        """
+        point_count = raw_mesh.numVertices()
+        float_buffer = array("f", [0.0]) * (point_count * 3)
+        if not point_count:
+            return float_buffer
+
+        # Raw points are x y z floats per vertex, owned by the mesh data and never copied as a whole
+        raw_address = int(raw_mesh.getRawPoints())
+        buffer_address = float_buffer.buffer_info()[0]
+        item_size = float_buffer.itemsize
+        for start in range(0, point_count * 3, point_chunk_size * 3):
+            end = min(start + point_chunk_size * 3, point_count * 3)
+            ctypes.memmove(buffer_address + start * item_size, raw_address + start * item_size,
+                           (end - start) * item_size)
+            if matrix is not None:
+                float_buffer[start:end] = GeneratePref.transform_float_points(float_buffer[start:end], matrix)
+        return float_buffer
 
-        self.frame_number = QtWidgets.QSpinBox()
-        self.frame_number.setRange(0, 100000)
-        self.frame_number.setValue(1001)
-        self.frame_number.setButtonSymbols(QtWidgets.QSpinBox.NoButtons)
+    @staticmethod
+    def get_point_array(float_points, matrix):
+        """
+        Vertex positions as an om.MPointArray multiplied by a matrix, for the point array attributes.
+        The array is filled point_chunk_size points at a time, no Python object is held for every point.
+        :param float_points: Sequence of x y z Floats, like get_float_points()
+        :param matrix: om.MMatrix Object
+        :return: om.MPointArray Object
+        """
+        point_count = len(float_points) // 3
+        point_array = om.MPointArray()
+        point_array.setLength(point_count)
+        identity = matrix.isEquivalent(om.MMatrix.kIdentity)
+        for start in range(0, point_count, point_chunk_size):
+            chunk = float_points[start * 3:(start + point_chunk_size) * 3]
+            for index, (x, y, z) in enumerate(zip(chunk[0::3], chunk[1::3], chunk[2::3]), start):
+                point_array[index] = om.MPoint(x, y, z) if identity else om.MPoint(x, y, z) * matrix
+        return point_array
 
-        self.generate_button = QtWidgets.QPushButton("Generate")
+    @staticmethod
+    def get_raw_mesh(dag_object, context):
+        """
+        API 1.0 mesh function set on the mesh evaluated in a context, API 2.0 has no access to the raw points.
+        Everything read from a mesh comes from this one function set, the mesh is evaluated once.
+        :param dag_object: Maya DAG Path of the Mesh
+        :param context: om.MDGContext Object
+        :return: om1.MFnMesh Object
+        """
+        # Imported here, importing the engine does not load the API 1.0, only evaluating a mesh does
+        import maya.OpenMaya as om1
 
-        self.delete_button = QtWidgets.QPushButton("Delete")
+        selection_list = om1.MSelectionList()
+        selection_list.add(dag_object.fullPathName())
+        mesh_node = om1.MObject()
+        selection_list.getDependNode(0, mesh_node)
+        mesh_plug = om1.MFnDependencyNode(mesh_node).findPlug("outMesh", False)
 
-        self.vertical_spacer = QtWidgets.QSpacerItem(20, 40, QtWidgets.QSizePolicy.Minimum,
-                                                     QtWidgets.QSizePolicy.Expanding)
+        # Maya 2019+ evaluates API 1.0 plugs in the current context too, Maya 2018 needs an API 1.0 context
+        if hasattr(context, "makeCurrent"):
+            return om1.MFnMesh(GeneratePref.evaluate_plug(mesh_plug, context))
+        time = context.getTime()
+        return om1.MFnMesh(mesh_plug.asMObject(om1.MDGContext(om1.MTime(time.value, time.unit))))
 
-        self.author_label = QtWidgets.QLabel("Bhavesh Budhkar")
-        self.author_label.setDisabled(True)
-        self.author_label.setAlignment(QtCore.Qt.AlignLeft)
+    @staticmethod
+    def get_api1_values(api1_array, typecode):
+        """
+        Values of an API 1.0 array, read one at a time.
+        :param api1_array: API 1.0 Array, like om1.MIntArray or om1.MFloatArray
+        :param typecode: array Typecode
+        :return: array Object
+        """
+        return array(typecode, (api1_array[index] for index in range(api1_array.length())))
 
-        self.email_label = QtWidgets.QLabel("bhaveshbudhkar@yahoo.com")
-        self.email_label.setDisabled(True)
-        self.email_label.setAlignment(QtCore.Qt.AlignRight)
+    @staticmethod
+    def get_api1_vectors(api1_vectors):
+        """
+        Flat x y z floats of an API 1.0 vector array.
+        :param api1_vectors: om1.MFloatVectorArray Object
+        :return: array of float32, x y z per vector
+        """
+        float_vectors = array("f")
+        for index in range(api1_vectors.length()):
+            vector = api1_vectors[index]
+            float_vectors.extend((vector.x, vector.y, vector.z))
+        return float_vectors
 
-    def create_layouts(self):
+    @staticmethod
+    def get_vertex_tangents(raw_mesh, face_vertices, matrix):
         """
-        Create UI Layouts
-        :return: None
+        Tangents per vertex, the average of the tangents of the faces around every vertex.
+        :param raw_mesh: om1.MFnMesh Object, like get_raw_mesh()
+        :param face_vertices: Vertices of every Face, like MFnMesh.getVertices()
+        :param matrix: om.MMatrix Object the tangents are multiplied by
+        :return: om.MVectorArray Object of normalized Tangents
         """
-        self.info_layout = QtWidgets.QHBoxLayout()
-        self.info_layout.addWidget(self.author_label)
-        self.info_layout.addWidget(self.email_label)
+        import maya.OpenMaya as om1
+
+        # Tangents are stored per tangent ID, the same IDs as the face vertex normals
+        face_tangents = om1.MFloatVectorArray()
+        raw_mesh.getTangents(face_tangents, om1.MSpace.kObject)
+        face_tangents = GeneratePref.get_api1_vectors(face_tangents)
+        normal_counts = om1.MIntArray()
+        normal_ids = om1.MIntArray()
+        raw_mesh.getNormalIds(normal_counts, normal_ids)
 
-        self.dcc_checkbox_layout = QtWidgets.QGridLayout()
-        self.dcc_checkbox_layout.addWidget(self.maya_checkbox, 0, 0)
-        self.dcc_checkbox_layout.addWidget(self.houdini_checkbox, 0, 1)
+        tangent_sums = [[0.0, 0.0, 0.0] for vertex in range(raw_mesh.numVertices())]
+        for vertex, tangent_id in zip(face_vertices, GeneratePref.get_api1_values(normal_ids, "i")):
+            tangent_sum = tangent_sums[vertex]
+            tangent_sum[0] += face_tangents[tangent_id * 3]
+            tangent_sum[1] += face_tangents[tangent_id * 3 + 1]
+            tangent_sum[2] += face_tangents[tangent_id * 3 + 2]
 
-        self.pref_layout = QtWidgets.QHBoxLayout()
-        self.pref_layout.addWidget(self.frame_number_label)
-        self.pref_layout.addWidget(self.frame_number)
-        self.pref_layout.addWidget(self.generate_button)
-        self.pref_layout.addWidget(self.delete_button)
+        return GeneratePref.transform_vectors([om.MVector(tangent_sum) for tangent_sum in tangent_sums], matrix)
 
-        self.main_layout = QtWidgets.QVBoxLayout(self)
-        self.main_layout.addLayout(self.dcc_checkbox_layout)
-        self.main_layout.addLayout(self.pref_layout)
-        self.main_layout.addSpacerItem(self.vertical_spacer)
-        self.main_layout.addLayout(self.info_layout)
+    @staticmethod
+    def transform_vectors(vectors, matrix):
+        """
+        Directions multiplied by a matrix, without its translation, and normalized.
+        :param vectors: Vectors
+        :param matrix: om.MMatrix Object
+        :return: om.MVectorArray Object
+        """
+        if matrix.isEquivalent(om.MMatrix.kIdentity):
+            return om.MVectorArray([om.MVector(vector).normal() for vector in vectors])
 
-        self.setLayout(self.main_layout)
+        return om.MVectorArray([(om.MVector(vector) * matrix).normal() for vector in vectors])
 
-    def create_connections(self):
+    @staticmethod
+    def get_reference_data(dag_object, context, tangents=False):
         """
-        Signals and Slots
-        :return: None
+        Reference data of a mesh evaluated in a context, everything the Pref hash needs.
+        Points are object space, get_reference_vectors() adds normals and tangents to meshes which are rebuilt.
+        :param dag_object: Maya DAG Path of the Mesh
+        :param context: om.MDGContext Object
+        :param tangents: Hash the UVs the vertex tangents (Tref) follow, meshes without UVs get no Tref
+        :return: Dictionary of mesh (om1.MFnMesh Object), points (float32 buffer, see get_float_points),
+                 world_matrix, topology, face_vertices and uvs
         """
-        self.generate_button.clicked.connect(self.generate_pref)
-        self.delete_button.clicked.connect(self.delete_pref)
+        import generate_pref_cache
+        import maya.OpenMaya as om1
+
+        # Mesh and world matrix of the mesh instance, evaluated once, the mesh through the API 1.0 for its raw points
+        raw_mesh = GeneratePref.get_raw_mesh(dag_object, context)
+        world_matrix = GeneratePref.get_world_matrix(dag_object, context)
+
+        face_vertex_counts = om1.MIntArray()
+        face_vertices = om1.MIntArray()
+        raw_mesh.getVertices(face_vertex_counts, face_vertices)
+        face_vertices = GeneratePref.get_api1_values(face_vertices, "i")
+        reference = {"mesh": raw_mesh,
+                     "points": GeneratePref.get_float_points(raw_mesh),
+                     "world_matrix": world_matrix,
+                     "topology": generate_pref_cache.topology_hash(
+                         GeneratePref.get_api1_values(face_vertex_counts, "i"), face_vertices),
+                     "face_vertices": face_vertices,
+                     "uvs": None}
+
+        if tangents:
+            if raw_mesh.numUVs():
+                # Tangents follow the UVs, their hash tells when the stored Tref is out of date
+                us = om1.MFloatArray()
+                vs = om1.MFloatArray()
+                raw_mesh.getUVs(us, vs)
+                reference["uvs"] = generate_pref_cache.uv_hash(GeneratePref.get_api1_values(us, "f"),
+                                                               GeneratePref.get_api1_values(vs, "f"))
+            else:
+                om.MGlobal.displayWarning("{0} has no UVs, no Tref is created.\n".format(dag_object.partialPathName()))
+
+        return reference
 
     @staticmethod
-    def get_current_fps(frame):
+    def get_reference_vectors(reference, normals=False, tangents=False):
         """
-        Get current FPS
-        :param frame: Current Frame
-        :return: None
+        Add world space normals and tangents to the reference data of a mesh, from the same evaluation as its points.
+        Only meshes which are rebuilt pay for them, Tref walks every face vertex.
+        :param reference: Reference Data Dictionary, like get_reference_data()
+        :param normals: Capture vertex normals (Nref)
+        :param tangents: Capture vertex tangents (Tref), only on meshes whose UVs were hashed
+        :return: Reference Data Dictionary with normals and tangents, when asked for
         """
-        # Define current FPS and frame
-        fps = om.MTime.uiUnit()
-        time = om.MTime(frame, fps)
-        oma.MAnimControl.setCurrentTime(time)
+        import maya.OpenMaya as om1
+
+        raw_mesh = reference["mesh"]
+        world_matrix = reference["world_matrix"]
+
+        # Normals go through the inverse transpose, non uniform scale keeps them perpendicular to the surface
+        if normals:
+            vertex_normals = om1.MFloatVectorArray()
+            raw_mesh.getVertexNormals(True, vertex_normals, om1.MSpace.kObject)
+            vertex_normals = GeneratePref.get_api1_vectors(vertex_normals)
+            reference["normals"] = GeneratePref.transform_vectors(
+                zip(vertex_normals[0::3], vertex_normals[1::3], vertex_normals[2::3]), world_matrix.inverse().transpose())
+
+        if tangents and reference["uvs"]:
+            reference["tangents"] = GeneratePref.get_vertex_tangents(raw_mesh, reference["face_vertices"], world_matrix)
+
+        return reference
 
     @staticmethod
     def get_selection():
@@ -160,11 +364,25 @@ class GeneratePref(QtWidgets.QWidget):
         viewport_selection = cmds.ls(selection=True, long=True)
         shape = cmds.listRelatives(viewport_selection, type="shape", allDescendents=True, fullPath=True)
 
+        return GeneratePref.get_shape_selection(shape or [])
+
+    @staticmethod
+    def get_shape_selection(shape):
+        """
+        Selection list of shapes, without the viewport.
+        :param shape: List of Shape Names
+        :return: Selection List
+        """
         # Generate list of Maya Python Objects from shapes list
         selection_list = om.MSelectionList()
 
+        # Instanced shapes are listed once per instance, every shape node is kept once
+        shape_nodes = set()
         for obj in shape:
-            selection_list.add(obj)
+            shape_node = om.MFnDagNode(om.MSelectionList().add(obj).getDependNode(0)).fullPathName()
+            if shape_node not in shape_nodes:
+                shape_nodes.add(shape_node)
+                selection_list.add(obj)
 
         return selection_list
 
@@ -242,32 +460,199 @@ class GeneratePref(QtWidgets.QWidget):
             pass
 
     @staticmethod
-    def create_attribute(selection_list, node):
+    def create_reference_attribute(dependency_object, attribute_name, vectors, typed_attr):
         """
-        Create Typed Attribute.
-        :param selection_list: Viewport Selection List
-        :param node: Per object Loop Variable
-        :return: dependency_object, points_position, typed_attr
+        Create a per vertex reference attribute like Nref or Tref.
+        :param dependency_object: Maya Dependency Object
+        :param attribute_name: Attribute Name, like "mtoa_varying_Nref" for Maya or "Nref" for Houdini
+        :param vectors: om.MVectorArray Object
+        :param typed_attr: Maya Typed Attribute
+        :return: None
         """
-        # DAG node
-        dag_object = selection_list.getDagPath(node)
-        dag_object_node = selection_list.getDagPath(node).node()
+        reference_attr = typed_attr.create(attribute_name, attribute_name, om.MFnData.kVectorArray,
+                                           om.MFnVectorArrayData().create(vectors))
+        reference_str_attr = typed_attr.create("{0}_AbcGeomScope".format(attribute_name),
+                                               "{0}_AbcGeomScope".format(attribute_name),
+                                               om.MFnData.kString,
+                                               om.MFnStringData().create("var"))
 
-        # Dependency node to create custom attribute
-        dependency_object = om.MFnDependencyNode(dag_object_node)
+        dependency_object.addAttribute(reference_attr)
+        dependency_object.addAttribute(reference_str_attr)
 
-        # Mesh object
-        mesh_object = om.MFnMesh(dag_object)
+    @staticmethod
+    def delete_reference_attribute(dependency_object, attribute_name):
+        """
+        Delete a per vertex reference attribute like Nref or Tref.
+        :param dependency_object: Maya Dependency Object
+        :param attribute_name: Attribute Name
+        :return: None
+        """
+        try:
+            remove_reference_attr = dependency_object.findPlug(attribute_name, False)
+            remove_reference_str_attr = dependency_object.findPlug("{0}_AbcGeomScope".format(attribute_name), False)
+
+            dependency_object.removeAttribute(remove_reference_attr.attribute())
+            dependency_object.removeAttribute(remove_reference_str_attr.attribute())
+        except RuntimeError:
+            pass
+
+    @staticmethod
+    def reference_pref(dependency_object, reference, typed_attr, maya=True, houdini=False):
+        """
+        Create the Nref and Tref attributes captured with the Pref, the ones not captured are deleted.
+        :param dependency_object: Maya Dependency Object
+        :param reference: Reference Data Dictionary, like get_reference_vectors()
+        :param typed_attr: Maya Typed Attribute
+        :param maya: Create attributes for Maya
+        :param houdini: Create attributes for Houdini
+        :return: None
+        """
+        for name, key in (("Nref", "normals"), ("Tref", "tangents")):
+            GeneratePref.delete_reference_attribute(dependency_object, "mtoa_varying_{0}".format(name))
+            GeneratePref.delete_reference_attribute(dependency_object, name)
+            if key not in reference:
+                continue
+            if maya:
+                GeneratePref.create_reference_attribute(dependency_object, "mtoa_varying_{0}".format(name),
+                                                        reference[key], typed_attr)
+            if houdini:
+                GeneratePref.create_reference_attribute(dependency_object, name, reference[key], typed_attr)
 
-        # Object's vertex positions in world space
-        points_position = mesh_object.getPoints(om.MSpace.kWorld)
+    @staticmethod
+    def get_cache_directory():
+        """
+        Directory of the Pref cache files.
+        :return: Directory Path
+        """
+        return os.path.join(cmds.workspace(query=True, rootDirectory=True), "cache", "pref")
 
-        # Entitiy level attribute
-        typed_attr = om.MFnTypedAttribute(dag_object_node)
+    @staticmethod
+    def create_cache_attribute(dependency_object, cache_path, typed_attr):
+        """
+        Create the Pref cache file reference attribute.
+        :param dependency_object: Maya Dependency Object
+        :param cache_path: Pref Cache File Path
+        :param typed_attr: Maya Typed Attribute
+        :return: None
+        """
+        cache_attr = typed_attr.create("Pref_cache", "Pref_cache", om.MFnData.kString,
+                                       om.MFnStringData().create(cache_path))
 
-        return dependency_object, points_position, typed_attr
+        dependency_object.addAttribute(cache_attr)
 
-    def maya_pref(self, dependency_object, points_position, typed_attr):
+    @staticmethod
+    def delete_cache_attribute(dependency_object):
+        """
+        Delete the Pref cache file reference attribute, the cache file is kept.
+        :param dependency_object: Maya Dependency Object
+        :return: None
+        """
+        try:
+            remove_cache_attr = dependency_object.findPlug("Pref_cache", False)
+
+            dependency_object.removeAttribute(remove_cache_attr.attribute())
+        except RuntimeError:
+            pass
+
+    @staticmethod
+    def create_hash_attribute(dependency_object, pref_hash, typed_attr):
+        """
+        Create the attribute holding the hash of the generated Pref.
+        :param dependency_object: Maya Dependency Object
+        :param pref_hash: Pref Hash
+        :param typed_attr: Maya Typed Attribute
+        :return: None
+        """
+        hash_attr = typed_attr.create("Pref_hash", "Pref_hash", om.MFnData.kString,
+                                      om.MFnStringData().create(pref_hash))
+
+        dependency_object.addAttribute(hash_attr)
+
+    @staticmethod
+    def delete_hash_attribute(dependency_object):
+        """
+        Delete the attribute holding the hash of the generated Pref.
+        :param dependency_object: Maya Dependency Object
+        :return: None
+        """
+        try:
+            remove_hash_attr = dependency_object.findPlug("Pref_hash", False)
+
+            dependency_object.removeAttribute(remove_hash_attr.attribute())
+        except RuntimeError:
+            pass
+
+    @staticmethod
+    def get_stored_hash(dependency_object):
+        """
+        Hash of the Pref generated on a shape before.
+        :param dependency_object: Maya Dependency Object
+        :return: Pref Hash, None when the shape has no Pref
+        """
+        try:
+            return dependency_object.findPlug("Pref_hash", False).asString()
+        except RuntimeError:
+            return None
+
+    @staticmethod
+    def create_cache_matrix_attribute(dependency_object, world_matrix, typed_attr):
+        """
+        Create the attribute holding the world matrix the cached object space Pref is multiplied by.
+        :param dependency_object: Maya Dependency Object
+        :param world_matrix: om.MMatrix Object
+        :param typed_attr: Maya Typed Attribute
+        :return: None
+        """
+        matrix_attr = typed_attr.create("Pref_cache_matrix", "Pref_cache_matrix", om.MFnData.kDoubleArray,
+                                        om.MFnDoubleArrayData().create([world_matrix[index] for index in range(16)]))
+
+        dependency_object.addAttribute(matrix_attr)
+
+    @staticmethod
+    def delete_cache_matrix_attribute(dependency_object):
+        """
+        Delete the attribute holding the world matrix of the cached Pref.
+        :param dependency_object: Maya Dependency Object
+        :return: None
+        """
+        try:
+            remove_matrix_attr = dependency_object.findPlug("Pref_cache_matrix", False)
+
+            dependency_object.removeAttribute(remove_matrix_attr.attribute())
+        except RuntimeError:
+            pass
+
+    @staticmethod
+    def load_pref(shape):
+        """
+        Open the Pref cache file of a shape, the points are only read when asked for.
+        Cache files hold object space points, shared by identical meshes, world space Pref is
+        GeneratePref.transform_float_points(reader.points(), world_matrix).
+        :param shape: Shape Name
+        :return: Tuple of generate_pref_cache.PrefCacheReader Object and om.MMatrix Object,
+                 None without a cache file or when the topology changed
+        """
+        if not cmds.attributeQuery("Pref_cache", node=shape, exists=True):
+            return None
+
+        import generate_pref_cache
+
+        reader = generate_pref_cache.PrefCacheReader(cmds.getAttr("{0}.Pref_cache".format(shape)))
+
+        # A cache file only fits the topology it was written for
+        selection_list = om.MSelectionList()
+        selection_list.add(shape)
+        face_vertex_counts, face_vertices = om.MFnMesh(selection_list.getDagPath(0)).getVertices()
+        if reader.topology_hash != generate_pref_cache.topology_hash(face_vertex_counts, face_vertices):
+            reader.close()
+            om.MGlobal.displayWarning("Pref cache of {0} does not match its topology.\n".format(shape))
+            return None
+
+        world_matrix = om.MMatrix(cmds.getAttr("{0}.Pref_cache_matrix".format(shape)))
+        return reader, world_matrix
+
+    @staticmethod
+    def maya_pref(dependency_object, points_position, typed_attr):
         """
         Create Pref attributes for Maya.
         :param dependency_object: Maya Dependency Object
@@ -275,10 +660,11 @@ class GeneratePref(QtWidgets.QWidget):
         :param typed_attr: Maya Typed Attribute
         :return: None
         """
-        self.delete_maya_attribute(dependency_object)
-        self.create_maya_attribute(dependency_object, points_position, typed_attr)
+        GeneratePref.delete_maya_attribute(dependency_object)
+        GeneratePref.create_maya_attribute(dependency_object, points_position, typed_attr)
 
-    def houdini_pref(self, dependency_object, points_position, typed_attr):
+    @staticmethod
+    def houdini_pref(dependency_object, points_position, typed_attr):
         """
         Create Pref attributes for Houdini.
         :param dependency_object: Maya Dependency Object
@@ -286,55 +672,182 @@ class GeneratePref(QtWidgets.QWidget):
         :param typed_attr: Maya Typed Attribute
         :return: None
         """
-        self.delete_houdini_attribute(dependency_object)
-        self.create_houdini_attribute(dependency_object, points_position, typed_attr)
+        GeneratePref.delete_houdini_attribute(dependency_object)
+        GeneratePref.create_houdini_attribute(dependency_object, points_position, typed_attr)
 
-    def generate_pref(self):
+    @staticmethod
+    def get_pref_hash(pref_key, options, world_matrix=None):
+        """
+        Hash of the Pref a shape gets with the given options.
+        :param pref_key: Key of the Points, like generate_pref_cache.pref_key()
+        :param options: List of Enabled Option Names
+        :param world_matrix: om.MMatrix Object the points are multiplied by, None for world space points
+        :return: Pref Hash
+        """
+        pref_hash = "{0}:{1}".format(pref_key, ",".join(options))
+        if world_matrix is not None:
+            pref_hash += ":" + ",".join("{0:.6g}".format(world_matrix[index]) for index in range(16))
+        return pref_hash
+
+    @staticmethod
+    def cache_pref(dependency_object, points_position, world_matrix, topology, pref_key, typed_attr, cache_paths,
+                   cache_directory=None):
         """
-        Generate Pref on selected objects on specified frame.
+        Write object space Pref to a cache file and reference it on the shape instead of storing the points.
+        Identical meshes share one cache file, every shape keeps its own world matrix.
+        :param dependency_object: Maya Dependency Object
+        :param points_position: Object Space Geometry Points Position
+        :param world_matrix: om.MMatrix Object
+        :param topology: Topology Hash of the Mesh
+        :param pref_key: Key of the Points, like generate_pref_cache.pref_key()
+        :param typed_attr: Maya Typed Attribute
+        :param cache_paths: Dictionary of Pref Key -> Cache File Path written in this run
+        :param cache_directory: Directory of the Cache Files, None for get_cache_directory()
         :return: None
         """
+        import generate_pref_cache
+
+        if pref_key not in cache_paths:
+            cache_paths[pref_key] = generate_pref_cache.write_pref_cache(
+                cache_directory or GeneratePref.get_cache_directory(), points_position, topology, pref_key)
 
-        self.get_current_fps(self.frame_number.value())
+        GeneratePref.delete_maya_attribute(dependency_object)
+        GeneratePref.delete_houdini_attribute(dependency_object)
+        GeneratePref.delete_cache_attribute(dependency_object)
+        GeneratePref.delete_cache_matrix_attribute(dependency_object)
+        GeneratePref.create_cache_attribute(dependency_object, cache_paths[pref_key], typed_attr)
+        GeneratePref.create_cache_matrix_attribute(dependency_object, world_matrix, typed_attr)
 
-        selection_list = self.get_selection()
+    @staticmethod
+    def generate(selection_list, frame, maya=True, houdini=False, cache_file=False, normals=False, tangents=False,
+                 cache_directory=None):
+        """
+        Generate Pref on the meshes of a selection list on a frame, without the UI.
+        :param selection_list: Selection List of Mesh Shapes, like get_selection() or get_shape_selection()
+        :param frame: Frame Number
+        :param maya: Create Pref attributes for Maya
+        :param houdini: Create Pref attributes for Houdini
+        :param cache_file: Write Pref to cache files instead of the Maya and Houdini attributes
+        :param normals: Also create Nref, the world space vertex normals on the frame
+        :param tangents: Also create Tref, the world space vertex tangents on the frame
+        :param cache_directory: Directory of the Cache Files, None for get_cache_directory() under the workspace
+        :return: Dictionary of rebuilt, unchanged and cache_files Counts
+        """
+        import generate_pref_cache
+
+        context = GeneratePref.get_time_context(frame)
+        options = [option for option, enabled in (("maya", maya), ("houdini", houdini), ("cache", cache_file),
+                                                  ("nref", normals), ("tref", tangents)) if enabled]
 
         # Loop through selected objects
-        if not selection_list.isEmpty():
-            for node in range(selection_list.length()):
-                dependency_object, points_position, typed_attr = self.create_attribute(selection_list, node)
+        rebuilt = 0
+        skipped = 0
+        cache_paths = {}
+        for node in range(selection_list.length()):
+            dag_object = selection_list.getDagPath(node)
+            dependency_object = om.MFnDependencyNode(dag_object.node())
+            typed_attr = om.MFnTypedAttribute(dag_object.node())
+
+            # Every reference channel comes from the same frame
+            # Cache files hold object space points, shared by duplicates under different transforms
+            reference = GeneratePref.get_reference_data(dag_object, context, tangents)
+            points_position = reference["points"]
+            world_matrix = reference["world_matrix"]
+            topology = reference["topology"]
+
+            # Skip meshes whose Pref would come out the same as the one they have
+            # The points are hashed once, their key also names the cache file
+            pref_key = generate_pref_cache.pref_key(points_position, topology)
+            pref_hash = GeneratePref.get_pref_hash(pref_key, options, world_matrix)
+            if reference["uvs"]:
+                pref_hash += ":" + reference["uvs"]
+            if GeneratePref.get_stored_hash(dependency_object) == pref_hash:
+                skipped += 1
+                continue
+            rebuilt += 1
+
+            # Normals and tangents only for meshes which are rebuilt
+            GeneratePref.get_reference_vectors(reference, normals, tangents)
+
+            if cache_file:
+                GeneratePref.cache_pref(dependency_object, points_position, world_matrix, topology, pref_key,
+                                        typed_attr, cache_paths, cache_directory)
+            else:
+                GeneratePref.delete_cache_attribute(dependency_object)
+                GeneratePref.delete_cache_matrix_attribute(dependency_object)
+                # The point array attributes take the object space float32 points multiplied by the world matrix
+                if maya or houdini:
+                    point_array = GeneratePref.get_point_array(points_position, world_matrix)
+                if maya:
+                    GeneratePref.maya_pref(dependency_object, point_array, typed_attr)
+                if houdini:
+                    GeneratePref.houdini_pref(dependency_object, point_array, typed_attr)
+            GeneratePref.reference_pref(dependency_object, reference, typed_attr, maya, houdini)
+
+            GeneratePref.delete_hash_attribute(dependency_object)
+            GeneratePref.create_hash_attribute(dependency_object, pref_hash, typed_attr)
+
+        return {"rebuilt": rebuilt, "unchanged": skipped, "cache_files": len(cache_paths)}
 
-                if self.maya_checkbox.isChecked() and self.houdini_checkbox.isChecked():
-                    self.maya_pref(dependency_object, points_position, typed_attr)
-                    self.houdini_pref(dependency_object, points_position, typed_attr)
-                elif self.maya_checkbox.isChecked():
-                    self.maya_pref(dependency_object, points_position, typed_attr)
-                elif self.houdini_checkbox.isChecked():
-                    self.houdini_pref(dependency_object, points_position, typed_attr)
+    @staticmethod
+    def get_houdini_file_path():
+        """
+        Houdini point cache file of the current scene.
+        :return: File Path
+        """
+        import generate_pref_houdini
 
-            stdout.write("Pref is generated on selected objects on frame {0}.\n".format(self.frame_number.text()))
-        else:
-            om.MGlobal.displayWarning("Please select at least one Geometry.\n")
+        scene_name = os.path.splitext(os.path.basename(cmds.file(query=True, sceneName=True) or ""))[0]
+        return os.path.join(GeneratePref.get_cache_directory(),
+                            (scene_name or "untitled") + generate_pref_houdini.EXTENSION)
 
-    def delete_pref(self):
+    @staticmethod
+    def export_houdini(selection_list, frame, cache_path):
         """
-        Delete Pref on selected objects.
-        :return: None
+        Stream world space Pref of the meshes of a selection list on a frame to a Houdini point cache file.
+        Only the points of one mesh are held at a time, nothing is added to the scene.
+        :param selection_list: Selection List of Mesh Shapes, like get_selection() or get_shape_selection()
+        :param frame: Frame Number
+        :param cache_path: Houdini Point Cache File Path
+        :return: Dictionary of exported Count and path
         """
-        selection_list = self.get_selection()
+        # Imported here, the Houdini module is only needed for Houdini files
+        import generate_pref_houdini
 
-        # Loop through selected objects
-        if not selection_list.isEmpty():
+        context = GeneratePref.get_time_context(frame)
+
+        cache_directory = os.path.dirname(cache_path)
+        if cache_directory and not os.path.isdir(cache_directory):
+            os.makedirs(cache_directory)
+
+        with generate_pref_houdini.PrefPointCacheWriter(cache_path) as writer:
             for node in range(selection_list.length()):
-                dependency_object, points_position, typed_attr = self.create_attribute(selection_list, node)
+                dag_object = selection_list.getDagPath(node)
+                float_buffer = GeneratePref.get_float_points(GeneratePref.get_raw_mesh(dag_object, context),
+                                                             GeneratePref.get_world_matrix(dag_object, context))
+                writer.write(dag_object.fullPathName(), float_buffer)
+
+        return {"exported": selection_list.length(), "path": cache_path}
+
+    @staticmethod
+    def delete(selection_list):
+        """
+        Delete Pref and everything generated with it on the meshes of a selection list, cache files are kept.
+        :param selection_list: Selection List of Mesh Shapes
+        :return: None
+        """
+        for node in range(selection_list.length()):
+            dependency_object = om.MFnDependencyNode(selection_list.getDagPath(node).node())
 
-                self.delete_maya_attribute(dependency_object)
-                self.delete_houdini_attribute(dependency_object)
-            stdout.write("Pref is delete on selected objects.\n")
-        else:
-            om.MGlobal.displayWarning("Please select at least one Geometry.\n")
+            GeneratePref.delete_maya_attribute(dependency_object)
+            GeneratePref.delete_houdini_attribute(dependency_object)
+            GeneratePref.delete_cache_attribute(dependency_object)
+            GeneratePref.delete_cache_matrix_attribute(dependency_object)
+            for attribute_name in ("mtoa_varying_Nref", "Nref", "mtoa_varying_Tref", "Tref"):
+                GeneratePref.delete_reference_attribute(dependency_object, attribute_name)
+            GeneratePref.delete_hash_attribute(dependency_object)
 
 
 if __name__ == "__main__":
-    ui = GeneratePref("Generate Pref", 1.0)
-    ui.show()
+    import generate_pref_ui
+    generate_pref_ui.show_ui()
@@ -0,0 +1,274 @@
+"""
+Generate Pref - Batch
+
+Generate Pref on many scenes or shots without the UI.
+
+
+How to use
+
+    mayapy generate_pref_batch.py shot010.ma shot020.mb --frame 1001 --houdini --workers 4 --output-dir /path/to/output
+    mayapy generate_pref_batch.py --shot-list shots.txt --filter "*:body_GEO" "prop_*" --exclude "*proxy*"
+
+    --shot-list reads one scene path per line, empty lines and lines starting with "#" are ignored.
+    --filter keeps the meshes whose shape name or the name of one of their parents matches one of the
+    patterns, --exclude drops them the same way, namespaces are part of the names.
+    --maya, --houdini and --cache pick the Pref written like the checkboxes of the UI, Maya by default.
+    --nref and --tref also write reference normals and tangents, from the same evaluation as Pref.
+    --cache-dir is the directory of the --cache files, by default "cache/pref" next to the saved scenes, the
+    workspace of a worker is usually local to the render node and its paths unreachable from other machines.
+    --houdini-file streams Pref to a Houdini point cache file per scene instead, see generate_pref_houdini.py,
+    the scenes are not changed nor saved.
+
+    Scenes are saved to the output directory, or next to the source scene with a "_pref" suffix, together
+    with a log per scene. Scenes where no Pref changed are not saved.
+
+
+Python 2 and Python 3
+Maya 2018+
+
+Bhavesh Budhkar
+bhaveshbudhkar@yahoo.com
+"""
+
+
+import argparse
+import fnmatch
+import logging
+import multiprocessing
+import os
+import sys
+import time
+import traceback
+
+
+def initialize_worker():
+    """
+    Start a standalone Maya session in the worker process.
+    :return: None
+    """
+    import maya.standalone
+    maya.standalone.initialize(name="python")
+
+
+def output_path(scene_path, output_dir):
+    """
+    Path the scene with Pref is saved to.
+    :param scene_path: Source Scene Path
+    :param output_dir: Output Directory, None saves next to the source scene
+    :return: Output Scene Path
+    """
+    name, extension = os.path.splitext(os.path.basename(scene_path))
+    directory = output_dir if output_dir else os.path.dirname(os.path.abspath(scene_path))
+    return os.path.join(directory, "{0}_pref{1}".format(name, extension))
+
+
+def cache_directory(scene_path, output_dir, cache_dir):
+    """
+    Directory the Pref cache files of a scene are written to.
+    :param scene_path: Source Scene Path
+    :param output_dir: Output Directory, None saves next to the source scene
+    :param cache_dir: Cache Directory, None writes under "cache/pref" next to the saved scene
+    :return: Absolute Cache Directory
+    """
+    directory = cache_dir if cache_dir else os.path.join(os.path.dirname(output_path(scene_path, output_dir)),
+                                                         "cache", "pref")
+    return os.path.abspath(directory)
+
+
+def read_shot_list(shot_list_path):
+    """
+    Scene paths of a shot list file.
+    :param shot_list_path: Shot List Path, one Scene Path per Line
+    :return: List of Scene Paths
+    """
+    with open(shot_list_path) as shot_list_file:
+        lines = [line.strip() for line in shot_list_file]
+    return [line for line in lines if line and not line.startswith("#")]
+
+
+def match_mesh(mesh, patterns):
+    """
+    Whether the shape name or the name of one of the parents of a mesh matches a pattern.
+    :param mesh: Mesh Long Name
+    :param patterns: List of fnmatch Patterns
+    :return: True or False
+    """
+    names = [name for name in mesh.split("|") if name]
+    return any(fnmatch.fnmatchcase(name, pattern) for name in names for pattern in patterns)
+
+
+def filter_meshes(mesh_list, include, exclude):
+    """
+    Meshes kept by the include and exclude patterns.
+    :param mesh_list: List of Mesh Long Names
+    :param include: List of Patterns, empty keeps every mesh
+    :param exclude: List of Patterns
+    :return: List of Mesh Long Names
+    """
+    return [mesh for mesh in mesh_list
+            if (not include or match_mesh(mesh, include)) and not (exclude and match_mesh(mesh, exclude))]
+
+
+def open_log(log_path):
+    """
+    Logger writing to the log file of one scene.
+    :param log_path: Log Path
+    :return: logging.Logger Object
+    """
+    logger = logging.getLogger("generate_pref_batch.{0}".format(os.getpid()))
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    handler = logging.FileHandler(log_path, mode="w")
+    handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(message)s"))
+    logger.addHandler(handler)
+    return logger
+
+
+def close_log(logger):
+    """
+    Close the log file of a logger, workers reuse their logger for the next scene.
+    :param logger: logging.Logger Object
+    :return: None
+    """
+    for handler in list(logger.handlers):
+        handler.close()
+        logger.removeHandler(handler)
+
+
+def generate_scene(job):
+    """
+    Open a scene, generate Pref on its meshes and save the result.
+    :param job: Tuple of Scene Path, Output Directory, Log Directory, Frame, Include Patterns, Exclude Patterns,
+                Maya, Houdini, Cache File, Nref, Tref, Houdini File and Cache Directory
+    :return: Summary Dictionary
+    """
+    (scene_path, output_dir, log_dir, frame, include, exclude, maya, houdini, cache_file, normals, tangents,
+     houdini_file, cache_dir) = job
+
+    start_time = time.time()
+    summary = {"scene": scene_path, "output": None, "status": "skipped"}
+
+    log_path = os.path.join(log_dir or os.path.dirname(output_path(scene_path, output_dir)),
+                            os.path.splitext(os.path.basename(output_path(scene_path, output_dir)))[0] + ".log")
+    summary["log"] = log_path
+    logger = open_log(log_path)
+
+    try:
+        import maya.cmds as cmds
+        import generate_pref
+
+        logger.info("Opening %s", scene_path)
+        cmds.file(scene_path, open=True, force=True)
+
+        mesh_list = filter_meshes(cmds.ls(type="mesh", noIntermediate=True, long=True) or [], include, exclude)
+        logger.info("%d meshes match the filters", len(mesh_list))
+
+        if mesh_list and houdini_file:
+            import generate_pref_houdini
+
+            selection_list = generate_pref.GeneratePref.get_shape_selection(mesh_list)
+            cache_path = os.path.splitext(output_path(scene_path, output_dir))[0] + generate_pref_houdini.EXTENSION
+            summary.update(generate_pref.GeneratePref.export_houdini(selection_list, frame, cache_path))
+            summary["status"] = "exported"
+            logger.info("Pref of %d meshes on frame %g written to %s", summary["exported"], frame, summary["path"])
+        elif mesh_list:
+            selection_list = generate_pref.GeneratePref.get_shape_selection(mesh_list)
+            report = generate_pref.GeneratePref.generate(selection_list, frame, maya, houdini, cache_file,
+                                                         normals, tangents,
+                                                         cache_directory(scene_path, output_dir, cache_dir))
+            summary.update(report)
+            logger.info("Pref generated on frame %g, %d rebuilt, %d unchanged, %d cache files written", frame,
+                        report["rebuilt"], report["unchanged"], report["cache_files"])
+
+            if report["rebuilt"]:
+                summary["output"] = output_path(scene_path, output_dir)
+                scene_type = "mayaBinary" if summary["output"].endswith(".mb") else "mayaAscii"
+                cmds.file(rename=summary["output"])
+                cmds.file(save=True, type=scene_type, force=True)
+                summary["status"] = "generated"
+                logger.info("Saved %s", summary["output"])
+    except Exception:
+        summary["status"] = "failed"
+        summary["error"] = traceback.format_exc()
+        logger.error(summary["error"])
+
+    summary["seconds"] = round(time.time() - start_time, 3)
+    logger.info("Finished %s in %ss", summary["status"], summary["seconds"])
+    close_log(logger)
+
+    return summary
+
+
+def parse_arguments(arguments):
+    """
+    Command line arguments.
+    :param arguments: List of Arguments
+    :return: argparse.Namespace
+    """
+    parser = argparse.ArgumentParser(description="Generate Pref on many scenes or shots.")
+    parser.add_argument("scenes", nargs="*", help="Maya scene files")
+    parser.add_argument("--shot-list", default=None, help="text file with one scene path per line")
+    parser.add_argument("--frame", type=float, default=1001, help="reference frame of the Pref (default: 1001)")
+    parser.add_argument("--filter", nargs="+", default=[], dest="include",
+                        help="only meshes whose shape or parent names match one of these patterns")
+    parser.add_argument("--exclude", nargs="+", default=[],
+                        help="skip meshes whose shape or parent names match one of these patterns")
+    parser.add_argument("--maya", action="store_true", help="create Pref attributes for Maya (default)")
+    parser.add_argument("--houdini", action="store_true", help="create Pref attributes for Houdini")
+    parser.add_argument("--cache", action="store_true", help="write Pref to cache files instead of attributes")
+    parser.add_argument("--nref", action="store_true", help="also write reference normals (Nref)")
+    parser.add_argument("--tref", action="store_true", help="also write reference tangents (Tref)")
+    parser.add_argument("--houdini-file", action="store_true",
+                        help="write Pref to a Houdini point cache file per scene, the scenes are not saved")
+    parser.add_argument("--workers", type=int, default=multiprocessing.cpu_count(),
+                        help="number of worker processes (default: number of CPUs)")
+    parser.add_argument("--output-dir", default=None,
+                        help="directory for saved scenes (default: next to each source scene)")
+    parser.add_argument("--log-dir", default=None, help="directory for the scene logs (default: next to each saved scene)")
+    parser.add_argument("--cache-dir", default=None,
+                        help="directory for the --cache files (default: cache/pref next to each saved scene)")
+    arguments = parser.parse_args(arguments)
+
+    if arguments.shot_list:
+        arguments.scenes.extend(read_shot_list(arguments.shot_list))
+    if not arguments.scenes:
+        parser.error("no scenes given, pass scene files or --shot-list")
+    if not (arguments.maya or arguments.houdini):
+        arguments.maya = True
+    return arguments
+
+
+def main(arguments=None):
+    """
+    Generate Pref on every scene in a pool of standalone Maya workers.
+    :param arguments: List of Arguments, defaults to sys.argv
+    :return: Exit Code
+    """
+    arguments = parse_arguments(sys.argv[1:] if arguments is None else arguments)
+
+    for directory in (arguments.output_dir, arguments.log_dir):
+        if directory and not os.path.isdir(directory):
+            os.makedirs(directory)
+
+    jobs = [(scene, arguments.output_dir, arguments.log_dir, arguments.frame, arguments.include, arguments.exclude,
+             arguments.maya, arguments.houdini, arguments.cache, arguments.nref, arguments.tref,
+             arguments.houdini_file, arguments.cache_dir)
+            for scene in arguments.scenes]
+
+    pool = multiprocessing.Pool(processes=max(1, arguments.workers), initializer=initialize_worker)
+    failed = 0
+    try:
+        for summary in pool.imap_unordered(generate_scene, jobs):
+            if summary["status"] == "failed":
+                failed += 1
+            sys.stdout.write("{0}: {1} ({2}s) {3}\n".format(summary["scene"], summary["status"], summary["seconds"],
+                                                            summary["log"]))
+    finally:
+        pool.close()
+        pool.join()
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
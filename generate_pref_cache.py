@@ -0,0 +1,190 @@
+"""
+Generate Pref - Cache
+
+Pref cache files, reference positions as float32 outside of the scene.
+
+
+How to use
+
+    In Maya
+        Check "Cache File" in the Generate Pref UI, the shapes only get the path of their cache file and the
+        world matrix the object space positions in it are multiplied by
+
+    Anywhere, without Maya
+        with PrefCacheReader("/path/to/cache/pref/<topology>_<points>.pref") as pref:
+            positions = pref.points()
+
+    A cache file is named after the topology hash of its mesh and the hash of its positions, meshes with the
+    same topology and the same positions share one file, whatever their transforms, and a file is never
+    rewritten once it exists.
+
+
+File layout, version 1
+
+    4 bytes     magic "PREF"
+    4 bytes     version, unsigned int, little endian
+    8 bytes     number of points, unsigned long long, little endian
+    32 bytes    topology hash, md5 hex digest
+    points      x y z float32 per point, little endian
+
+    The reader maps the file and reads the header only, points() is a memoryview on the mapped file on
+    Python 3 on little endian machines, no copy is made, see mapped_file.py.
+
+
+Python 2 and Python 3
+
+Bhavesh Budhkar
+bhaveshbudhkar@yahoo.com
+"""
+
+
+import hashlib
+import os
+import struct
+import sys
+from array import array
+
+from mapped_file import MappedFile
+
+
+MAGIC = b"PREF"
+VERSION = 1
+
+HEADER = struct.Struct("<4sIQ32s")
+
+EXTENSION = ".pref"
+
+
+def array_bytes(data):
+    """
+    Little endian bytes of an array.
+    :param data: array Object
+    :return: Bytes
+    """
+    if sys.byteorder != "little":
+        data = array(data.typecode, data)
+        data.byteswap()
+    return data.tobytes() if hasattr(data, "tobytes") else data.tostring()
+
+
+def topology_hash(face_vertex_counts, face_vertices):
+    """
+    Hash of the topology of a mesh, the vertex count of every face and the vertices of every face.
+    :param face_vertex_counts: Vertex Count per Face, like MFnMesh.getVertices()[0]
+    :param face_vertices: Vertices of every Face, like MFnMesh.getVertices()[1]
+    :return: md5 Hex Digest
+    """
+    topology = hashlib.md5(array_bytes(array("i", face_vertex_counts)))
+    topology.update(array_bytes(array("i", face_vertices)))
+    return topology.hexdigest()
+
+
+def uv_hash(us, vs):
+    """
+    Hash of the UVs of a mesh.
+    :param us: U Values, like MFnMesh.getUVs()[0]
+    :param vs: V Values, like MFnMesh.getUVs()[1]
+    :return: md5 Hex Digest
+    """
+    uvs = hashlib.md5(array_bytes(array("f", us)))
+    uvs.update(array_bytes(array("f", vs)))
+    return uvs.hexdigest()
+
+
+def point_bytes(points):
+    """
+    float32 x y z bytes of points.
+    :param points: Points like an MPointArray, the w of every point is dropped, or a float32 array of x y z
+    :return: Bytes
+    """
+    if isinstance(points, array) and points.typecode == "f":
+        return array_bytes(points)
+    return array_bytes(array("f", [component for point in points for component in (point[0], point[1], point[2])]))
+
+
+def pref_key(points, topology):
+    """
+    Key of a Pref, the topology hash and the hash of the float32 points, the name of its cache file.
+    :param points: Points
+    :param topology: Topology Hash of the Mesh
+    :return: Key String
+    """
+    return "{0}_{1}".format(topology, hashlib.md5(point_bytes(points)).hexdigest())
+
+
+def write_pref_cache(cache_directory, points, topology, key=None):
+    """
+    Write a Pref cache file unless the same one already exists.
+    :param cache_directory: Directory of the Cache Files
+    :param points: Points
+    :param topology: Topology Hash of the Mesh
+    :param key: pref_key() of the Points when already known, the points are then not hashed again
+    :return: Cache File Path
+    """
+    if key is None:
+        key = pref_key(points, topology)
+    cache_path = os.path.join(cache_directory, key + EXTENSION)
+    if os.path.isfile(cache_path):
+        return cache_path
+
+    if not os.path.isdir(cache_directory):
+        os.makedirs(cache_directory)
+
+    data = point_bytes(points)
+    # Written next to the final path and renamed, a reader never sees a half written file
+    temporary_path = "{0}.{1}.tmp".format(cache_path, os.getpid())
+    with open(temporary_path, "wb") as cache_file:
+        cache_file.write(HEADER.pack(MAGIC, VERSION, len(data) // 12, topology.encode("ascii")))
+        cache_file.write(data)
+    try:
+        os.rename(temporary_path, cache_path)
+    except OSError:
+        # Written by another process in the meantime, the content is the same
+        os.remove(temporary_path)
+    return cache_path
+
+
+class PrefCacheReader(object):
+    """
+    Lazy reader of a Pref cache file.
+    Views returned by points() point into the mapped file, close() releases them.
+    """
+
+    def __init__(self, cache_path):
+        self.cache_path = cache_path
+        self._file = open(cache_path, "rb")
+        try:
+            magic, version, self.point_count, topology = HEADER.unpack(self._file.read(HEADER.size))
+            if magic != MAGIC:
+                raise ValueError("{0} is not a Pref cache file".format(cache_path))
+            if version > VERSION:
+                raise ValueError("{0} is version {1}, this reader reads up to version {2}".format(cache_path, version,
+                                                                                                  VERSION))
+            self.topology_hash = topology.decode("ascii")
+            self._map = None
+            if self.point_count:
+                self._map = MappedFile(self._file)
+        except Exception:
+            self._file.close()
+            raise
+
+    def points(self):
+        """
+        Pref positions, read from the file only here.
+        :return: memoryview or array of float32, x y z per point
+        """
+        if self._map is None:
+            return array("f")
+        return self._map.array(HEADER.size, self.point_count * 3, "f", "little")
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
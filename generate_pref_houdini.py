@@ -0,0 +1,235 @@
+"""
+Generate Pref - Houdini Point Cache
+
+Pref of many meshes in one point cache file, read in Houdini without an Alembic export.
+
+
+How to use
+
+    In Maya
+        Check "Houdini File" in the Generate Pref UI, the world space Pref of every selected mesh is written to
+        "<scene name>.prefh" under the workspace "cache/pref" directory, nothing is added to the scene
+
+    In Houdini, a Python SOP, this file only needs Python
+        from generate_pref_houdini import PrefPointCacheReader
+
+        geo = hou.pwd().geometry()
+        with PrefPointCacheReader("/path/to/cache/pref/shot010.prefh") as pref:
+            rest = pref.points("|char_GRP|body_GEO|body_GEOShape")
+            geo.addAttrib(hou.attribType.Point, "rest", (0.0, 0.0, 0.0))
+            geo.setPointFloatAttribValuesFromString("rest", rest.tobytes())
+
+    Meshes are keyed by their Maya shape long name, "|" or "/" separated like Alembic paths, and carry their
+    point count, a mesh whose point count differs from the one in Houdini does not fit its Pref.
+
+
+File layout, version 1
+
+    4 bytes     magic "PRFH"
+    4 bytes     version, unsigned int, little endian
+    records     one per mesh, written one mesh at a time
+        4 bytes     size of the shape path, unsigned int, little endian
+        8 bytes     number of points, unsigned long long, little endian
+        path        shape long name, utf-8, padded with zeros to a multiple of 4 bytes
+        points      x y z float32 per point, little endian
+    index       JSON, shape -> [offset of the points, number of points]
+    8 bytes     offset of the index, unsigned long long, little endian
+    4 bytes     magic "PRFH"
+
+    The reader maps the file and reads the index only, points() is a memoryview on the mapped file on
+    Python 3 on little endian machines, no copy is made. close() releases the views, copy the points with
+    array("f", view) to keep them past close().
+
+
+Python 2 and Python 3
+
+Bhavesh Budhkar
+bhaveshbudhkar@yahoo.com
+"""
+
+
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+
+MAGIC = b"PRFH"
+VERSION = 1
+
+HEADER = struct.Struct("<4sI")
+RECORD = struct.Struct("<IQ")
+FOOTER = struct.Struct("<Q4s")
+
+EXTENSION = ".prefh"
+
+
+def shape_key(shape):
+    """
+    Key of a shape in the index, Maya long names and Alembic like paths give the same key.
+    :param shape: Shape Long Name or Path
+    :return: Key String
+    """
+    return "|" + shape.replace("/", "|").lstrip("|")
+
+
+def float_bytes(values):
+    """
+    float32 little endian bytes.
+    :param values: Numbers
+    :return: Bytes
+    """
+    data = array("f", values)
+    if sys.byteorder != "little":
+        data.byteswap()
+    return data.tobytes() if hasattr(data, "tobytes") else data.tostring()
+
+
+class PrefPointCacheWriter(object):
+    """
+    Streaming writer of a Houdini point cache file, one mesh at a time.
+    The file is written next to its path and renamed on close(), a reader never sees a half written file.
+    """
+
+    def __init__(self, cache_path):
+        self.cache_path = cache_path
+        self.index = {}
+        self._temporary_path = "{0}.{1}.tmp".format(cache_path, os.getpid())
+        self._file = open(self._temporary_path, "wb")
+        self._file.write(HEADER.pack(MAGIC, VERSION))
+
+    def write(self, shape, points):
+        """
+        Write the points of a mesh.
+        :param shape: Shape Long Name
+        :param points: Points like an MPointArray, the w of every point is dropped, or a float32 array of x y z
+        :return: Number of Points
+        """
+        if isinstance(points, array) and points.typecode == "f":
+            data = float_bytes(points)
+        else:
+            data = float_bytes([component for point in points for component in (point[0], point[1], point[2])])
+        path = shape_key(shape).encode("utf-8")
+        point_count = len(data) // 12
+
+        self._file.write(RECORD.pack(len(path), point_count))
+        self._file.write(path + b"\0" * (-len(path) % 4))
+        self.index[shape_key(shape)] = [self._file.tell(), point_count]
+        self._file.write(data)
+        return point_count
+
+    def close(self):
+        if self._file is None:
+            return
+        index_offset = self._file.tell()
+        self._file.write(json.dumps(self.index, sort_keys=True).encode("utf-8"))
+        self._file.write(FOOTER.pack(index_offset, MAGIC))
+        self._file.close()
+        self._file = None
+        if os.path.isfile(self.cache_path):
+            os.remove(self.cache_path)
+        os.rename(self._temporary_path, self.cache_path)
+
+    def abort(self):
+        """
+        Drop the file being written, an existing file at the path is kept.
+        :return: None
+        """
+        if self._file is None:
+            return
+        self._file.close()
+        self._file = None
+        os.remove(self._temporary_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exception_type, *args):
+        if exception_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+class PrefPointCacheReader(object):
+    """
+    Lazy reader of a Houdini point cache file.
+    Views returned by points() point into the mapped file, close() releases them.
+    """
+
+    def __init__(self, cache_path):
+        self.cache_path = cache_path
+        self._views = []
+        self._file = open(cache_path, "rb")
+        try:
+            magic, version = HEADER.unpack(self._file.read(HEADER.size))
+            if magic != MAGIC:
+                raise ValueError("{0} is not a Pref point cache file".format(cache_path))
+            if version > VERSION:
+                raise ValueError("{0} is version {1}, this reader reads up to version {2}".format(cache_path, version,
+                                                                                                  VERSION))
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            index_offset, magic = FOOTER.unpack(self._map[-FOOTER.size:])
+            if magic != MAGIC:
+                raise ValueError("{0} is incomplete".format(cache_path))
+            self.index = json.loads(self._map[index_offset:-FOOTER.size].decode("utf-8"))
+        except Exception:
+            self.close()
+            raise
+
+    def shapes(self):
+        """
+        Shapes in the file.
+        :return: List of Shape Long Names
+        """
+        return sorted(self.index)
+
+    def point_count(self, shape):
+        """
+        Number of points of a shape.
+        :param shape: Shape Long Name or Path
+        :return: Number of Points
+        """
+        return self.index[shape_key(shape)][1]
+
+    def points(self, shape):
+        """
+        Pref positions of a shape, read from the file only here.
+        :param shape: Shape Long Name or Path
+        :return: memoryview or array of float32, x y z per point
+        """
+        start, point_count = self.index[shape_key(shape)]
+        end = start + point_count * 12
+        if hasattr(memoryview, "cast") and sys.byteorder == "little":
+            view = memoryview(self._map)[start:end].cast("f")
+            self._views.append(view)
+            return view
+        data = array("f")
+        if hasattr(data, "frombytes"):
+            data.frombytes(self._map[start:end])
+        else:
+            data.fromstring(self._map[start:end])
+        if sys.byteorder != "little":
+            data.byteswap()
+        return data
+
+    def close(self):
+        for view in self._views:
+            view.release()
+        self._views = []
+        if getattr(self, "_map", None) is not None:
+            try:
+                self._map.close()
+            except BufferError:
+                # Views made from the returned ones still use the map, it is closed once they are gone
+                pass
+            self._map = None
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
@@ -0,0 +1,201 @@
+"""
+Generate Pref - UI
+
+The Generate Pref window, the Pref engine is generate_pref.GeneratePref.
+
+
+How to use
+
+    Shelf button
+        import shelf_launcher
+        shelf_launcher.open_generate_pref()
+
+    The window is created on the first open and shown again on the next ones, Qt is only imported here.
+    See generate_pref.py for what the options do.
+
+
+Python 2 and Python 3
+Maya 2018+
+
+Bhavesh Budhkar
+bhaveshbudhkar@yahoo.com
+"""
+
+
+from PySide2 import QtWidgets, QtCore
+from shiboken2 import wrapInstance, isValid
+from sys import stdout
+from generate_pref import GeneratePref
+import maya.OpenMayaUI as omui
+import maya.api.OpenMaya as om
+
+
+# Window of the session, reused between opens
+generate_pref_window = None
+
+
+def maya_main_window():
+    """
+    Maya Main Window Pointer
+    :return: QtWidgets.QWidget Object
+    """
+    main_window_ptr = omui.MQtUtil.mainWindow()
+    return wrapInstance(int(main_window_ptr), QtWidgets.QWidget)
+
+
+class GeneratePrefUI(QtWidgets.QWidget):
+    """
+    Maya UI Class
+    """
+
+    def __init__(self, title, version, parent=None):
+        """
+        Maya UI Init
+        :param title: Tool Name
+        :param version: Tool Version
+        :param parent: Parent Window, defaults to the Maya main window
+        """
+        if parent is None:
+            parent = maya_main_window()
+        super(GeneratePrefUI, self).__init__(parent)
+
+        self.title = title
+        self.version = version
+
+        self.setWindowTitle("{0} v{1}".format(self.title, self.version))
+
+        self.setWindowFlags(self.windowFlags() ^ QtCore.Qt.WindowContextHelpButtonHint | QtCore.Qt.Window)
+        self.setFixedSize(350, 120)
+
+        self.create_widgets()
+        self.create_layouts()
+        self.create_connections()
+
+    def create_widgets(self):
+        """
+        Create UI Widgets
+        :return: None
+        """
+        self.maya_checkbox = QtWidgets.QCheckBox("Maya")
+        self.maya_checkbox.setChecked(True)
+        self.houdini_checkbox = QtWidgets.QCheckBox("Houdini")
+        self.cache_checkbox = QtWidgets.QCheckBox("Cache File")
+        self.nref_checkbox = QtWidgets.QCheckBox("Nref")
+        self.tref_checkbox = QtWidgets.QCheckBox("Tref")
+        self.houdini_file_checkbox = QtWidgets.QCheckBox("Houdini File")
+
+        self.frame_number_label = QtWidgets.QLabel("Frame Number")
+
+        self.frame_number = QtWidgets.QSpinBox()
+        self.frame_number.setRange(0, 100000)
+        self.frame_number.setValue(1001)
+        self.frame_number.setButtonSymbols(QtWidgets.QSpinBox.NoButtons)
+
+        self.generate_button = QtWidgets.QPushButton("Generate")
+
+        self.delete_button = QtWidgets.QPushButton("Delete")
+
+        self.vertical_spacer = QtWidgets.QSpacerItem(20, 40, QtWidgets.QSizePolicy.Minimum,
+                                                     QtWidgets.QSizePolicy.Expanding)
+
+        self.author_label = QtWidgets.QLabel("Bhavesh Budhkar")
+        self.author_label.setDisabled(True)
+        self.author_label.setAlignment(QtCore.Qt.AlignLeft)
+
+        self.email_label = QtWidgets.QLabel("bhaveshbudhkar@yahoo.com")
+        self.email_label.setDisabled(True)
+        self.email_label.setAlignment(QtCore.Qt.AlignRight)
+
+    def create_layouts(self):
+        """
+        Create UI Layouts
+        :return: None
+        """
+        self.info_layout = QtWidgets.QHBoxLayout()
+        self.info_layout.addWidget(self.author_label)
+        self.info_layout.addWidget(self.email_label)
+
+        self.dcc_checkbox_layout = QtWidgets.QGridLayout()
+        self.dcc_checkbox_layout.addWidget(self.maya_checkbox, 0, 0)
+        self.dcc_checkbox_layout.addWidget(self.houdini_checkbox, 0, 1)
+        self.dcc_checkbox_layout.addWidget(self.cache_checkbox, 0, 2)
+        self.dcc_checkbox_layout.addWidget(self.nref_checkbox, 1, 0)
+        self.dcc_checkbox_layout.addWidget(self.tref_checkbox, 1, 1)
+        self.dcc_checkbox_layout.addWidget(self.houdini_file_checkbox, 1, 2)
+
+        self.pref_layout = QtWidgets.QHBoxLayout()
+        self.pref_layout.addWidget(self.frame_number_label)
+        self.pref_layout.addWidget(self.frame_number)
+        self.pref_layout.addWidget(self.generate_button)
+        self.pref_layout.addWidget(self.delete_button)
+
+        self.main_layout = QtWidgets.QVBoxLayout(self)
+        self.main_layout.addLayout(self.dcc_checkbox_layout)
+        self.main_layout.addLayout(self.pref_layout)
+        self.main_layout.addSpacerItem(self.vertical_spacer)
+        self.main_layout.addLayout(self.info_layout)
+
+        self.setLayout(self.main_layout)
+
+    def create_connections(self):
+        """
+        Signals and Slots
+        :return: None
+        """
+        self.generate_button.clicked.connect(self.generate_pref)
+        self.delete_button.clicked.connect(self.delete_pref)
+
+    def generate_pref(self):
+        """
+        Generate Pref on selected objects on specified frame.
+        :return: None
+        """
+        selection_list = GeneratePref.get_selection()
+
+        if not selection_list.isEmpty() and self.houdini_file_checkbox.isChecked():
+            report = GeneratePref.export_houdini(selection_list, self.frame_number.value(),
+                                                 GeneratePref.get_houdini_file_path())
+            stdout.write("Pref of {0} objects on frame {1} is written to {2}.\n".format(
+                report["exported"], self.frame_number.text(), report["path"]))
+        elif not selection_list.isEmpty():
+            cache_file = self.cache_checkbox.isChecked()
+            report = GeneratePref.generate(selection_list, self.frame_number.value(), self.maya_checkbox.isChecked(),
+                                           self.houdini_checkbox.isChecked(), cache_file, self.nref_checkbox.isChecked(),
+                                           self.tref_checkbox.isChecked())
+
+            cache_report = ", {0} cache files written".format(report["cache_files"]) if cache_file else ""
+            stdout.write("Pref is generated on selected objects on frame {0}, {1} rebuilt, {2} unchanged{3}.\n".format(
+                self.frame_number.text(), report["rebuilt"], report["unchanged"], cache_report))
+        else:
+            om.MGlobal.displayWarning("Please select at least one Geometry.\n")
+
+    def delete_pref(self):
+        """
+        Delete Pref on selected objects.
+        :return: None
+        """
+        selection_list = GeneratePref.get_selection()
+
+        if not selection_list.isEmpty():
+            GeneratePref.delete(selection_list)
+            stdout.write("Pref is delete on selected objects.\n")
+        else:
+            om.MGlobal.displayWarning("Please select at least one Geometry.\n")
+
+
+def show_ui():
+    """
+    Show the Generate Pref window, created on the first call and reused afterwards.
+    :return: GeneratePrefUI Object
+    """
+    global generate_pref_window
+    if generate_pref_window is None or not isValid(generate_pref_window):
+        generate_pref_window = GeneratePrefUI("Generate Pref", 1.0)
+    generate_pref_window.show()
+    generate_pref_window.raise_()
+    generate_pref_window.activateWindow()
+    return generate_pref_window
+
+
+if __name__ == "__main__":
+    show_ui()
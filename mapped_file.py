@@ -0,0 +1,69 @@
+"""
+Mapped File
+
+Arrays read out of a memory mapped binary file, shared by the readers of the shader table sidecar and of the
+Pref cache files. Only needs Python.
+
+    mapped = MappedFile(open_file)
+    values = mapped.array(offset, count, "d", "little")
+    mapped.close()
+
+On Python 3, arrays in the byte order of the machine are memoryviews on the mapped file, no copy is made.
+close() releases every view it returned, a released view raises ValueError when used, make a copy with
+array(typecode, view) to keep values past close().
+
+
+Python 2 and Python 3
+
+Bhavesh Budhkar
+bhaveshbudhkar@yahoo.com
+"""
+
+
+import mmap
+import sys
+from array import array
+
+
+class MappedFile(object):
+    """
+    Read only memory map of an open file and the views returned from it.
+    """
+
+    def __init__(self, open_file):
+        self._map = mmap.mmap(open_file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._views = []
+
+    def array(self, start, count, typecode, byteorder):
+        """
+        Array in the file.
+        :param start: Offset of the Array
+        :param count: Number of Items
+        :param typecode: array Typecode
+        :param byteorder: Byte Order of the Array, "little" or "big"
+        :return: memoryview or array
+        """
+        end = start + count * array(typecode).itemsize
+        if hasattr(memoryview, "cast") and byteorder == sys.byteorder:
+            view = memoryview(self._map)[start:end].cast(typecode)
+            self._views.append(view)
+            return view
+        data = array(typecode)
+        if hasattr(data, "frombytes"):
+            data.frombytes(self._map[start:end])
+        else:
+            data.fromstring(self._map[start:end])
+        if byteorder != sys.byteorder:
+            data.byteswap()
+        return data
+
+    def close(self):
+        for view in self._views:
+            view.release()
+        self._views = []
+        try:
+            self._map.close()
+        except BufferError:
+            # Views made from the returned ones still use the map, it is closed once they are gone
+            pass
+        self._map = None
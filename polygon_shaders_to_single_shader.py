@@ -5,8 +5,15 @@ Convert polygon based shader assignment to one shader for MtoA.
 
 How to use
 
+Open the window from a shelf button with: import shelf_launcher; shelf_launcher.open_polygon_shaders_to_single_shader()
 1. Drag and select objects on the viewport
 2. Give a Shader name and press Assign
+3. Maya stays usable while the objects are converted, Cancel stops and rolls back the conversion
+
+Without the UI, call convert_function(objects, shader_name, palette_mode)
+or run polygon_shaders_to_single_shader_batch.py with mayapy on a list of scenes
+convert_function(..., sidecar_path=path) also writes the per face tables to a binary sidecar file, see polygon_shaders_to_single_shader_sidecar.py
+polygon_shaders_to_single_shader_scan.py finds the .ma scenes that need converting without Maya
 
 
 Features
@@ -14,6 +21,9 @@ Features
 1. Can identify "file" and "aiImage" nodes for texture paths
 2. Can identify "bump2d" and "aiBump2d" for bump values
 3. Single shaders automatically ignored and does not get replaced with new one
+4. Palette mode stores float, color and bump values once per shader instead of once per face and picks them with face_set
+5. Objects keep a fingerprint of their conversion, running again only rewrites objects whose shader assignments or shader values changed
+   objects already on a combined shader are converted again from the shaders and face sets of their last conversion
 
 
 Limitations
@@ -24,6 +34,7 @@ Limitations
 4. Need to have direct connections with shaders and no colorCorrect or any nodes in between
 5. Does not work with procedural textures
 6. Render time is same or slightly higher
+7. Palette mode works on objects with up to 20 shaders (aiSwitch inputs), otherwise values are stored per face
 
 Bhavesh Budhkar
 bhaveshbudhkar@yahoo.com
@@ -31,9 +42,118 @@ bhaveshbudhkar@yahoo.com
 
 '''
 
+import maya.api.OpenMaya as om
 import maya.cmds as cmds
+import polygon_shaders_to_single_shader_undo
+import collections
+import hashlib
+import json
 import operator
+import os
 import re
+import time
+from array import array
+
+# a compact face component like "pCube1.f[10]" or "pCube1.f[10:250]"
+face_range_pattern = re.compile(r'\.f\[(\d+)(?::(\d+))?\]$')
+
+# number of inputs of an aiSwitch node, the most shader slots a palette can address
+palette_size_limit = 20
+
+# string attribute on converted shapes holding their conversion fingerprint, not exported as user data
+fingerprint_attribute = 'one_shader_fingerprint'
+
+# string attribute on converted shapes holding the shaders of their shader slots, mtoa_uniform_face_set holds the slot of every face
+source_attribute = 'one_shader_sources'
+
+# attribute marking the combined shaders created by a conversion
+combined_shader_attribute = 'one_shader_combined'
+
+# profile of the running conversion, None unless convert_function is given a profile path
+run_profile = None
+
+# conversion started from the UI and converted in idle time chunks, None when the UI is not converting
+ui_conversion = None
+
+# seconds of work per idle time chunk, Maya handles the viewport and the UI between chunks
+idle_chunk_seconds = 0.05
+
+class CommandCounter(object):
+    # stands in for maya.cmds while a run is profiled, counts every command in total and for the current shape
+    def __init__(self, commands, profile):
+        self.commands = commands
+        self.profile = profile
+
+    def __getattr__(self, name):
+        command = getattr(self.commands, name)
+        profile = self.profile
+        def counted_command(*args, **kwargs):
+            profile['commands'][name] += 1
+            if profile['shape'] != None:
+                profile['shapes'][profile['shape']]['commands'][name] += 1
+            return(command(*args, **kwargs))
+        return(counted_command)
+
+def profile_start_function():
+    # starts profiling a run, every maya.cmds call of this module goes through a CommandCounter until profile_report_function
+    global run_profile, cmds
+    run_profile = {'start': time.time(), 'phase': None, 'phase_start': None, 'phases': collections.OrderedDict(),
+                   'shape': None, 'shape_start': None, 'shapes': collections.OrderedDict(),
+                   'commands': collections.Counter(), 'maya_commands': cmds}
+    cmds = CommandCounter(cmds, run_profile)
+    profile_phase_function('discovery')
+
+def profile_phase_function(phase):
+    # books the time of a profiled run on a phase until the next phase switch, returns the previous phase
+    # phases: discovery, face mapping, parameter diffing, texture resolution, attribute write, network build
+    if run_profile == None:
+        return(None)
+    now = time.time()
+    previous_phase = run_profile['phase']
+    if previous_phase != None:
+        run_profile['phases'][previous_phase] = run_profile['phases'].get(previous_phase, 0.0) + now - run_profile['phase_start']
+    run_profile['phase'] = phase
+    run_profile['phase_start'] = now
+    return(previous_phase)
+
+def profile_shape_function(shape_loop):
+    # books the time and commands of a profiled run on a shape until the next shape, None for work outside of shapes
+    # shaders are read for the first shape which uses them
+    if run_profile == None:
+        return
+    now = time.time()
+    if run_profile['shape'] != None:
+        run_profile['shapes'][run_profile['shape']]['seconds'] += now - run_profile['shape_start']
+    if shape_loop != None:
+        run_profile['shapes'].setdefault(shape_loop, {'seconds': 0.0, 'commands': collections.Counter()})
+    run_profile['shape'] = shape_loop
+    run_profile['shape_start'] = now
+
+def profile_report_function(profile_path, summary):
+    # ends profiling, restores maya.cmds and writes the JSON report of the run
+    # input: path of the JSON report, summary dictionary of the run, None when the run failed
+    global run_profile, cmds
+    profile_shape_function(None)
+    profile_phase_function(None)
+    profile = run_profile
+    run_profile = None
+    cmds = profile['maya_commands']
+    shape_report = collections.OrderedDict()
+    for shape_name, shape_profile in profile['shapes'].items():
+        shape_report[shape_name] = {'seconds': round(shape_profile['seconds'], 4),
+                                    'command_count': sum(shape_profile['commands'].values()),
+                                    'commands': dict(shape_profile['commands'])}
+    report = collections.OrderedDict()
+    report['seconds'] = round(time.time() - profile['start'], 4)
+    report['phases'] = collections.OrderedDict((phase, round(seconds, 4)) for phase, seconds in profile['phases'].items())
+    report['command_count'] = sum(profile['commands'].values())
+    report['commands'] = collections.OrderedDict(profile['commands'].most_common())
+    report['slowest_shapes'] = sorted(shape_report, key=lambda shape_name: shape_report[shape_name]['seconds'], reverse=True)[:10]
+    report['shapes'] = shape_report
+    report['summary'] = summary
+    with open(profile_path, 'w') as profile_file:
+        json.dump(report, profile_file, indent=4)
+    return(report)
 
 def selection_list_function():
     # get a list of viewport selection
@@ -41,29 +161,104 @@ def selection_list_function():
     return(cmds.ls( selection = True ))
 
 def shape_list_function(list):
-    # get a list of shapes
+    # get a list of shapes, without the intermediate (Orig) shapes of deformed meshes
     # input: viewport selection
-    return(cmds.listRelatives( list, type = 'shape' ))
+    return(cmds.listRelatives( list, type = 'shape', noIntermediate = True ))
 
-def selection_function(node):
-    # select any node/object on viewport
-    # input: a variable or string of the node/object
-    return(cmds.select(node))
+def shading_engine_list_function(shape_loop):
+    # a list of shading engines the shape or its faces are members of, without changing the selection
+    # input: shape
+    shading_engine_list = []
+    connections_list = cmds.listConnections(shape_loop, source=False, destination=True, type='shadingEngine')
+    if connections_list != None:
+        for shading_engine in connections_list:
+            if shading_engine not in shading_engine_list:
+                shading_engine_list.append(shading_engine)
+    return(shading_engine_list)
 
-def per_object_shader_list_function():
-    # a list of shaders from selected object
-    # input: selection of an object
-    return(cmds.hyperShade(shaderNetworksSelectMaterialNodes = True))
+def surface_shader_function(shading_engine):
+    # the material connected to the surface shader slot of a shading engine
+    # input: shading engine
+    connections_list = cmds.listConnections(shading_engine+'.surfaceShader', source=True, destination=False)
+    if connections_list != None:
+        return(connections_list[0])
 
-def faces_per_shader_function(object_loop, shape_loop):
-    # a selection of the shapes/faces from shader
-    # input: shader
-    select_faces_from_shader = cmds.hyperShade(objects='')
-    faces_from_shader_list = cmds.ls(selection=True, flatten=True)
-    per_shape_list = [per_shape_list for per_shape_list in faces_from_shader_list if str(object_loop) in per_shape_list]
-    per_object_list = [per_object_list for per_object_list in faces_from_shader_list if str(shape_loop) in per_object_list]
-    combine_list = per_shape_list + per_object_list
-    return(combine_list)
+def face_range_function(member):
+    # first and last face ID of a compact face component, without flattening it
+    # input: a face component like "pCube1.f[10:250]"
+    match = face_range_pattern.search(member)
+    if match != None:
+        start = int(match.group(1))
+        if match.group(2) != None:
+            return(start, int(match.group(2)))
+        return(start, start)
+
+def shader_assignment_index_function(shape_list):
+    # indexes the shading engine set membership once per run as shape -> shader -> list of (first, last) face ranges
+    # every shading engine is queried once, however many shapes share it
+    # members of shapes which are not in the list are skipped, they can be any surface, NURBS included
+    # input: list of shapes
+    assignment_index = {}
+    member_shape_dictionary = {}
+    selected_shape_set = set(cmds.ls(shape_list, long=True))
+    shading_engine_list = []
+    for shape_loop in shape_list:
+        for shading_engine in shading_engine_list_function(shape_loop):
+            if shading_engine not in shading_engine_list:
+                shading_engine_list.append(shading_engine)
+    for shading_engine in shading_engine_list:
+        shader = surface_shader_function(shading_engine)
+        members_list = cmds.sets(shading_engine, query=True)
+        if shader == None or members_list == None:
+            continue
+        for member in members_list:
+            # resolve each member node to its shape long name once, exact names avoid pCube1/pCube10 mix ups
+            member_node = member.split('.')[0]
+            if member_node not in member_shape_dictionary:
+                member_shape_dictionary[member_node] = cmds.ls(member, objectsOnly=True, long=True)[0]
+            member_shape = member_shape_dictionary[member_node]
+            if member_shape not in selected_shape_set:
+                continue
+            if '.f[' in member:
+                face_range = face_range_function(member)
+            else:
+                # whole object assignment
+                face_range = (0, cmds.polyEvaluate(member_shape, face=True) - 1)
+            shader_dictionary = assignment_index.setdefault(member_shape, collections.OrderedDict())
+            shader_dictionary.setdefault(shader, []).append(face_range)
+    return(assignment_index)
+
+def face_shader_index_function(shape_loop, assignment_index):
+    # the list of shaders on the shape and the shader index of every face, in face order
+    # input: shape, index from shader_assignment_index_function
+    shader_list = []
+    face_count = cmds.polyEvaluate(shape_loop, face=True)
+    face_shader_index_list = array('i', [0]) * face_count
+    shader_dictionary = assignment_index.get(cmds.ls(shape_loop, long=True)[0], {})
+    for shader in shader_dictionary:
+        shader_list.append(shader)
+        shader_index = array('i', [len(shader_list) - 1])
+        # face ranges are written straight into the integer array, no per-face strings are built
+        for start, end in shader_dictionary[shader]:
+            face_shader_index_list[start:end + 1] = shader_index * (end + 1 - start)
+    return(shader_list, face_shader_index_list)
+
+def converted_source_function(shape_loop, assignment_index):
+    # shaders and shader index of every face of a shape which is already on a combined shader, read back from its last conversion
+    # None when the shape is not on a combined shader, or when its source shaders or its faces changed since
+    # input: shape, index from shader_assignment_index_function
+    shader_dictionary = assignment_index.get(cmds.ls(shape_loop, long=True)[0], {})
+    if len(shader_dictionary) != 1:
+        return(None)
+    if cmds.attributeQuery(combined_shader_attribute, node=list(shader_dictionary)[0], exists=True) == False:
+        return(None)
+    if cmds.attributeQuery(source_attribute, node=shape_loop, exists=True) == False or cmds.attributeQuery('mtoa_uniform_face_set', node=shape_loop, exists=True) == False:
+        return(None)
+    shader_list = json.loads(get_attribute_function(shape_loop+'.'+source_attribute))
+    face_shader_index_list = array('i', get_attribute_function(shape_loop+'.mtoa_uniform_face_set'))
+    if len(cmds.ls(shader_list)) != len(shader_list) or len(face_shader_index_list) != cmds.polyEvaluate(shape_loop, face=True):
+        return(None)
+    return(shader_list, face_shader_index_list)
 
 def list_of_shader_connections_function(shader_loop):
     # get a list of all the connected nodes to the shader
@@ -77,35 +272,102 @@ def list_of_shader_connections_function(shader_loop):
         pass
     return(shader_connections_list)
 
-def face_ID_function(per_face_loop):
-    # extract face ID from selected faces
-    # input: a list of faces
-    if '[' in per_face_loop and ']' in per_face_loop:
-        start = per_face_loop.find("[") + len("[")
-        end = per_face_loop.find("]")
-        combine = per_face_loop[start:end]
-        return(int(combine))
-    else:
-        pass
-
 def get_attribute_function(node):
     # get information of the attribute
     # input: any attribute
     return(cmds.getAttr(node))
 
-def add_attribute_function(parameter_loop, each_parameter_loop, shape_loop, float_parameter, color_parameter):
+def attribute_batch_function(shape_loop):
+    # collects every attribute creation and value write of one shape
+    # nothing touches the scene until commit_attribute_batch_function
+    # input: shape
+    return({'shape': shape_loop, 'attributes': collections.OrderedDict(), 'values': collections.OrderedDict()})
+
+def add_batch_attribute_function(attribute_batch, attribute_name, data_type, multi=False):
+    # queues an attribute to be created on the shape when it does not exist yet
+    # data_type: doubleArray, vectorArray, Int32Array, string, double or float3 (color)
+    attribute_batch['attributes'].setdefault(attribute_name, (data_type, multi))
+
+def set_batch_value_function(attribute_batch, attribute_name, data_type, value, index=None):
+    # queues a value write, a later write of the same plug replaces the earlier one
+    # index is the element of a multi attribute
+    attribute_batch['values'][(attribute_name, index)] = (data_type, value)
+
+def new_attribute_function(attribute_name, data_type, multi):
+    # OpenMaya attribute object for add_batch_attribute_function data types
+    if data_type == 'float3':
+        return(om.MFnNumericAttribute().createColor(attribute_name, attribute_name))
+    if data_type == 'double':
+        return(om.MFnNumericAttribute().create(attribute_name, attribute_name, om.MFnNumericData.kDouble))
+    typed_attribute = om.MFnTypedAttribute()
+    typed_data_type = {'doubleArray': om.MFnData.kDoubleArray, 'vectorArray': om.MFnData.kVectorArray, 'Int32Array': om.MFnData.kIntArray, 'string': om.MFnData.kString}[data_type]
+    attribute = typed_attribute.create(attribute_name, attribute_name, typed_data_type)
+    typed_attribute.array = multi
+    return(attribute)
+
+def set_plug_value_function(modifier, plug, data_type, value):
+    # queues a plug value on the modifier, arrays are handed over as one OpenMaya array data object
+    if data_type == 'doubleArray':
+        modifier.newPlugValue(plug, om.MFnDoubleArrayData().create(om.MDoubleArray(value)))
+    elif data_type == 'vectorArray':
+        modifier.newPlugValue(plug, om.MFnVectorArrayData().create(om.MVectorArray([om.MVector(vector) for vector in value])))
+    elif data_type == 'Int32Array':
+        modifier.newPlugValue(plug, om.MFnIntArrayData().create(om.MIntArray(value)))
+    elif data_type == 'string':
+        modifier.newPlugValueString(plug, value)
+    elif data_type == 'float3':
+        for channel in range(3):
+            modifier.newPlugValueFloat(plug.child(channel), value[channel])
+    else:
+        modifier.newPlugValueDouble(plug, value)
+
+def commit_attribute_batch_function(attribute_batch, undoable=True):
+    # creates the queued attributes and writes the queued values of one shape with a single MDGModifier
+    # undoable runs the modifier inside the oneShaderModifier command so Maya's undo takes the batch back,
+    # otherwise the caller puts the modifier on the undo queue later, see conversion_finish_function
+    # returns the modifier, modifier.undoIt() takes the whole batch back, None for an empty batch
+    if len(attribute_batch['attributes']) == 0 and len(attribute_batch['values']) == 0:
+        return(None)
+    if undoable == False:
+        return(apply_attribute_batch_function(attribute_batch))
+    return(polygon_shaders_to_single_shader_undo.run_undoable_function(lambda: apply_attribute_batch_function(attribute_batch)))
+
+def apply_attribute_batch_function(attribute_batch):
+    # body of commit_attribute_batch_function, values of attributes which do not exist on the shape are skipped
+    # returns the done modifier
+    selection_list = om.MSelectionList()
+    selection_list.add(attribute_batch['shape'])
+    shape_node = selection_list.getDependNode(0)
+    dependency_node = om.MFnDependencyNode(shape_node)
+    modifier = om.MDGModifier()
+    for attribute_name, (data_type, multi) in attribute_batch['attributes'].items():
+        if dependency_node.hasAttribute(attribute_name) == False:
+            modifier.addAttribute(shape_node, new_attribute_function(attribute_name, data_type, multi))
+    # attributes have to exist before their plugs can be written
+    modifier.doIt()
+    for (attribute_name, index), (data_type, value) in attribute_batch['values'].items():
+        if dependency_node.hasAttribute(attribute_name) == False:
+            continue
+        plug = dependency_node.findPlug(attribute_name, False)
+        if index != None:
+            plug = plug.elementByLogicalIndex(index)
+        set_plug_value_function(modifier, plug, data_type, value)
+    modifier.doIt()
+    return(modifier)
+
+def add_attribute_function(parameter_loop, each_parameter_loop, attribute_batch, float_parameter, color_parameter):
     # adds array attributes on the shape nodes from a list of shader parameters of changed values
-    if cmds.attributeQuery('mtoa_uniform_'+each_parameter_loop, node=shape_loop, exists=True) == False and parameter_loop == float_parameter:
-        cmds.addAttr( shape_loop, longName='mtoa_uniform_'+each_parameter_loop, dataType='doubleArray')
-    elif cmds.attributeQuery('mtoa_uniform_'+each_parameter_loop, node=shape_loop, exists=True) == False and parameter_loop == color_parameter and each_parameter_loop!='normalCamera':
-        cmds.addAttr( shape_loop, longName='mtoa_uniform_'+each_parameter_loop, dataType='vectorArray')
+    if parameter_loop == float_parameter:
+        add_batch_attribute_function(attribute_batch, 'mtoa_uniform_'+each_parameter_loop, 'doubleArray')
+    elif parameter_loop == color_parameter and each_parameter_loop!='normalCamera':
+        add_batch_attribute_function(attribute_batch, 'mtoa_uniform_'+each_parameter_loop, 'vectorArray')
     else:
         pass
 
-def add_bump_attribute_function(shader_loop, shape_loop):
+def add_bump_attribute_function(shader_loop, attribute_batch):
     # adds array bump attribute on the shape nodes
-    if cmds.connectionInfo(shader_loop+'.normalCamera', isDestination=True)==True and cmds.attributeQuery('mtoa_uniform_bumpDepth', node=shape_loop, exists=True) == False:
-        cmds.addAttr( shape_loop, longName='mtoa_uniform_bumpDepth', dataType='doubleArray' )
+    if cmds.connectionInfo(shader_loop+'.normalCamera', isDestination=True)==True:
+        add_batch_attribute_function(attribute_batch, 'mtoa_uniform_bumpDepth', 'doubleArray')
 
 def shader_connection_function(all_shader_connections_list):
     # generates a list of shader parameters which have values changed
@@ -122,53 +384,180 @@ def shader_connection_function(all_shader_connections_list):
             pass
     return(shader_connections_list)
 
-def add_texture_path_attribute_function(per_attribute, shape_loop, shader_loop_index):
+def add_texture_path_attribute_function(per_attribute, attribute_batch, shader_loop_index):
     # adds a string compound attribute on shape nodes
-    if cmds.attributeQuery('mtoa_constant_path_'+per_attribute, node=shape_loop, exists=True) == False:
-        cmds.addAttr( shape_loop, longName='mtoa_constant_path_'+per_attribute, dataType='string', multi=True )
-    else:
-        pass
-    cmds.setAttr( str(shape_loop) + '.mtoa_constant_path_'+per_attribute+'['+str(shader_loop_index)+']', '', type='string' )
+    add_batch_attribute_function(attribute_batch, 'mtoa_constant_path_'+per_attribute, 'string', multi=True)
+    set_batch_value_function(attribute_batch, 'mtoa_constant_path_'+per_attribute, 'string', '', shader_loop_index)
+
+def upstream_texture_path_function(upstream_node, texture_path_index):
+    # texture path of the last "file" or "aiImage" node in the history of a node connected to a shader
+    # texture_path_index is a per run dictionary of upstream node -> texture path, each history is walked once
+    # input: node connected to a shader, texture path index
+    if upstream_node not in texture_path_index:
+        texture_path = None
+        texture_plug = None
+        history_list = cmds.listHistory(upstream_node)
+        # two type filtered ls calls instead of a nodeType query per history node
+        file_list = cmds.ls(history_list, type='file') or []
+        aiImage_list = cmds.ls(history_list, type='aiImage') or []
+        for history in history_list:
+            if history in file_list:
+                texture_plug = history+'.fileTextureName'
+            elif history in aiImage_list:
+                texture_plug = history+'.filename'
+        if texture_plug != None:
+            texture_path = get_attribute_function(texture_plug)
+        texture_path_index[upstream_node] = texture_path
+    return(texture_path_index[upstream_node])
 
-def set_texture_path_attribute_function(shader_loop, shape_loop, shader_loop_index):
+def shader_texture_path_function(shader_connections_list, texture_path_index):
+    # a dictionary of texture paths of a shader, shader parameter -> path of the upstream "file" or "aiImage" node
+    # input: list from list_of_shader_connections_function, texture path index
+    texture_path_dictionary = {}
+    for index in range(0, len(shader_connections_list) - 1, 2):
+        strip = shader_connections_list[index][shader_connections_list[index].rfind('.')+1:]
+        texture_path = upstream_texture_path_function(shader_connections_list[index+1], texture_path_index)
+        if texture_path != None:
+            texture_path_dictionary[strip] = texture_path
+    return(texture_path_dictionary)
+
+def set_texture_path_attribute_function(texture_path_dictionary, attribute_batch, shader_loop_index):
     # sets strings of texture paths on pre created string compound attribute
-    if cmds.listConnections(shader_loop, source=True, destination=False) != None:
-        connections_list = cmds.listConnections(shader_loop, source=True, destination=False, connections=True)
-        for each_connection in connections_list:
-            if '.' in each_connection:
-                dot_index = each_connection.rfind('.')
-                strip = each_connection[dot_index+1:]
-                new_connection = cmds.listConnections(each_connection, source=True, destination=False, connections=True)
-                history_list = cmds.listHistory(new_connection[1])
-                for history in history_list:
-                    if cmds.nodeType(history) == 'file':
-                        file_texture_path = cmds.getAttr(history+'.fileTextureName')
-                        cmds.setAttr( str(shape_loop) + '.mtoa_constant_path_'+strip+'['+str(shader_loop_index)+']', file_texture_path, type='string' )
-                    elif cmds.nodeType(history) == 'aiImage':
-                        aiImage_texture_path = cmds.getAttr(history+'.filename')
-                        cmds.setAttr( str(shape_loop) + '.mtoa_constant_path_'+strip+'['+str(shader_loop_index)+']', aiImage_texture_path, type='string' )
-                    else:
-                        pass
-            else:
-                pass
-    else:
+    # input: dictionary from shader_texture_path_function, attribute batch of the shape, shader index
+    for strip in texture_path_dictionary:
+        set_batch_value_function(attribute_batch, 'mtoa_constant_path_'+strip, 'string', texture_path_dictionary[strip], shader_loop_index)
+
+def default_value_cache_path_function():
+    # file of the cached default shader values in the Maya user directory
+    # one file per Maya and MtoA version, defaults can change between versions
+    maya_version = str(cmds.about(version=True))
+    mtoa_version = str(cmds.pluginInfo('mtoa', query=True, version=True))
+    return(os.path.join(cmds.internalVar(userAppDir=True), 'polygon_shaders_to_single_shader_defaults_maya'+maya_version+'_mtoa'+mtoa_version+'.json'))
+
+def shader_default_value_function(all_parameters_dictionary):
+    # default values of all shader parameters, read from a temporary aiStandardSurface which is deleted again
+    default_shader = cmds.createNode('aiStandardSurface', skipSelect=True)
+    try:
+        default_value_dictionary = {}
+        for parameter in all_parameters_dictionary:
+            for each_parameter in all_parameters_dictionary[parameter]:
+                default_value_dictionary[each_parameter] = get_attribute_function(default_shader+'.'+each_parameter)
+    finally:
+        cmds.delete(default_shader)
+    return(default_value_dictionary)
+
+def default_value_function(all_parameters_dictionary):
+    # default values of all shader parameters, cached on disk once per Maya and MtoA version
+    # a missing or unreadable cache, or one without some of the parameters, is read again from a shader and rewritten
+    cache_path = default_value_cache_path_function()
+    default_value_dictionary = {}
+    try:
+        with open(cache_path) as cache_file:
+            # colors are stored as lists, getAttr returns them as a list of one tuple
+            for each_parameter, value in json.load(cache_file).items():
+                default_value_dictionary[each_parameter] = [tuple(value[0])] if isinstance(value, list) else value
+    except (IOError, OSError, ValueError):
         pass
+    
+    missing_parameter_list = [each_parameter for parameter in all_parameters_dictionary for each_parameter in all_parameters_dictionary[parameter] if each_parameter not in default_value_dictionary]
+    if len(missing_parameter_list) > 0:
+        default_value_dictionary = shader_default_value_function(all_parameters_dictionary)
+        try:
+            with open(cache_path, 'w') as cache_file:
+                json.dump(default_value_dictionary, cache_file, indent=4, sort_keys=True)
+        except (IOError, OSError):
+            cmds.warning('Could not cache default shader values in '+cache_path)
+    return(default_value_dictionary)
+
+def shader_info_function(shader_loop, all_parameters_dictionary, default_value_dictionary, texture_path_index):
+    # reads a shader once per run, the result is reused by every shape which uses the shader
+    # returns a dictionary of parameter values, changed parameters, texture connected parameters,
+    # connections, texture paths, bump value and a fingerprint which is equal for identical shaders
+    # input: shader, dictionary of shader parameters, dictionary from default_value_function, texture path index
+    shader_info = {}
+    shader_info['values'] = {}
+    shader_info['changed'] = {}
+    shader_info['textured'] = {}
+    fingerprint_list = []
+    for parameter in all_parameters_dictionary:
+        parameter_list = all_parameters_dictionary[parameter]
+        value_list = [get_attribute_function(shader_loop+'.'+each_parameter) for each_parameter in parameter_list]
+        textured_list = [cmds.connectionInfo(shader_loop+'.'+each_parameter, isExactDestination=True) for each_parameter in parameter_list]
+        # the values of the shader compared against the row of default values in one go
+        changed_list = list(map(operator.ne, value_list, [default_value_dictionary[each_parameter] for each_parameter in parameter_list]))
+        for each_parameter, value, textured, changed in zip(parameter_list, value_list, textured_list, changed_list):
+            shader_info['values'][each_parameter] = value
+            if textured == True:
+                shader_info['textured'].setdefault(parameter,[]).append(each_parameter)
+                fingerprint_list.append((each_parameter, None))
+            else:
+                if changed == True:
+                    shader_info['changed'].setdefault(parameter,[]).append(each_parameter)
+                # values are written rounded to 3 decimals, shaders equal at that precision give equal results
+                if isinstance(value, list):
+                    fingerprint_list.append((each_parameter, tuple(round(channel, 3) for channel in value[0])))
+                else:
+                    fingerprint_list.append((each_parameter, round(value, 3)))
+    shader_info['connections'] = list_of_shader_connections_function(shader_loop)
+    previous_phase = profile_phase_function('texture resolution')
+    shader_info['texture_paths'] = shader_texture_path_function(shader_info['connections'], texture_path_index)
+    profile_phase_function(previous_phase)
+    shader_info['bump'] = shader_bump_value_function(shader_loop)
+    fingerprint_list.append(sorted(shader_connection_function(shader_info['connections'])))
+    fingerprint_list.append(sorted(shader_info['texture_paths'].items()))
+    fingerprint_list.append(shader_info['bump'])
+    shader_info['fingerprint'] = hashlib.md5(repr(fingerprint_list).encode('utf-8')).hexdigest()
+    return(shader_info)
+
+def unique_shader_function(shader_list, face_shader_index_list, shader_info_dictionary):
+    # collapses shaders with the same fingerprint into one shader slot and remaps the face shader index
+    # input: list of shaders on the shape, shader index of every face, dictionary of shader -> shader_info_function
+    unique_shader_list = []
+    fingerprint_list = []
+    shader_slot_list = []
+    for shader in shader_list:
+        fingerprint = shader_info_dictionary[shader]['fingerprint']
+        if fingerprint not in fingerprint_list:
+            fingerprint_list.append(fingerprint)
+            unique_shader_list.append(shader)
+        shader_slot_list.append(fingerprint_list.index(fingerprint))
+    if len(unique_shader_list) == len(shader_list):
+        return(shader_list, face_shader_index_list)
+    return(unique_shader_list, array('i', [shader_slot_list[shader_index] for shader_index in face_shader_index_list]))
+
+def shape_fingerprint_function(shader_list, face_shader_index_list, shader_info_dictionary, palette_mode):
+    # fingerprint of everything a conversion writes on a shape
+    # the hash of the face -> shader slot assignment and the hash of the shader parameters of every slot
+    # input: list of shaders on the shape, shader index of every face, dictionary of shader -> shader_info_function, palette mode
+    assignment_hash = hashlib.md5(face_shader_index_list).hexdigest()
+    shader_fingerprint_list = [shader_info_dictionary[shader]['fingerprint'] for shader in shader_list]
+    shader_hash = hashlib.md5(repr([palette_mode, shader_fingerprint_list]).encode('utf-8')).hexdigest()
+    return(assignment_hash+':'+shader_hash)
 
-def shader_ID_function(face_shader_ID_dictionary):
-    # a list of shader index extracted from face_shader_ID_dictionary
-    shader_ID_list = []
-    for per_ID in face_shader_ID_dictionary:
-        shader_ID_list.append(face_shader_ID_dictionary[per_ID])
-    return(shader_ID_list)
+def stored_fingerprint_function(shape_loop):
+    # fingerprint written on the shape by an earlier conversion, None when the shape was never converted
+    if cmds.attributeQuery(fingerprint_attribute, node=shape_loop, exists=True) == True:
+        return(get_attribute_function(shape_loop+'.'+fingerprint_attribute))
+    return(None)
+
+def sidecar_table_function(attribute_batch):
+    # the values of an attribute batch as a sidecar table, attribute -> (data type, value), without the fingerprint and the source shaders
+    # multi attributes get a dictionary of index -> value as value
+    sidecar_table = collections.OrderedDict()
+    for (attribute_name, index), (data_type, value) in attribute_batch['values'].items():
+        if attribute_name == fingerprint_attribute or attribute_name == source_attribute:
+            continue
+        if index == None:
+            sidecar_table[attribute_name] = (data_type, value)
+        else:
+            sidecar_table.setdefault(attribute_name, (data_type, {}))[1][index] = value
+    return(sidecar_table)
 
-def face_set_attribute_function(shader_list, shape_loop, shader_ID_list):
+def face_set_attribute_function(shader_list, attribute_batch, shader_ID_list):
     # adds an array attribute of face sets/selection from shaders
     if len(shader_list) > 1:
-        if cmds.attributeQuery('mtoa_uniform_face_set', node=shape_loop, exists=True) == False:
-            cmds.addAttr(shape_loop, longName = 'mtoa_uniform_face_set', dataType = 'Int32Array')
-        else:
-            pass
-        cmds.setAttr(str(shape_loop) + '.mtoa_uniform_face_set', shader_ID_list, type='Int32Array')
+        add_batch_attribute_function(attribute_batch, 'mtoa_uniform_face_set', 'Int32Array')
+        set_batch_value_function(attribute_batch, 'mtoa_uniform_face_set', 'Int32Array', shader_ID_list)
 
 def changed_shader_parameter_dictionary_function(changed_shader_parameter_dictionary, all_changed_shader_parameter_dictionary):
     # generates a dictionary of the shader parameters which has change in values or has a texture connection
@@ -185,125 +574,236 @@ def changed_shader_parameter_dictionary_function(changed_shader_parameter_dictio
         changed_shader_parameter_dictionary[key] = non_repeat_shader_parameter_list
     return(changed_shader_parameter_dictionary)
 
-def select_all_faces_function(shape_loop):
-    # a list of all the faces of an object
-    select_all_faces = cmds.select(shape_loop+'.f[*]')
-    get_all_faces = cmds.ls(selection=True, flatten=True)
-    return(get_all_faces)
-
-def per_face_shader_function(per_face_loop):
-    # a list of shaders assigned per face in a sequence
-    per_face_shader_list = []
-    select_each_face = cmds.select(per_face_loop)
-    shader_per_face = cmds.hyperShade(shaderNetworksSelectMaterialNodes = True)
-    select_shader_per_face = cmds.ls(selection=True)
-    per_face_shader_list.append(select_shader_per_face[0])
-    return(per_face_shader_list)
-
-def set_shader_float_values_attribute_function(changed_value_dictionary_float, per_face_shader_list, shape_loop):
+def shader_parameter_table_function(shader_list, parameter_list, shader_info_dictionary):
+    # a table of shaders x parameters from the values read once per run by shader_info_function
+    # returns a dictionary of parameter -> list of values in shader_list order
+    # input: list of shaders on the shape, list of shader parameters, dictionary of shader -> shader_info_function
+    shader_parameter_table = collections.OrderedDict()
+    for parameter in parameter_list:
+        if parameter not in shader_parameter_table:
+            shader_parameter_table[parameter] = [shader_info_dictionary[shader]['values'][parameter] for shader in shader_list]
+    return(shader_parameter_table)
+
+def per_face_value_function(per_shader_value_list, face_shader_index_list):
+    # expands one value per shader to one value per face with a single gather on the face shader index
+    # input: list of values in shader_list order, shader index of every face
+    return([per_shader_value_list[shader_index] for shader_index in face_shader_index_list])
+
+def set_shader_float_values_attribute_function(changed_value_dictionary_float, shader_list, face_shader_index_list, attribute_batch, shader_info_dictionary):
     # sets values inside pre created float shader attributes on shape node
-    for each_float_value in changed_value_dictionary_float:
-        float_value = []
-        for per_face_shader in per_face_shader_list:
-            get_float_value = round(get_attribute_function(per_face_shader+'.'+each_float_value), 3)
-            float_value.append(get_float_value)
-        cmds.setAttr(str(shape_loop) + '.mtoa_uniform_'+each_float_value, float_value, type='doubleArray')
-
-def set_shader_color_values_attribute_function(changed_value_dictionary_color, per_face_shader_list, shape_loop):
+    shader_parameter_table = shader_parameter_table_function(shader_list, changed_value_dictionary_float, shader_info_dictionary)
+    for each_float_value in shader_parameter_table:
+        float_value = [round(value, 3) for value in shader_parameter_table[each_float_value]]
+        set_batch_value_function(attribute_batch, 'mtoa_uniform_'+each_float_value, 'doubleArray', per_face_value_function(float_value, face_shader_index_list))
+
+def set_shader_color_values_attribute_function(changed_value_dictionary_color, shader_list, face_shader_index_list, attribute_batch, shader_info_dictionary):
     # sets values inside pre created color shader attributes on shape node
-    for each_color_value in changed_value_dictionary_color:
-        color_value = []
-        if each_color_value!='normalCamera':
-            for per_face_shader in per_face_shader_list:
-                get_color_value = (round(get_attribute_function(per_face_shader+'.'+each_color_value)[0][0], 3), round(get_attribute_function(per_face_shader+'.'+each_color_value)[0][1], 3), round(cmds.getAttr(per_face_shader+'.'+each_color_value)[0][2], 3))
-                color_value.append(get_color_value)
-            cmds.setAttr(str(shape_loop) + '.mtoa_uniform_'+each_color_value, len(color_value), *color_value, type='vectorArray')
-
-def set_shader_bump_values_attribute_function(per_face_shader_list, shape_loop):
+    color_parameter_list = [each_color_value for each_color_value in changed_value_dictionary_color if each_color_value!='normalCamera']
+    shader_parameter_table = shader_parameter_table_function(shader_list, color_parameter_list, shader_info_dictionary)
+    for each_color_value in shader_parameter_table:
+        color_value = [(round(value[0][0], 3), round(value[0][1], 3), round(value[0][2], 3)) for value in shader_parameter_table[each_color_value]]
+        set_batch_value_function(attribute_batch, 'mtoa_uniform_'+each_color_value, 'vectorArray', per_face_value_function(color_value, face_shader_index_list))
+
+def shader_bump_value_function(shader_loop):
+    # bump depth of a shader from its bump2d or aiBump2d node, 0 when the shader has no bump
+    # input: shader
+    if cmds.connectionInfo(shader_loop+'.normalCamera', isDestination=True)==True:
+        get_bump_node = cmds.listConnections(shader_loop, type='bump2d')
+        if get_bump_node != None:
+            return(round(get_attribute_function(get_bump_node[0]+'.'+'bumpDepth'), 3))
+        get_aiBump_node = cmds.listConnections(shader_loop, type='aiBump2d')
+        if get_aiBump_node != None:
+            return(round(get_attribute_function(get_aiBump_node[0]+'.'+'bumpHeight'), 3))
+    return(0)
+
+def set_shader_bump_values_attribute_function(shader_list, face_shader_index_list, attribute_batch, shader_info_dictionary):
     # sets values inside pre created bump shader attributes on shape node
-    bump_value = []
-    for per_face_shader in per_face_shader_list:
-        if cmds.connectionInfo(per_face_shader+'.normalCamera', isDestination=True)==True and cmds.nodeType(cmds.listConnections(per_face_shader, type='bump2d'))=='bump2d':
-            get_bump_node = cmds.listConnections(per_face_shader, type='bump2d')
-            get_bump_value = round(get_attribute_function(get_bump_node[0]+'.'+'bumpDepth'), 3)
-            bump_value.append(get_bump_value)
-        elif cmds.connectionInfo(per_face_shader+'.normalCamera', isDestination=True)==True and cmds.nodeType(cmds.listConnections(per_face_shader, type='aiBump2d'))=='aiBump2d':
-            get_aiBump_node = cmds.listConnections(per_face_shader, type='aiBump2d')
-            get_aiBump_value = round(get_attribute_function(get_aiBump_node[0]+'.'+'bumpHeight'), 3)
-            bump_value.append(get_aiBump_value)
+    bump_value = [shader_info_dictionary[shader]['bump'] for shader in shader_list]
+    set_batch_value_function(attribute_batch, 'mtoa_uniform_bumpDepth', 'doubleArray', per_face_value_function(bump_value, face_shader_index_list))
+
+def palette_attribute_name_function(parameter, shader_index):
+    # user data name of the value of a parameter for one shader slot, for example baseColor_2
+    return(parameter+'_'+str(shader_index))
+
+def add_palette_attribute_function(attribute_name, attribute_batch, color):
+    # adds a constant attribute holding the value of one shader slot on the shape node
+    # color attributes get R, G and B children
+    if color == True:
+        add_batch_attribute_function(attribute_batch, 'mtoa_constant_'+attribute_name, 'float3')
+    else:
+        add_batch_attribute_function(attribute_batch, 'mtoa_constant_'+attribute_name, 'double')
+
+def set_shader_float_palette_attribute_function(changed_value_dictionary_float, shader_list, attribute_batch, shader_info_dictionary):
+    # sets one value per shader slot for every changed float parameter on the shape node
+    shader_parameter_table = shader_parameter_table_function(shader_list, changed_value_dictionary_float, shader_info_dictionary)
+    for each_float_value in shader_parameter_table:
+        for shader_index in range(len(shader_list)):
+            attribute_name = palette_attribute_name_function(each_float_value, shader_index)
+            add_palette_attribute_function(attribute_name, attribute_batch, False)
+            set_batch_value_function(attribute_batch, 'mtoa_constant_'+attribute_name, 'double', round(shader_parameter_table[each_float_value][shader_index], 3))
+
+def set_shader_color_palette_attribute_function(changed_value_dictionary_color, shader_list, attribute_batch, shader_info_dictionary):
+    # sets one value per shader slot for every changed color parameter on the shape node
+    color_parameter_list = [each_color_value for each_color_value in changed_value_dictionary_color if each_color_value!='normalCamera']
+    shader_parameter_table = shader_parameter_table_function(shader_list, color_parameter_list, shader_info_dictionary)
+    for each_color_value in shader_parameter_table:
+        for shader_index in range(len(shader_list)):
+            attribute_name = palette_attribute_name_function(each_color_value, shader_index)
+            color_value = shader_parameter_table[each_color_value][shader_index]
+            add_palette_attribute_function(attribute_name, attribute_batch, True)
+            set_batch_value_function(attribute_batch, 'mtoa_constant_'+attribute_name, 'float3', (round(color_value[0][0], 3), round(color_value[0][1], 3), round(color_value[0][2], 3)))
+
+def set_shader_bump_palette_attribute_function(shader_list, attribute_batch, shader_info_dictionary):
+    # sets one bump depth per shader slot on the shape node
+    for shader_index in range(len(shader_list)):
+        attribute_name = palette_attribute_name_function('bumpDepth', shader_index)
+        add_palette_attribute_function(attribute_name, attribute_batch, False)
+        set_batch_value_function(attribute_batch, 'mtoa_constant_'+attribute_name, 'double', shader_info_dictionary[shader_list[shader_index]]['bump'])
+
+def user_data_node_function(shader_name, attribute_name, user_data_type, default_value):
+    # creates an aiUserDataColor or aiUserDataFloat node reading a shape attribute and returns its output plug
+    user_data = cmds.shadingNode(user_data_type, n=shader_name+"_"+attribute_name+'_'+user_data_type+'1', asUtility=True)
+    cmds.setAttr(user_data+'.attribute', attribute_name, type='string')
+    if user_data_type == 'aiUserDataColor':
+        cmds.setAttr(user_data+'.default', default_value[0][0], default_value[0][1], default_value[0][2])
+        return(user_data+'.outColor')
+    cmds.setAttr(user_data+'.default', default_value)
+    return(user_data+'.outValue')
+
+def palette_switch_function(shader_name, parameter, user_data_type, default_value, palette_size, face_set_plug):
+    # creates an aiSwitch which picks the value of the shader slot of each face through the face_set index
+    # returns the output plug of the switch
+    switch_node = cmds.shadingNode('aiSwitch', n=shader_name+"_"+parameter+'_aiSwitch1', asUtility=True)
+    cmds.connectAttr(face_set_plug, switch_node+'.index')
+    for shader_index in range(palette_size):
+        user_data_plug = user_data_node_function(shader_name, palette_attribute_name_function(parameter, shader_index), user_data_type, default_value)
+        if user_data_type == 'aiUserDataColor':
+            cmds.connectAttr(user_data_plug, switch_node+'.input'+str(shader_index))
         else:
-            bump_value.append(0)
-        cmds.setAttr(str(shape_loop) + '.mtoa_uniform_bumpDepth', bump_value, type='doubleArray')
+            cmds.connectAttr(user_data_plug, switch_node+'.input'+str(shader_index)+'R')
+    if user_data_type == 'aiUserDataColor':
+        return(switch_node+'.outColor')
+    return(switch_node+'.outColorR')
 
-def main_shader_function(all_texture_path_shader_parameter_dictionary_color, all_texture_path_shader_parameter_dictionary_float, all_changed_shader_parameter_dictionary_color, all_changed_shader_parameter_dictionary_float, test_shader, main_shader):
+def main_shader_function(all_texture_path_shader_parameter_dictionary_color, all_texture_path_shader_parameter_dictionary_float, all_changed_shader_parameter_dictionary_color, all_changed_shader_parameter_dictionary_float, default_value_dictionary, main_shader, shader_name, palette_size=0):
     # creates a shader only from the parameters which has changed values or texture conections
+    # the user data nodes fall back to the default values of the parameters
+    # palette_size is the number of shader slots stored per shape in palette mode, 0 reads per face values
     
     # create and connect an aiImage node which contains tokens to access color texture path from shape attribute
     for each_color_path in all_texture_path_shader_parameter_dictionary_color:
         if each_color_path!='normalCamera':
-            texture_color_file = cmds.shadingNode('aiImage', n=cmds.textFieldButtonGrp( "shader_name", query=True, text=True )+"_"+each_color_path+'_aiImage1', asTexture=True)
+            texture_color_file = cmds.shadingNode('aiImage', n=shader_name+"_"+each_color_path+'_aiImage1', asTexture=True)
             cmds.setAttr(texture_color_file+'.filename', '<attr:path_'+each_color_path+' index:face_set>', type='string')
             cmds.connectAttr(texture_color_file+'.outColor', main_shader+'.'+each_color_path)
     
     # create and connect an aiImage node which contains tokens to access scalar texture path from shape attribute
     for each_float_path in all_texture_path_shader_parameter_dictionary_float:
-        texture_scalar_file = cmds.shadingNode('aiImage', n=cmds.textFieldButtonGrp( "shader_name", query=True, text=True )+"_"+each_float_path+'_aiImage1', asTexture=True)
+        texture_scalar_file = cmds.shadingNode('aiImage', n=shader_name+"_"+each_float_path+'_aiImage1', asTexture=True)
         cmds.setAttr(texture_scalar_file+'.filename', '<attr:path_'+each_float_path+' index:face_set>', type='string')
         cmds.connectAttr(texture_scalar_file+'.outColorR', main_shader+'.'+each_float_path)
     
+    # in palette mode every value is picked from its shader slot with the face_set index
+    if palette_size > 0:
+        face_set_node = cmds.shadingNode('aiUserDataInt', n=shader_name+'_face_set_aiUserDataInt1', asUtility=True)
+        cmds.setAttr(face_set_node+'.attribute', 'face_set', type='string')
+        face_set_plug = face_set_node+'.outValue'
+    
     # create and connect a user data color node which contains all the changed values of color shader parameters
     for each_color_parameter in all_changed_shader_parameter_dictionary_color:
         if each_color_parameter!='normalCamera':
-            user_data_color = cmds.shadingNode('aiUserDataColor', n=cmds.textFieldButtonGrp( "shader_name", query=True, text=True )+"_"+each_color_parameter+'_aiUserDataColor1', asUtility=True)
-            cmds.setAttr(user_data_color+'.attribute', each_color_parameter, type='string')
-            cmds.setAttr(user_data_color+'.default', get_attribute_function(test_shader+'.'+each_color_parameter)[0][0], get_attribute_function(test_shader+'.'+each_color_parameter)[0][1], get_attribute_function(test_shader+'.'+each_color_parameter)[0][2])
-            if cmds.connectionInfo(main_shader+'.'+each_color_parameter, sourceFromDestination=True)=="":
-                cmds.connectAttr(user_data_color+'.outColor', main_shader+'.'+each_color_parameter)
+            default_value = default_value_dictionary[each_color_parameter]
+            if palette_size > 0:
+                user_data_color_plug = palette_switch_function(shader_name, each_color_parameter, 'aiUserDataColor', default_value, palette_size, face_set_plug)
             else:
-                cmds.connectAttr(user_data_color+'.outColor', texture_color_file+'.missingTextureColor')
+                user_data_color_plug = user_data_node_function(shader_name, each_color_parameter, 'aiUserDataColor', default_value)
+            texture_color_plug = cmds.connectionInfo(main_shader+'.'+each_color_parameter, sourceFromDestination=True)
+            if texture_color_plug=="":
+                cmds.connectAttr(user_data_color_plug, main_shader+'.'+each_color_parameter)
+            else:
+                cmds.connectAttr(user_data_color_plug, texture_color_plug.split('.')[0]+'.missingTextureColor')
     
     # create and connect a user data float node which contains all the changed values of float shader parameters
     for each_float_parameter in all_changed_shader_parameter_dictionary_float:
-        user_data_float = cmds.shadingNode('aiUserDataFloat', n=cmds.textFieldButtonGrp( "shader_name", query=True, text=True )+"_"+each_float_parameter+'_aiUserDataFloat1', asUtility=True)
-        cmds.setAttr(user_data_float+'.attribute', each_float_parameter, type='string')
-        cmds.setAttr(user_data_float+'.default', get_attribute_function(test_shader+'.'+each_float_parameter))
-        if cmds.connectionInfo(main_shader+'.'+each_float_parameter, sourceFromDestination=True)=="":
-            cmds.connectAttr(user_data_float+'.outValue', main_shader+'.'+each_float_parameter)
+        default_value = default_value_dictionary[each_float_parameter]
+        if palette_size > 0:
+            user_data_float_plug = palette_switch_function(shader_name, each_float_parameter, 'aiUserDataFloat', default_value, palette_size, face_set_plug)
+        else:
+            user_data_float_plug = user_data_node_function(shader_name, each_float_parameter, 'aiUserDataFloat', default_value)
+        texture_scalar_plug = cmds.connectionInfo(main_shader+'.'+each_float_parameter, sourceFromDestination=True)
+        if texture_scalar_plug=="":
+            cmds.connectAttr(user_data_float_plug, main_shader+'.'+each_float_parameter)
         else:
-            cmds.connectAttr(user_data_float+'.outValue', texture_scalar_file+'.missingTextureColorR')
-            cmds.connectAttr(user_data_float+'.outValue', texture_scalar_file+'.missingTextureColorG')
-            cmds.connectAttr(user_data_float+'.outValue', texture_scalar_file+'.missingTextureColorB')
+            texture_scalar_file = texture_scalar_plug.split('.')[0]
+            cmds.connectAttr(user_data_float_plug, texture_scalar_file+'.missingTextureColorR')
+            cmds.connectAttr(user_data_float_plug, texture_scalar_file+'.missingTextureColorG')
+            cmds.connectAttr(user_data_float_plug, texture_scalar_file+'.missingTextureColorB')
     
     # create and connect bump nodes
-    if 'normalCamera' in all_changed_shader_parameter_dictionary_color:
-        cmds.shadingNode('aiImage', n=cmds.textFieldButtonGrp( "shader_name", query=True, text=True )+'_normalCamera_aiImage1', asTexture=True)
-        cmds.setAttr('normalCamera_aiImage1.filename', '<attr:path_normalCamera index:face_set>', type='string')
-        cmds.shadingNode('aiBump2d', n=cmds.textFieldButtonGrp( "shader_name", query=True, text=True )+'_normalCamera_aiBump2d1', asUtility=True)
-        cmds.connectAttr('normalCamera_aiImage1.outColorR', 'normalCamera_aiBump2d1.bumpMap')
-        cmds.connectAttr('normalCamera_aiBump2d1.outValue', main_shader+'.normalCamera')
-        cmds.shadingNode('aiUserDataFloat', n=cmds.textFieldButtonGrp( "shader_name", query=True, text=True )+'_bumpDepth_aiUserDataFloat1', asUtility=True)
-        cmds.connectAttr('bumpDepth_aiUserDataFloat1.outValue', 'normalCamera_aiBump2d1.bumpHeight')
-        cmds.setAttr('bumpDepth_aiUserDataFloat1.attribute', 'bumpDepth', type='string')
-        cmds.setAttr('bumpDepth_aiUserDataFloat1.default', 0)
-
-def shader_assignment_function(multiple_shader_object_list, main_shader, test_shader):
+    if 'normalCamera' in all_texture_path_shader_parameter_dictionary_color:
+        texture_bump_file = cmds.shadingNode('aiImage', n=shader_name+'_normalCamera_aiImage1', asTexture=True)
+        cmds.setAttr(texture_bump_file+'.filename', '<attr:path_normalCamera index:face_set>', type='string')
+        bump_node = cmds.shadingNode('aiBump2d', n=shader_name+'_normalCamera_aiBump2d1', asUtility=True)
+        cmds.connectAttr(texture_bump_file+'.outColorR', bump_node+'.bumpMap')
+        cmds.connectAttr(bump_node+'.outValue', main_shader+'.normalCamera')
+        if palette_size > 0:
+            user_data_bump_plug = palette_switch_function(shader_name, 'bumpDepth', 'aiUserDataFloat', 0, palette_size, face_set_plug)
+        else:
+            user_data_bump_plug = user_data_node_function(shader_name, 'bumpDepth', 'aiUserDataFloat', 0)
+        cmds.connectAttr(user_data_bump_plug, bump_node+'.bumpHeight')
+
+def shader_assignment_function(multiple_shader_object_list, main_shader):
     # shader assignment only on objects which has multiple shaders per object
     cmds.select(multiple_shader_object_list)
     
     # shader assignment
     cmds.hyperShade(assign=main_shader)
     
-    # delete test shader
-    cmds.delete(test_shader)
-    
     # select objects on viewport which has shader assignments
     cmds.select(multiple_shader_object_list)
 
 
 
 def main_function():
-    # main function
+    # main function, converts the viewport selection with the shader name and options from the UI
     viewport_selection = selection_list_function()
+    shader_name = cmds.textFieldButtonGrp( "shader_name", query=True, text=True )
+    palette_mode = cmds.checkBox( "palette_mode", query=True, value=True )
+    return(convert_function(viewport_selection, shader_name, palette_mode))
+
+def convert_function(viewport_selection, shader_name, palette_mode=False, incremental=True, profile_path=None, sidecar_path=None):
+    # converts per face shader assignments of the given objects to one shader, without any UI
+    # palette mode stores values once per shader slot instead of once per face
+    # incremental skips the attribute writes of shapes whose fingerprint did not change since the last conversion
+    # profile_path writes a JSON report of the time per phase and the maya.cmds calls per command and per shape
+    # sidecar_path writes the tables of every converted shape to a binary sidecar file, unchanged shapes included
+    # the whole run is one undo chunk and the viewport does not refresh while it runs
+    # input: list of objects, name of the new shader, palette mode, incremental, profile path, sidecar path
+    # returns a summary dictionary of the conversion
+    if profile_path != None:
+        profile_start_function()
+    summary = None
+    interactive = cmds.about(batch=True) == False
+    cmds.undoInfo(openChunk=True, chunkName='polygon_shaders_to_single_shader')
+    if interactive == True:
+        cmds.refresh(suspend=True)
+    try:
+        summary = convert_objects_function(viewport_selection, shader_name, palette_mode, incremental, sidecar_path)
+        return(summary)
+    finally:
+        if interactive == True:
+            cmds.refresh(suspend=False)
+        cmds.undoInfo(closeChunk=True)
+        if profile_path != None:
+            profile_report_function(profile_path, summary)
+
+def conversion_start_function(viewport_selection, shader_name, palette_mode, incremental, rollback=False, sidecar_path=None):
+    # reads what every shape of a conversion needs and returns the state of the conversion
+    # the state is a dictionary, conversion_step_function converts its shapes one at a time
+    # rollback keeps the modifier of every shape so conversion_cancel_function can take the writes back,
+    # conversion_finish_function then puts all of them on Maya's undo queue as one command
+    # sidecar_path collects the tables of every shape for the sidecar file written by conversion_finish_function
+    # input: list of objects, name of the new shader, palette mode, incremental, rollback, sidecar path
     
     # List of required shader attributes stored in dictionary
     float_parameters = ['base', 'diffuseRoughness', 'specular', 'specularRoughness', 'specularIOR', 'specularAnisotropy', 'specularRotation', 
@@ -318,10 +818,6 @@ def main_function():
     all_parameters = [float_parameters, color_parameters]
     all_parameters_dictionary = {name:parameter for name, parameter in zip(parameter_name, all_parameters)}
     
-    # A test shader to get all default shader values
-    if cmds.objExists( 'test_SHD' ) == 0:
-        test_shader = cmds.createNode('aiStandardSurface', n='test_SHD')
-    
     all_changed_shader_parameter_dictionary = {}
     all_changed_shader_parameter_dictionary['float_parameters'] = []
     all_changed_shader_parameter_dictionary['color_parameters'] = []
@@ -331,89 +827,346 @@ def main_function():
     all_texture_path_shader_parameter_dictionary['color_parameters'] = []
     
     multiple_shader_object_list = []
+    unchanged_object_list = []
     
-    for shape in range(len(shape_list_function(viewport_selection))):
-        print('object_name: '+viewport_selection[shape]+' | '+'object_number: '+str(shape+1)+'/'+str(len(viewport_selection))+' | '+'progress: '+str(float((shape+1))/len(viewport_selection)*100)+'%')
-        all_shader_connections_list = []
-        face_shader_ID_dictionary = {}
-        shader_parameter_connections_list = []
-        changed_shader_parameter_dictionary = {}
-        texture_path_shader_parameter_dictionary = {}
-        selection_function(shape_list_function(viewport_selection)[shape])
-        per_object_shader_list_function()
-        shader_list = selection_list_function()
-        
-        for shader in range(len(shader_list)):
-            selection_function(shader_list[shader])
-            faces_selection = faces_per_shader_function(viewport_selection[shape], shape_list_function(viewport_selection)[shape])
-            all_shader_connections_list.extend(list_of_shader_connections_function(shader_list[shader]))
-            for face in range(len(faces_selection)):
-                face_shader_ID_dictionary[face_ID_function(faces_selection[face])] = shader
-            if len(shader_list) > 1:
-                for parameter in all_parameters_dictionary:
-                    for each_parameter in all_parameters_dictionary[parameter]:
-                        if get_attribute_function(str(test_shader)+'.'+each_parameter) != get_attribute_function(shader_list[shader]+'.'+each_parameter):
-                            if cmds.connectionInfo(shader_list[shader]+'.'+each_parameter, isExactDestination=True) == False:
-                                changed_shader_parameter_dictionary.setdefault(parameter,[]).append(each_parameter)
-                                add_attribute_function(parameter, each_parameter, shape_list_function(viewport_selection)[shape], parameter_name[0], parameter_name[1])
-                                
-                        if cmds.connectionInfo(shader_list[shader]+'.'+each_parameter, isExactDestination=True) == True:
-                            texture_path_shader_parameter_dictionary.setdefault(parameter,[]).append(each_parameter)
-                            add_bump_attribute_function(shader_list[shader], shape_list_function(viewport_selection)[shape])
-        
-        shader_parameter_connections_list.extend(shader_connection_function(all_shader_connections_list))
-        
-        for shader in range(len(shader_list)):
-            if len(shader_list) > 1:
-                for per_attribute in shader_parameter_connections_list:
-                    add_texture_path_attribute_function(per_attribute, shape_list_function(viewport_selection)[shape], shader)
-                
-                set_texture_path_attribute_function(shader_list[shader], shape_list_function(viewport_selection)[shape], shader)
+    shape_list = shape_list_function(viewport_selection) or []
     
-        shader_ID_list = []
-        shader_ID_list.extend(shader_ID_function(face_shader_ID_dictionary))
-        
-        face_set_attribute_function(shader_list, shape_list_function(viewport_selection)[shape], shader_ID_list)
-        
-        changed_shader_parameter_dictionary_function(changed_shader_parameter_dictionary, all_changed_shader_parameter_dictionary)
-        
-        changed_shader_parameter_dictionary_function(texture_path_shader_parameter_dictionary, all_texture_path_shader_parameter_dictionary)
+    # face assignments of every shading engine used by the selection, indexed once for the whole run
+    profile_phase_function('face mapping')
+    assignment_index = shader_assignment_index_function(shape_list)
+    
+    # shapes converted before are on a combined shader, their source shaders and face sets are read back from the shape
+    converted_source_dictionary = {}
+    for shape_loop in shape_list:
+        converted_source = converted_source_function(shape_loop, assignment_index)
+        if converted_source != None:
+            converted_source_dictionary[shape_loop] = converted_source
+    profile_phase_function('discovery')
+    
+    # an aiSwitch has a limited number of inputs, shapes with more shaders need per face values
+    palette_size = 0
+    if palette_mode == True:
+        shader_count_list = [(shape_long_name, len(assignment_index.get(shape_long_name, {}))) for shape_long_name in cmds.ls(shape_list, long=True)]
+        shader_count_list.extend((shape_loop, len(converted_source[0])) for shape_loop, converted_source in converted_source_dictionary.items())
+        for shape_long_name, shader_count in shader_count_list:
+            if shader_count > palette_size_limit:
+                cmds.warning(shape_long_name+' has more than '+str(palette_size_limit)+' shaders, storing values per face instead of per shader')
+                palette_mode = False
+                break
+    
+    # every shader is read and fingerprinted once per run and reused by all shapes which use it
+    profile_phase_function('parameter diffing')
+    default_value_dictionary = default_value_function(all_parameters_dictionary)
+    shader_info_dictionary = {}
+    texture_path_index = {}
+    
+    conversion = {}
+    conversion['viewport_selection'] = viewport_selection
+    conversion['shader_name'] = shader_name
+    conversion['palette_mode'] = palette_mode
+    conversion['incremental'] = incremental
+    conversion['rollback'] = rollback
+    conversion['sidecar_path'] = sidecar_path
+    conversion['sidecar_tables'] = collections.OrderedDict()
+    conversion['parameter_name'] = parameter_name
+    conversion['all_parameters_dictionary'] = all_parameters_dictionary
+    conversion['all_changed_shader_parameter_dictionary'] = all_changed_shader_parameter_dictionary
+    conversion['all_texture_path_shader_parameter_dictionary'] = all_texture_path_shader_parameter_dictionary
+    conversion['multiple_shader_object_list'] = multiple_shader_object_list
+    conversion['unchanged_object_list'] = unchanged_object_list
+    conversion['shape_list'] = shape_list
+    conversion['assignment_index'] = assignment_index
+    conversion['converted_source_dictionary'] = converted_source_dictionary
+    conversion['palette_size'] = palette_size
+    conversion['default_value_dictionary'] = default_value_dictionary
+    conversion['shader_info_dictionary'] = shader_info_dictionary
+    conversion['texture_path_index'] = texture_path_index
+    # next shape to convert, faces converted so far and the modifiers of committed attribute batches
+    conversion['shape_index'] = 0
+    conversion['face_count'] = 0
+    conversion['attribute_modifier_list'] = []
+    return(conversion)
+
+def conversion_step_function(conversion):
+    # converts the next shape of a conversion, one resumable unit of work
+    # attributes and values of the shape are collected in an attribute batch and committed at once
+    # unchanged shapes still take part in building the combined shader, only their attribute writes are skipped
+    # returns True while shapes are left
+    shape = conversion['shape_index']
+    shape_list = conversion['shape_list']
+    if shape >= len(shape_list):
+        return(False)
+    palette_mode = conversion['palette_mode']
+    incremental = conversion['incremental']
+    parameter_name = conversion['parameter_name']
+    all_parameters_dictionary = conversion['all_parameters_dictionary']
+    all_changed_shader_parameter_dictionary = conversion['all_changed_shader_parameter_dictionary']
+    all_texture_path_shader_parameter_dictionary = conversion['all_texture_path_shader_parameter_dictionary']
+    multiple_shader_object_list = conversion['multiple_shader_object_list']
+    unchanged_object_list = conversion['unchanged_object_list']
+    assignment_index = conversion['assignment_index']
+    palette_size = conversion['palette_size']
+    default_value_dictionary = conversion['default_value_dictionary']
+    shader_info_dictionary = conversion['shader_info_dictionary']
+    texture_path_index = conversion['texture_path_index']
+    
+    print('object_name: '+shape_list[shape]+' | '+'object_number: '+str(shape+1)+'/'+str(len(shape_list))+' | '+'progress: '+str(float((shape+1))/len(shape_list)*100)+'%')
+    all_shader_connections_list = []
+    shader_parameter_connections_list = []
+    changed_shader_parameter_dictionary = {}
+    texture_path_shader_parameter_dictionary = {}
+    attribute_batch = attribute_batch_function(shape_list[shape])
+    profile_shape_function(shape_list[shape])
     
+    # shaders of the shape and the shader index of every face
+    profile_phase_function('face mapping')
+    if shape_list[shape] in conversion['converted_source_dictionary']:
+        shader_list, face_shader_index_list = conversion['converted_source_dictionary'][shape_list[shape]]
+    else:
+        shader_list, face_shader_index_list = face_shader_index_function(shape_list[shape], assignment_index)
+    profile_phase_function('parameter diffing')
+    
+    for shader in shader_list:
+        if shader not in shader_info_dictionary:
+            shader_info_dictionary[shader] = shader_info_function(shader, all_parameters_dictionary, default_value_dictionary, texture_path_index)
+    
+    # identical shaders share one shader slot
+    shader_list, face_shader_index_list = unique_shader_function(shader_list, face_shader_index_list, shader_info_dictionary)
+    
+    # the attributes on the shape are still valid when the fingerprint of the last conversion matches
+    shape_fingerprint = shape_fingerprint_function(shader_list, face_shader_index_list, shader_info_dictionary, palette_mode)
+    shape_changed = incremental == False or len(shader_list) < 2 or stored_fingerprint_function(shape_list[shape]) != shape_fingerprint
+    # the sidecar needs the tables of unchanged shapes too, they are collected but not written on the shape
+    collect_values = shape_changed == True or conversion['sidecar_path'] != None
+    
+    for shader in range(len(shader_list)):
+        shader_info = shader_info_dictionary[shader_list[shader]]
+        all_shader_connections_list.extend(shader_info['connections'])
         if len(shader_list) > 1:
-            get_all_faces = select_all_faces_function(shape_list_function(viewport_selection)[shape])
-            per_face_shader_list = []
-            
-            for each_face in get_all_faces:
-                per_face_shader_list.extend(per_face_shader_function(each_face))
+            for parameter in all_parameters_dictionary:
+                for each_parameter in shader_info['changed'].get(parameter, []):
+                    changed_shader_parameter_dictionary.setdefault(parameter,[]).append(each_parameter)
+                    if palette_mode == False and collect_values == True:
+                        add_attribute_function(parameter, each_parameter, attribute_batch, parameter_name[0], parameter_name[1])
                 
+                for each_parameter in shader_info['textured'].get(parameter, []):
+                    texture_path_shader_parameter_dictionary.setdefault(parameter,[]).append(each_parameter)
+                    if palette_mode == False and collect_values == True:
+                        add_bump_attribute_function(shader_list[shader], attribute_batch)
+    
+    shader_parameter_connections_list.extend(shader_connection_function(all_shader_connections_list))
+    
+    profile_phase_function('attribute write')
+    
+    for shader in range(len(shader_list)):
+        if len(shader_list) > 1 and collect_values == True:
+            for per_attribute in shader_parameter_connections_list:
+                add_texture_path_attribute_function(per_attribute, attribute_batch, shader)
+            
+            set_texture_path_attribute_function(shader_info_dictionary[shader_list[shader]]['texture_paths'], attribute_batch, shader)
+
+    if collect_values == True:
+        face_set_attribute_function(shader_list, attribute_batch, face_shader_index_list)
+    
+    changed_shader_parameter_dictionary_function(changed_shader_parameter_dictionary, all_changed_shader_parameter_dictionary)
+    
+    changed_shader_parameter_dictionary_function(texture_path_shader_parameter_dictionary, all_texture_path_shader_parameter_dictionary)
+
+    if len(shader_list) > 1:
+        if palette_mode == True:
+            palette_size = max(palette_size, len(shader_list))
+        
+        if collect_values == False:
+            pass
+        elif palette_mode == True:
             try:
-                set_shader_float_values_attribute_function(changed_shader_parameter_dictionary['float_parameters'], per_face_shader_list, shape_list_function(viewport_selection)[shape])
+                set_shader_float_palette_attribute_function(changed_shader_parameter_dictionary['float_parameters'], shader_list, attribute_batch, shader_info_dictionary)
             except:
                 pass
             try:
-                set_shader_color_values_attribute_function(changed_shader_parameter_dictionary['color_parameters'], per_face_shader_list, shape_list_function(viewport_selection)[shape])
+                set_shader_color_palette_attribute_function(changed_shader_parameter_dictionary['color_parameters'], shader_list, attribute_batch, shader_info_dictionary)
             except:
                 pass
+            if 'normalCamera' in texture_path_shader_parameter_dictionary.get('color_parameters', []):
+                set_shader_bump_palette_attribute_function(shader_list, attribute_batch, shader_info_dictionary)
+        else:
             try:
-                set_shader_bump_values_attribute_function(per_face_shader_list, shape_list_function(viewport_selection)[shape])
+                set_shader_float_values_attribute_function(changed_shader_parameter_dictionary['float_parameters'], shader_list, face_shader_index_list, attribute_batch, shader_info_dictionary)
             except:
                 pass
-            
-            multiple_shader_object = cmds.listRelatives(shape_list_function(viewport_selection)[shape], parent=True)[0]
-            multiple_shader_object_list.append(multiple_shader_object)
-            
+            try:
+                set_shader_color_values_attribute_function(changed_shader_parameter_dictionary['color_parameters'], shader_list, face_shader_index_list, attribute_batch, shader_info_dictionary)
+            except:
+                pass
+            try:
+                set_shader_bump_values_attribute_function(shader_list, face_shader_index_list, attribute_batch, shader_info_dictionary)
+            except:
+                pass
+        
+        multiple_shader_object = cmds.listRelatives(shape_list[shape], parent=True)[0]
+        multiple_shader_object_list.append(multiple_shader_object)
+        
+        if shape_changed == True:
+            add_batch_attribute_function(attribute_batch, fingerprint_attribute, 'string')
+            set_batch_value_function(attribute_batch, fingerprint_attribute, 'string', shape_fingerprint)
+            add_batch_attribute_function(attribute_batch, source_attribute, 'string')
+            set_batch_value_function(attribute_batch, source_attribute, 'string', json.dumps(shader_list))
         else:
-            pass
+            unchanged_object_list.append(multiple_shader_object)
+        
+    else:
+        pass
+    
+    if conversion['sidecar_path'] != None and len(attribute_batch['values']) > 0:
+        conversion['sidecar_tables'][cmds.ls(shape_list[shape], long=True)[0]] = sidecar_table_function(attribute_batch)
     
-    main_shader = cmds.shadingNode('aiStandardSurface', n=cmds.textFieldButtonGrp( "shader_name", query=True, text=True ), asShader=True)
+    attribute_modifier = None
+    if shape_changed == True:
+        attribute_modifier = commit_attribute_batch_function(attribute_batch, conversion['rollback'] == False)
+    if conversion['rollback'] == True and attribute_modifier != None:
+        conversion['attribute_modifier_list'].append(attribute_modifier)
+    
+    conversion['palette_size'] = palette_size
+    conversion['face_count'] += len(face_shader_index_list)
+    conversion['shape_index'] = shape + 1
+    return(conversion['shape_index'] < len(shape_list))
+
+def conversion_finish_function(conversion):
+    # builds the combined shader from the converted shapes, assigns it and returns the summary of the conversion
+    # the attribute writes kept by a rollback conversion go on Maya's undo queue first as one oneShaderModifier command
+    shader_name = conversion['shader_name']
+    all_changed_shader_parameter_dictionary = conversion['all_changed_shader_parameter_dictionary']
+    all_texture_path_shader_parameter_dictionary = conversion['all_texture_path_shader_parameter_dictionary']
+    multiple_shader_object_list = conversion['multiple_shader_object_list']
+    palette_size = conversion['palette_size']
     
-    main_shader_function(all_texture_path_shader_parameter_dictionary['color_parameters'], all_texture_path_shader_parameter_dictionary['float_parameters'], all_changed_shader_parameter_dictionary['color_parameters'], all_changed_shader_parameter_dictionary['float_parameters'], test_shader, main_shader)
+    profile_shape_function(None)
     
-    shader_assignment_function(multiple_shader_object_list, main_shader, test_shader)
+    attribute_modifier_list = conversion['attribute_modifier_list']
+    if len(attribute_modifier_list) > 0:
+        polygon_shaders_to_single_shader_undo.run_undoable_function(lambda: polygon_shaders_to_single_shader_undo.ModifierGroup(attribute_modifier_list))
+        conversion['attribute_modifier_list'] = []
+    
+    profile_phase_function('network build')
+    
+    summary = {}
+    summary['objects'] = len(conversion['shape_list'])
+    summary['converted_objects'] = multiple_shader_object_list
+    summary['unchanged_objects'] = conversion['unchanged_object_list']
+    summary['palette_size'] = palette_size
+    summary['shader'] = None
+    summary['sidecar'] = None
+    
+    # nothing to combine, do not leave an empty shader behind
+    if len(multiple_shader_object_list) == 0:
+        return(summary)
+    
+    if conversion['sidecar_path'] != None:
+        # imported here, the sidecar module is only needed when a sidecar is asked for
+        import polygon_shaders_to_single_shader_sidecar
+        sidecar_metadata = {'shader': shader_name, 'palette_mode': conversion['palette_mode'], 'palette_size': palette_size}
+        summary['sidecar'] = polygon_shaders_to_single_shader_sidecar.write_sidecar(conversion['sidecar_path'], conversion['sidecar_tables'], sidecar_metadata)
+    
+    main_shader = cmds.shadingNode('aiStandardSurface', n=shader_name, asShader=True)
+    # the next conversion of the objects recognises the combined shader and reads their source shaders back
+    cmds.addAttr(main_shader, longName=combined_shader_attribute, attributeType='bool', defaultValue=True)
+    
+    main_shader_function(all_texture_path_shader_parameter_dictionary['color_parameters'], all_texture_path_shader_parameter_dictionary['float_parameters'], all_changed_shader_parameter_dictionary['color_parameters'], all_changed_shader_parameter_dictionary['float_parameters'], conversion['default_value_dictionary'], main_shader, shader_name, palette_size)
+    
+    shader_assignment_function(multiple_shader_object_list, main_shader)
+    
+    summary['shader'] = main_shader
+    return(summary)
+
+def conversion_cancel_function(conversion):
+    # takes back the attribute writes of the shapes converted so far
+    # only conversions started with rollback keep the writes to take back
+    for attribute_modifier in reversed(conversion['attribute_modifier_list']):
+        attribute_modifier.undoIt()
+    conversion['attribute_modifier_list'] = []
+
+def convert_objects_function(viewport_selection, shader_name, palette_mode, incremental, sidecar_path=None):
+    # body of convert_function, converts every shape in one go
+    conversion = conversion_start_function(viewport_selection, shader_name, palette_mode, incremental, sidecar_path=sidecar_path)
+    while conversion_step_function(conversion) == True:
+        pass
+    return(conversion_finish_function(conversion))
+
+def ui_progress_function(label, progress, max_value=None):
+    # updates the progress bar and the progress text of the UI when the window is open
+    if cmds.progressBar( "one_shader_progress", exists=True ) == True:
+        if max_value != None:
+            cmds.progressBar( "one_shader_progress", edit=True, maxValue=max(1, max_value) )
+        cmds.progressBar( "one_shader_progress", edit=True, progress=progress )
+        cmds.text( "one_shader_rate", edit=True, label=label )
+
+def ui_conversion_rate_function(conversion):
+    # progress text of a conversion, objects and faces converted per second
+    seconds = max(time.time() - conversion['start_time'], 0.001)
+    return(str(conversion['shape_index'])+'/'+str(len(conversion['shape_list']))+' objects | '+str(round(conversion['shape_index']/seconds, 1))+' objects/s | '+str(int(conversion['face_count']/seconds))+' faces/s')
+
+def ui_conversion_start_function():
+    # converts the viewport selection with the shader name and options from the UI without blocking Maya
+    # every shape is one unit of work, ui_conversion_chunk_function converts them in idle time chunks
+    global ui_conversion
+    if ui_conversion != None:
+        cmds.warning('A conversion is already running, cancel it first')
+        return
+    viewport_selection = selection_list_function()
+    shader_name = cmds.textFieldButtonGrp( "shader_name", query=True, text=True )
+    palette_mode = cmds.checkBox( "palette_mode", query=True, value=True )
+    ui_conversion = conversion_start_function(viewport_selection, shader_name, palette_mode, True, rollback=True)
+    ui_conversion['start_time'] = time.time()
+    ui_progress_function(ui_conversion_rate_function(ui_conversion), 0, len(ui_conversion['shape_list']))
+    cmds.evalDeferred(ui_conversion_chunk_function, lowestPriority=True)
+
+def ui_conversion_chunk_function():
+    # converts shapes for idle_chunk_seconds and schedules the next chunk for the next time Maya is idle
+    # the last chunk puts the attribute writes of every shape on the undo queue, builds and assigns the combined shader,
+    # all in one undo chunk, one undo takes the whole run back
+    # a failing shape, for example one deleted while converting, cancels the conversion
+    global ui_conversion
+    conversion = ui_conversion
+    if conversion == None:
+        return
+    chunk_end_time = time.time() + idle_chunk_seconds
+    try:
+        while conversion_step_function(conversion) == True:
+            if time.time() > chunk_end_time:
+                break
+        if conversion['shape_index'] < len(conversion['shape_list']):
+            ui_progress_function(ui_conversion_rate_function(conversion), conversion['shape_index'])
+            cmds.evalDeferred(ui_conversion_chunk_function, lowestPriority=True)
+            return
+        label = ui_conversion_rate_function(conversion)
+        ui_conversion = None
+        cmds.undoInfo(openChunk=True, chunkName='polygon_shaders_to_single_shader')
+        try:
+            conversion_finish_function(conversion)
+        finally:
+            cmds.undoInfo(closeChunk=True)
+        ui_progress_function('Done: '+label, conversion['shape_index'])
+    except:
+        ui_conversion = None
+        conversion_cancel_function(conversion)
+        ui_progress_function('Failed, changes are rolled back', 0)
+        raise
+
+def ui_conversion_cancel_function():
+    # stops the running conversion and rolls back the attributes written so far
+    global ui_conversion
+    conversion = ui_conversion
+    if conversion == None:
+        return
+    ui_conversion = None
+    conversion_cancel_function(conversion)
+    ui_progress_function('Cancelled, changes are rolled back', 0)
 
 def one_shader_ui():
+    # the window of the session is shown again instead of being rebuilt, Close deletes it
     if cmds.window( "one_shader", exists=True ):
-        cmds.deleteUI( "one_shader" )
+        cmds.showWindow( "one_shader" )
+        return
     cmds.window( "one_shader", title="Convert Per Poly Shader to One Shader for Arnold", width=200, height=100 )
     cmds.columnLayout( adjustableColumn=True )
     cmds.text( label='' )
@@ -427,9 +1180,14 @@ def one_shader_ui():
     cmds.text( label='1. Drag and select objects on the viewport' )
     cmds.text( label='2. Give a Shader name and press Assign' )
     cmds.text( label='' )
-    cmds.textFieldButtonGrp( "shader_name", label='Shader Name: ', text='shader_MAT', buttonLabel='Assign', columnWidth3=(80,120,0), buttonCommand="main_function()" )
+    cmds.textFieldButtonGrp( "shader_name", label='Shader Name: ', text='shader_MAT', buttonLabel='Assign', columnWidth3=(80,120,0), buttonCommand=lambda *args: ui_conversion_start_function() )
+    cmds.checkBox( "palette_mode", label='Store values per shader (palette)', value=False )
     cmds.text( label='' )
-    cmds.button( label='Close', command=('cmds.deleteUI(\"' + "one_shader" + '\", window=True)') )
+    cmds.progressBar( "one_shader_progress", maxValue=1, progress=0 )
+    cmds.text( "one_shader_rate", label='' )
+    cmds.button( label='Cancel', command=lambda *args: ui_conversion_cancel_function() )
+    cmds.button( label='Close', command=lambda *args: (ui_conversion_cancel_function(), cmds.deleteUI( "one_shader", window=True )) )
     cmds.showWindow( "one_shader" )
 
-one_shader_ui()
+if __name__ == "__main__":
+    one_shader_ui()
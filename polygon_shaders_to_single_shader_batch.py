@@ -0,0 +1,164 @@
+"""
+Polygon Shaders to Single Shader - Batch
+
+Convert polygon based shader assignments to one shader for MtoA on many scenes without the UI.
+
+
+How to use
+
+    mayapy polygon_shaders_to_single_shader_batch.py scene1.ma scene2.mb --workers 4 --output-dir /path/to/output
+
+    Every mesh in a scene is converted, objects with a single shader are ignored.
+    Converted scenes are saved to the output directory, or next to the source scene with a "_one_shader"
+    suffix, together with a JSON summary per scene. Scenes with nothing to convert are not saved.
+    --profile adds a JSON report per scene with the time of every phase and the Maya commands called.
+    --sidecar adds a binary file per scene with the per face tables, see polygon_shaders_to_single_shader_sidecar.py.
+
+
+Python 2 and Python 3
+Maya 2018+
+
+Bhavesh Budhkar
+bhaveshbudhkar@yahoo.com
+"""
+
+
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+import traceback
+
+
+def initialize_worker():
+    """
+    Start a standalone Maya session with MtoA in the worker process.
+    :return: None
+    """
+    import maya.standalone
+    maya.standalone.initialize(name="python")
+
+    import maya.cmds as cmds
+    cmds.loadPlugin("mtoa", quiet=True)
+
+
+def output_path(scene_path, output_dir):
+    """
+    Path the converted scene is saved to.
+    :param scene_path: Source Scene Path
+    :param output_dir: Output Directory, None saves next to the source scene
+    :return: Output Scene Path
+    """
+    name, extension = os.path.splitext(os.path.basename(scene_path))
+    directory = output_dir if output_dir else os.path.dirname(os.path.abspath(scene_path))
+    return os.path.join(directory, "{0}_one_shader{1}".format(name, extension))
+
+
+def convert_scene(job):
+    """
+    Open a scene, convert all of its meshes and save the result.
+    :param job: Tuple of Scene Path, Output Directory, Shader Name, Palette Mode, Profile and Sidecar
+    :return: Summary Dictionary
+    """
+    scene_path, output_dir, shader_name, palette_mode, profile, sidecar = job
+
+    import maya.cmds as cmds
+    import polygon_shaders_to_single_shader
+
+    start_time = time.time()
+    summary = {"scene": scene_path, "output": None, "status": "skipped"}
+
+    try:
+        cmds.file(scene_path, open=True, force=True)
+
+        mesh_list = cmds.ls(type="mesh", noIntermediate=True, long=True) or []
+        object_list = []
+        for mesh in mesh_list:
+            transform = cmds.listRelatives(mesh, parent=True, fullPath=True)[0]
+            if transform not in object_list:
+                object_list.append(transform)
+
+        if object_list:
+            profile_path = None
+            if profile:
+                profile_path = os.path.splitext(output_path(scene_path, output_dir))[0] + "_profile.json"
+                summary["profile"] = profile_path
+            sidecar_path = None
+            if sidecar:
+                sidecar_path = os.path.splitext(output_path(scene_path, output_dir))[0] + "_tables.bin"
+            summary.update(polygon_shaders_to_single_shader.convert_function(object_list, shader_name, palette_mode,
+                                                                             profile_path=profile_path,
+                                                                             sidecar_path=sidecar_path))
+
+            if summary["converted_objects"]:
+                summary["output"] = output_path(scene_path, output_dir)
+                scene_type = "mayaBinary" if summary["output"].endswith(".mb") else "mayaAscii"
+                cmds.file(rename=summary["output"])
+                cmds.file(save=True, type=scene_type, force=True)
+                summary["status"] = "converted"
+    except Exception:
+        summary["status"] = "failed"
+        summary["error"] = traceback.format_exc()
+
+    summary["seconds"] = round(time.time() - start_time, 3)
+
+    summary_path = os.path.splitext(summary["output"] or output_path(scene_path, output_dir))[0] + ".json"
+    with open(summary_path, "w") as summary_file:
+        json.dump(summary, summary_file, indent=4, sort_keys=True)
+
+    return summary
+
+
+def parse_arguments(arguments):
+    """
+    Command line arguments.
+    :param arguments: List of Arguments
+    :return: argparse.Namespace
+    """
+    parser = argparse.ArgumentParser(description="Convert per face shader assignments to one shader on many scenes.")
+    parser.add_argument("scenes", nargs="+", help="Maya scene files to convert")
+    parser.add_argument("--workers", type=int, default=multiprocessing.cpu_count(),
+                        help="number of worker processes (default: number of CPUs)")
+    parser.add_argument("--output-dir", default=None,
+                        help="directory for converted scenes (default: next to each source scene)")
+    parser.add_argument("--shader-name", default="shader_MAT", help="name of the combined shader")
+    parser.add_argument("--palette", action="store_true", help="store shader values once per shader (palette mode)")
+    parser.add_argument("--profile", action="store_true",
+                        help="write a JSON report of phase times and Maya command counts per scene")
+    parser.add_argument("--sidecar", action="store_true", help="write the per face tables to a binary file per scene")
+    return parser.parse_args(arguments)
+
+
+def main(arguments=None):
+    """
+    Convert every scene in a pool of standalone Maya workers.
+    :param arguments: List of Arguments, defaults to sys.argv
+    :return: Exit Code
+    """
+    arguments = parse_arguments(sys.argv[1:] if arguments is None else arguments)
+
+    if arguments.output_dir and not os.path.isdir(arguments.output_dir):
+        os.makedirs(arguments.output_dir)
+
+    jobs = [(scene, arguments.output_dir, arguments.shader_name, arguments.palette, arguments.profile,
+             arguments.sidecar)
+            for scene in arguments.scenes]
+
+    pool = multiprocessing.Pool(processes=max(1, arguments.workers), initializer=initialize_worker)
+    failed = 0
+    try:
+        for summary in pool.imap_unordered(convert_scene, jobs):
+            if summary["status"] == "failed":
+                failed += 1
+            sys.stdout.write("{0}: {1} ({2}s)\n".format(summary["scene"], summary["status"], summary["seconds"]))
+    finally:
+        pool.close()
+        pool.join()
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,405 @@
+"""
+Polygon Shaders to Single Shader - Scan
+
+Find objects with per face shader assignments in Maya ASCII scenes without Maya.
+
+
+How to use
+
+    python polygon_shaders_to_single_shader_scan.py scenes/*.ma --workers 8 --json scan.json
+    python polygon_shaders_to_single_shader_scan.py scenes/*.ma --list > to_convert.txt
+
+    Every scene is streamed line by line, big data blocks like vertex and face lists are skipped without
+    being kept in memory. For every scene the scan collects the same tables the converter builds in Maya:
+
+        assignment_index    shape -> shader -> list of [first face, last face]
+        shaders             shader -> explicitly set aiStandardSurface values and texture connected parameters
+        multiple_shader_shapes  shapes with more than one shader, the ones the converter combines
+
+    --list prints only the scenes with something to convert, ready for polygon_shaders_to_single_shader_batch.py.
+
+
+Limitations
+
+1. Maya ASCII only, Maya Binary scenes are reported as skipped
+2. Whole object assignments of meshes whose faces only come from construction history have an unknown last face (None)
+3. Only the first instance of a shape is read
+4. Shader values left at their default are not written to the scene and are not listed
+
+
+Python 2 and Python 3
+
+Bhavesh Budhkar
+bhaveshbudhkar@yahoo.com
+"""
+
+
+import argparse
+import collections
+import io
+import json
+import multiprocessing
+import re
+import shlex
+import sys
+import traceback
+
+
+# instObjGroups[instance].objectGroups[group], long or short names, the instance index is optional
+OBJECT_GROUP_PATTERN = re.compile(
+    r"^(?:iog|instObjGroups)(?:\[(\d+)\])?(?:\.(?:og|objectGroups)\[(\d+)\])?$")
+
+# the component list of an object group, set on the shape
+COMPONENT_LIST_PATTERN = re.compile(
+    r"^\.(?:iog|instObjGroups)\[(\d+)\]\.(?:og|objectGroups)\[(\d+)\]\.(?:gcl|objectGrpCompList)$")
+
+# the size of the face list of a mesh, first line of: setAttr -s 6 -ch 24 ".fc[0:5]" -type "polyFaces"
+# other flags, like the -ch count of face vertices, may come before or after -s
+FACE_COUNT_PATTERN = re.compile(r'^\s*setAttr(?:\s+-(?!s\s)\w+\s+\S+)*\s+-s\s+(\d+)(?:\s+-\w+\s+\S+)*\s+"\.(?:fc|face)\[')
+
+FACE_RANGE_PATTERN = re.compile(r"^f\[(\d+)(?::(\d+))?\]$")
+
+# short names without an obvious long name
+PARAMETER_ALIASES = {"n": "normalCamera"}
+
+# shading engines Maya does not write a surface shader connection for
+DEFAULT_SURFACE_SHADERS = {"initialShadingGroup": "lambert1", "initialParticleSE": "lambert1"}
+
+SHADER_TYPES = ("aiStandardSurface",)
+
+
+def parameter_name(attribute):
+    """
+    Long shader parameter name of a long or short attribute name, base_color and baseColor give baseColor.
+    :param attribute: Attribute Name
+    :return: Parameter Name
+    """
+    if attribute in PARAMETER_ALIASES:
+        return PARAMETER_ALIASES[attribute]
+    words = attribute.split("_")
+    return words[0] + "".join(word[:1].upper() + word[1:] for word in words[1:])
+
+
+def node_name(name):
+    """
+    Node name without the leading colon of default nodes.
+    :param name: Node Name or DAG Path
+    :return: Node Name
+    """
+    return name[1:] if name.startswith(":") else name
+
+
+def split_plug(plug):
+    """
+    Node and attribute of a plug.
+    :param plug: Plug like "pCubeShape1.iog.og[0]"
+    :return: Tuple of Node Name and Attribute
+    """
+    node, _, attribute = plug.partition(".")
+    return node_name(node), attribute
+
+
+def read_statements(lines, keep):
+    """
+    Stream the MEL statements of a scene.
+    Statements are yielded as (first line, statement). The statement is None when keep(first line) is
+    False, its other lines are skipped without being kept.
+    :param lines: Iterable of Lines
+    :param keep: Function of the first line of a statement
+    :return: Generator of Tuples
+    """
+    first_line = None
+    statement_lines = None
+    for line in lines:
+        if first_line is None:
+            if not line.strip() or line.lstrip().startswith("//"):
+                continue
+            first_line = line
+            statement_lines = [line.strip()] if keep(line) else None
+        elif statement_lines is not None:
+            statement_lines.append(line.strip())
+        if line.rstrip().endswith(";"):
+            statement = None
+            if statement_lines is not None:
+                statement = " ".join(statement_lines)[:-1]
+            yield first_line, statement
+            first_line = None
+    if first_line is not None and statement_lines is not None:
+        yield first_line, " ".join(statement_lines)
+
+
+def parse_value(tokens):
+    """
+    Value of a setAttr statement the way getAttr returns it, colors as a list of one tuple.
+    :param tokens: Tokens after the attribute name
+    :return: Value, None when the statement sets no value
+    """
+    values = []
+    data_type = None
+    index = 0
+    while index < len(tokens):
+        token = tokens[index]
+        if token == "-type":
+            data_type = tokens[index + 1]
+            index += 2
+            continue
+        if token.startswith("-") and not token[1:2].isdigit() and token[1:2] != ".":
+            # flags like -k on, -l off, -cb on
+            index += 2
+            continue
+        values.append(token)
+        index += 1
+    if not values:
+        return None
+    if data_type == "string":
+        return values[0]
+    numbers = []
+    for value in values:
+        if value in ("yes", "true", "on"):
+            numbers.append(1.0)
+        elif value in ("no", "false", "off"):
+            numbers.append(0.0)
+        else:
+            try:
+                numbers.append(float(value))
+            except ValueError:
+                return values[0]
+    if len(numbers) == 3:
+        return [tuple(numbers)]
+    return numbers[0]
+
+
+def face_ranges(components):
+    """
+    First and last face of face components.
+    :param components: List like ["f[0:5]", "f[9]"]
+    :return: List of [First Face, Last Face]
+    """
+    ranges = []
+    for component in components:
+        match = FACE_RANGE_PATTERN.match(component)
+        if match is not None:
+            start = int(match.group(1))
+            ranges.append([start, int(match.group(2)) if match.group(2) is not None else start])
+    return ranges
+
+
+class SceneScan(object):
+    """
+    Tables of one scene, filled statement by statement.
+    """
+
+    def __init__(self):
+        self.node_types = {}
+        self.long_names = {}
+        self.short_names = {}
+        self.current_node = None
+        self.face_counts = {}
+        self.component_lists = {}
+        self.members = []
+        self.surface_shaders = dict(DEFAULT_SURFACE_SHADERS)
+        self.shaders = collections.OrderedDict()
+
+    def resolve(self, name):
+        """
+        Long name of a node name or DAG path, as the converter keys shapes.
+        :param name: Node Name or DAG Path
+        :return: Long Name
+        """
+        name = node_name(name)
+        if name.startswith("|"):
+            return name
+        return self.short_names.get(name, name)
+
+    def keep(self, first_line):
+        """
+        Statements worth parsing, everything else is skipped unparsed.
+        :param first_line: First Line of a Statement
+        :return: Boolean
+        """
+        stripped = first_line.lstrip()
+        if stripped.startswith(("createNode ", "connectAttr ", "select ")):
+            return True
+        if stripped.startswith("setAttr "):
+            if self.node_types.get(self.current_node) in SHADER_TYPES:
+                return True
+            return ".gcl" in stripped or "objectGrpCompList" in stripped
+        return False
+
+    def read(self, first_line, statement):
+        """
+        Update the tables with a statement.
+        :param first_line: First Line of the Statement
+        :param statement: Statement, None when it was skipped
+        :return: None
+        """
+        if statement is None:
+            match = FACE_COUNT_PATTERN.match(first_line)
+            if match is not None and self.node_types.get(self.current_node) == "mesh":
+                self.face_counts[self.current_node] = int(match.group(1))
+            return
+
+        tokens = shlex.split(statement)
+        command = tokens[0]
+        if command == "createNode":
+            self.create_node(tokens)
+        elif command == "select":
+            # select -ne :initialShadingGroup; the setAttr statements after it go to that node
+            self.current_node = self.resolve(tokens[-1])
+        elif command == "setAttr":
+            self.set_attr(tokens)
+        elif command == "connectAttr":
+            self.connect_attr(tokens)
+
+    def create_node(self, tokens):
+        node_type = tokens[1]
+        options = dict(zip(tokens[2::2], tokens[3::2]))
+        name = options.get("-n", options.get("-name", node_type + "1"))
+        parent = options.get("-p", options.get("-parent"))
+        if parent is not None:
+            long_name = self.resolve(parent) + "|" + name
+        elif node_type == "transform":
+            long_name = "|" + name
+        else:
+            long_name = name
+        self.node_types[long_name] = node_type
+        self.short_names[name] = long_name
+        self.current_node = long_name
+        if node_type in SHADER_TYPES:
+            self.shaders[long_name] = {"values": {}, "textured": []}
+
+    def set_attr(self, tokens):
+        attribute_index = [index for index, token in enumerate(tokens) if token.startswith(".")]
+        if not attribute_index:
+            return
+        attribute = tokens[attribute_index[0]]
+        arguments = tokens[1:attribute_index[0]] + tokens[attribute_index[0] + 1:]
+
+        match = COMPONENT_LIST_PATTERN.match(attribute)
+        if match is not None:
+            components = [token for token in arguments if token.startswith("f[")]
+            key = (self.current_node, int(match.group(1)), int(match.group(2)))
+            self.component_lists.setdefault(key, []).extend(face_ranges(components))
+            return
+
+        if self.current_node in self.shaders:
+            value = parse_value(arguments)
+            if value is not None:
+                self.shaders[self.current_node]["values"][parameter_name(attribute[1:])] = value
+
+    def connect_attr(self, tokens):
+        plugs = [token for token in tokens[1:] if not token.startswith("-")]
+        if len(plugs) < 2:
+            return
+        source_node, source_attribute = split_plug(plugs[0])
+        destination_node, destination_attribute = split_plug(plugs[1])
+        destination_node = self.resolve(destination_node)
+        destination_attribute = destination_attribute.split("[")[0]
+
+        if destination_attribute in ("dsm", "dagSetMembers"):
+            match = OBJECT_GROUP_PATTERN.match(source_attribute)
+            if match is not None and int(match.group(1) or 0) == 0:
+                group = int(match.group(2)) if match.group(2) is not None else None
+                self.members.append((self.resolve(source_node), group, destination_node))
+        elif destination_attribute in ("ss", "surfaceShader"):
+            self.surface_shaders[destination_node] = self.resolve(source_node)
+        elif destination_node in self.shaders:
+            parameter = parameter_name(destination_attribute.split(".")[0])
+            if parameter not in self.shaders[destination_node]["textured"]:
+                self.shaders[destination_node]["textured"].append(parameter)
+
+    def assignment_index(self):
+        """
+        shape -> shader -> list of [first face, last face], like shader_assignment_index_function.
+        :return: Dictionary
+        """
+        assignment_index = collections.OrderedDict()
+        for shape, group, shading_engine in self.members:
+            shader = self.surface_shaders.get(shading_engine)
+            if shader is None:
+                continue
+            if group is None:
+                face_count = self.face_counts.get(shape)
+                ranges = [[0, face_count - 1 if face_count is not None else None]]
+            else:
+                ranges = self.component_lists.get((shape, 0, group), [])
+            if ranges:
+                shader_dictionary = assignment_index.setdefault(shape, collections.OrderedDict())
+                shader_dictionary.setdefault(shader, []).extend(ranges)
+        return assignment_index
+
+
+def scan_scene(scene_path):
+    """
+    Scan one Maya ASCII scene.
+    :param scene_path: Scene Path
+    :return: Dictionary of the Scene Tables
+    """
+    result = {"scene": scene_path, "status": "scanned"}
+    if not scene_path.lower().endswith(".ma"):
+        result["status"] = "skipped"
+        return result
+    try:
+        scan = SceneScan()
+        with io.open(scene_path, "r", encoding="utf-8", errors="replace") as scene_file:
+            for first_line, statement in read_statements(scene_file, scan.keep):
+                scan.read(first_line, statement)
+        assignment_index = scan.assignment_index()
+        result["assignment_index"] = assignment_index
+        result["shaders"] = scan.shaders
+        result["multiple_shader_shapes"] = [shape for shape in assignment_index if len(assignment_index[shape]) > 1]
+    except Exception:
+        result["status"] = "failed"
+        result["error"] = traceback.format_exc()
+    return result
+
+
+def parse_arguments(arguments):
+    """
+    Command line arguments.
+    :param arguments: List of Arguments
+    :return: argparse.Namespace
+    """
+    parser = argparse.ArgumentParser(description="Find per face shader assignments in Maya ASCII scenes without Maya.")
+    parser.add_argument("scenes", nargs="+", help="Maya ASCII scenes to scan")
+    parser.add_argument("--workers", type=int, default=multiprocessing.cpu_count(),
+                        help="number of worker processes (default: number of CPUs)")
+    parser.add_argument("--json", default=None, help="write the tables of every scene to a JSON file")
+    parser.add_argument("--list", action="store_true", help="only print the scenes with objects to convert")
+    return parser.parse_args(arguments)
+
+
+def main(arguments=None):
+    """
+    Scan every scene in a pool of worker processes.
+    :param arguments: List of Arguments, defaults to sys.argv
+    :return: Exit Code
+    """
+    arguments = parse_arguments(sys.argv[1:] if arguments is None else arguments)
+
+    results = []
+    pool = multiprocessing.Pool(processes=max(1, arguments.workers))
+    try:
+        for result in pool.imap_unordered(scan_scene, arguments.scenes, chunksize=4):
+            results.append(result)
+            shapes = result.get("multiple_shader_shapes", [])
+            if arguments.list:
+                if shapes:
+                    sys.stdout.write(result["scene"] + "\n")
+            else:
+                sys.stdout.write("{0}: {1}, {2} objects to convert\n".format(result["scene"], result["status"],
+                                                                             len(shapes)))
+    finally:
+        pool.close()
+        pool.join()
+
+    if arguments.json:
+        results.sort(key=lambda result: result["scene"])
+        with open(arguments.json, "w") as json_file:
+            json.dump(results, json_file, indent=4)
+
+    return 1 if any(result["status"] == "failed" for result in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,208 @@
+"""
+Polygon Shaders to Single Shader - Sidecar
+
+Binary sidecar file of the per face shader tables a conversion writes on the shapes.
+
+
+How to use
+
+    In Maya
+        polygon_shaders_to_single_shader.convert_function(objects, "shader_MAT", sidecar_path="/path/to/scene_tables.bin")
+
+    Anywhere, without Maya
+        with SidecarReader("/path/to/scene_tables.bin") as sidecar:
+            for shape in sidecar.shapes():
+                face_set = sidecar.value(shape, "mtoa_uniform_face_set")
+
+    Next to the attributes on the shapes, a conversion with a sidecar path also writes their values keyed by
+    shape long name: the face_set index, the per face values (mtoa_uniform_*), the palette (mtoa_constant_*)
+    and the texture path table (mtoa_constant_path_*).
+
+
+File layout, version 1
+
+    4 bytes     magic "OSST"
+    4 bytes     version, unsigned int, little endian
+    8 bytes     header size, unsigned long long, little endian
+    header      JSON, shape -> attribute -> table entry
+    data        arrays, every array starts on a multiple of 8 bytes from the start of the data
+
+    Int32Array, doubleArray and vectorArray values are raw int32 and float64 arrays in the byte order named
+    in the header, vectorArray values are flat x y z triplets. Strings, doubles and colors are in the header.
+    The reader maps the file and only parses the header, arrays are read when asked for. On Python 3 with
+    the same byte order they are memoryviews on the mapped file, no copy is made, see mapped_file.py.
+
+
+Python 2 and Python 3
+
+Bhavesh Budhkar
+bhaveshbudhkar@yahoo.com
+"""
+
+
+import json
+import struct
+import sys
+from array import array
+
+from mapped_file import MappedFile
+
+
+MAGIC = b"OSST"
+VERSION = 1
+
+PREAMBLE = struct.Struct("<4sIQ")
+
+ALIGNMENT = 8
+
+# array typecode and values per element of the array data types
+ARRAY_FORMATS = {"Int32Array": ("i", 1), "doubleArray": ("d", 1), "vectorArray": ("d", 3)}
+
+
+def padding(size):
+    """
+    Bytes needed to round a size up to ALIGNMENT.
+    :param size: Size in Bytes
+    :return: Number of Padding Bytes
+    """
+    return -size % ALIGNMENT
+
+
+def array_bytes(values, typecode, width):
+    """
+    Raw bytes of an array value.
+    :param values: List of Numbers, or of Tuples for width 3
+    :param typecode: array Typecode
+    :param width: Values per Element
+    :return: Bytes
+    """
+    if width > 1:
+        values = [component for value in values for component in value]
+    data = array(typecode, values)
+    return data.tobytes() if hasattr(data, "tobytes") else data.tostring()
+
+
+def write_sidecar(sidecar_path, tables, metadata=None):
+    """
+    Write the tables of a conversion to a sidecar file.
+    :param sidecar_path: Sidecar Path
+    :param tables: Dictionary of Shape -> Attribute -> (Data Type, Value), multi attributes have a
+                   Dictionary of Index -> Value as value
+    :param metadata: Dictionary stored as is in the header
+    :return: Sidecar Path
+    """
+    header = {"version": VERSION, "byteorder": sys.byteorder, "metadata": metadata or {}, "shapes": {}}
+    blocks = []
+    data_size = 0
+    for shape, attributes in tables.items():
+        shape_header = header["shapes"][shape] = {}
+        for attribute, (data_type, value) in attributes.items():
+            if data_type in ARRAY_FORMATS:
+                typecode, width = ARRAY_FORMATS[data_type]
+                block = array_bytes(value, typecode, width)
+                shape_header[attribute] = {"type": data_type, "offset": data_size, "count": len(value)}
+                blocks.append(block + b"\0" * padding(len(block)))
+                data_size += len(blocks[-1])
+            elif isinstance(value, dict):
+                shape_header[attribute] = {"type": data_type, "values": [[index, value[index]] for index in sorted(value)]}
+            else:
+                shape_header[attribute] = {"type": data_type, "value": value}
+
+    header_bytes = json.dumps(header, sort_keys=True).encode("utf-8")
+    header_bytes += b" " * padding(PREAMBLE.size + len(header_bytes))
+    with open(sidecar_path, "wb") as sidecar_file:
+        sidecar_file.write(PREAMBLE.pack(MAGIC, VERSION, len(header_bytes)))
+        sidecar_file.write(header_bytes)
+        for block in blocks:
+            sidecar_file.write(block)
+    return sidecar_path
+
+
+class SidecarReader(object):
+    """
+    Lazy reader of a sidecar file.
+    Views returned by value() point into the mapped file, close() releases them.
+    """
+
+    def __init__(self, sidecar_path):
+        self.sidecar_path = sidecar_path
+        self._file = open(sidecar_path, "rb")
+        try:
+            magic, version, header_size = PREAMBLE.unpack(self._file.read(PREAMBLE.size))
+            if magic != MAGIC:
+                raise ValueError("{0} is not a shader table sidecar".format(sidecar_path))
+            if version > VERSION:
+                raise ValueError("{0} is version {1}, this reader reads up to version {2}".format(sidecar_path, version,
+                                                                                                  VERSION))
+            self.header = json.loads(self._file.read(header_size).decode("utf-8"))
+            self._data_offset = PREAMBLE.size + header_size
+            self._map = None
+            if self._has_arrays():
+                self._map = MappedFile(self._file)
+        except Exception:
+            self._file.close()
+            raise
+
+    def _has_arrays(self):
+        for attributes in self.header["shapes"].values():
+            for entry in attributes.values():
+                if "offset" in entry:
+                    return True
+        return False
+
+    @property
+    def metadata(self):
+        return self.header["metadata"]
+
+    def shapes(self):
+        """
+        Shapes in the sidecar.
+        :return: List of Shape Long Names
+        """
+        return sorted(self.header["shapes"])
+
+    def attributes(self, shape):
+        """
+        Attributes of a shape.
+        :param shape: Shape Long Name
+        :return: Dictionary of Attribute -> Data Type
+        """
+        return dict((attribute, entry["type"]) for attribute, entry in self.header["shapes"][shape].items())
+
+    def value(self, shape, attribute):
+        """
+        Value of an attribute of a shape, arrays are only read here.
+        :param shape: Shape Long Name
+        :param attribute: Attribute Name
+        :return: memoryview or array for arrays, Dictionary of Index -> Value for multi attributes, else the Value
+        """
+        entry = self.header["shapes"][shape][attribute]
+        if "value" in entry:
+            value = entry["value"]
+            return tuple(value) if entry["type"] == "float3" else value
+        if "values" in entry:
+            return dict((index, value) for index, value in entry["values"])
+
+        typecode, width = ARRAY_FORMATS[entry["type"]]
+        return self._map.array(self._data_offset + entry["offset"], entry["count"] * width, typecode,
+                               self.header["byteorder"])
+
+    def table(self, shape):
+        """
+        Every attribute value of a shape.
+        :param shape: Shape Long Name
+        :return: Dictionary of Attribute -> Value
+        """
+        return dict((attribute, self.value(shape, attribute)) for attribute in self.header["shapes"][shape])
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
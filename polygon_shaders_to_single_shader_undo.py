@@ -0,0 +1,109 @@
+'''
+
+Maya plugin of polygon_shaders_to_single_shader.py, puts the attribute writes of a conversion on Maya's undo queue.
+
+The conversion writes the attributes of every shape with one MDGModifier, which is fast but not undoable on its own.
+The oneShaderModifier command runs the modifier of the shape being converted, Maya then keeps the command on its
+undo queue and undo, redo call the modifier back. A conversion from the UI writes its shapes in idle time chunks and
+hands all of their modifiers to one oneShaderModifier command at the end, one undo takes the whole run back.
+polygon_shaders_to_single_shader.py loads the plugin on its first write, the command is not meant to be called by hand.
+
+Bhavesh Budhkar
+bhaveshbudhkar@yahoo.com
+
+
+'''
+
+import maya.api.OpenMaya as om
+
+# name of the command the plugin registers
+command_name = 'oneShaderModifier'
+
+# function the next oneShaderModifier call runs, it returns the modifier it has done
+pending_function = None
+
+# UndoableModifier of the last oneShaderModifier call
+last_modifier = None
+
+def maya_useNewAPI():
+    # tells Maya the plugin uses maya.api.OpenMaya
+    pass
+
+class UndoableModifier(object):
+    # a modifier which is done once, the undo queue and a cancelled conversion can both take it back
+    def __init__(self, modifier):
+        self.modifier = modifier
+        self.done = True
+
+    def undoIt(self):
+        if self.done == True:
+            self.modifier.undoIt()
+            self.done = False
+
+    def redoIt(self):
+        if self.done == False:
+            self.modifier.doIt()
+            self.done = True
+
+class ModifierGroup(object):
+    # modifiers which are done, taken back in reverse order and done again in order, like one modifier
+    def __init__(self, modifier_list):
+        self.modifier_list = list(modifier_list)
+
+    def doIt(self):
+        for modifier in self.modifier_list:
+            modifier.doIt()
+
+    def undoIt(self):
+        for modifier in reversed(self.modifier_list):
+            modifier.undoIt()
+
+class ModifierCommand(om.MPxCommand):
+    # runs the pending function and keeps its modifier for undo and redo
+    def __init__(self):
+        om.MPxCommand.__init__(self)
+        self.undoable_modifier = None
+
+    @staticmethod
+    def creator():
+        return(ModifierCommand())
+
+    def doIt(self, arguments):
+        # the module Maya loaded the plugin from may not be the one the conversion imported
+        import polygon_shaders_to_single_shader_undo as undo_module
+        function = undo_module.pending_function
+        undo_module.pending_function = None
+        modifier = function()
+        if modifier != None:
+            self.undoable_modifier = UndoableModifier(modifier)
+        undo_module.last_modifier = self.undoable_modifier
+
+    def redoIt(self):
+        self.undoable_modifier.redoIt()
+
+    def undoIt(self):
+        self.undoable_modifier.undoIt()
+
+    def isUndoable(self):
+        return(self.undoable_modifier != None)
+
+def initializePlugin(plugin):
+    om.MFnPlugin(plugin, 'Bhavesh Budhkar', '1.0').registerCommand(command_name, ModifierCommand.creator)
+
+def uninitializePlugin(plugin):
+    om.MFnPlugin(plugin).deregisterCommand(command_name)
+
+def run_undoable_function(function):
+    # runs a function returning a done MDGModifier through oneShaderModifier, loads the plugin if needed
+    # returns the UndoableModifier, None when the function returned None
+    import maya.cmds as cmds
+    # maya.cmds has the command once the plugin is loaded
+    if hasattr(cmds, command_name) == False:
+        cmds.loadPlugin(__file__.replace('.pyc', '.py'), quiet=True)
+    import polygon_shaders_to_single_shader_undo as undo_module
+    undo_module.pending_function = function
+    try:
+        getattr(cmds, command_name)()
+    finally:
+        undo_module.pending_function = None
+    return(undo_module.last_modifier)
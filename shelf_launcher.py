@@ -0,0 +1,44 @@
+"""
+Shelf Launcher
+
+Open the tools from shelf buttons, each tool is imported on its first open and its window is reused.
+
+
+How to use
+
+    Generate Pref shelf button
+        import shelf_launcher
+        shelf_launcher.open_generate_pref()
+
+    Polygon Shaders to Single Shader shelf button
+        import shelf_launcher
+        shelf_launcher.open_polygon_shaders_to_single_shader()
+
+    Importing this module imports nothing else, batch and farm processes import the tool modules directly
+    (generate_pref, polygon_shaders_to_single_shader) and never load Qt.
+
+
+Python 2 and Python 3
+Maya 2018+
+
+Bhavesh Budhkar
+bhaveshbudhkar@yahoo.com
+"""
+
+
+def open_generate_pref():
+    """
+    Open the Generate Pref window.
+    :return: generate_pref_ui.GeneratePrefUI Object
+    """
+    import generate_pref_ui
+    return generate_pref_ui.show_ui()
+
+
+def open_polygon_shaders_to_single_shader():
+    """
+    Open the Polygon Shaders to Single Shader window.
+    :return: None
+    """
+    import polygon_shaders_to_single_shader
+    polygon_shaders_to_single_shader.one_shader_ui()